@@ -48,26 +48,35 @@ def process_demo(state: AgentState) -> Dict[str, Any]:
     
     last_msg = messages[-1]
     content = last_msg.content if hasattr(last_msg, 'content') else str(last_msg)
+    return {"demo_response": build_demo_response(content)}
+
+
+def build_demo_response(message_content: str) -> Dict[str, Any]:
+    """Look up the mock component data for a /demo command.
     
+    Args:
+        message_content: The message content (e.g., "/demo log-draft")
+        
+    Returns:
+        PAH component data, help text for unknown components, or an error
+    """
     # Parse the demo command
-    component_name = parse_demo_command(content)
+    component_name = parse_demo_command(message_content)
     if not component_name:
-        return {"demo_response": {"error": "Invalid demo command format"}}
+        return {"error": "Invalid demo command format"}
     
     # Get mock response
     mock_response = get_mock_response(component_name)
     if mock_response:
         logger.info(f"Demo agent returning mock response for: {component_name}")
-        return {"demo_response": mock_response}
+        return mock_response
     
     # Component not found - return help text
     available = get_available_components()
     help_text = f"Unknown component: '{component_name}'. Available: {', '.join(available)}"
     return {
-        "demo_response": {
-            "type": "pah-text",
-            "messages": [{"role": "assistant", "content": help_text}]
-        }
+        "type": "pah-text",
+        "messages": [{"role": "assistant", "content": help_text}]
     }
 
 
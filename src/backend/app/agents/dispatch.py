@@ -0,0 +1,83 @@
+"""Fast-path dispatch for deterministic orchestrator routes.
+
+`/demo` commands and callback contexts are pure lookups, but going through
+the orchestrator costs two compiled-graph runs (orchestrator plus sub-agent),
+the state reducers and the astream_events callback machinery. This module
+recognizes those routes up front and calls the sub-agent logic directly.
+
+Anything that is not matched here (normal chat) still goes through
+get_orchestrator_graph(), whose route_message keeps the same rules.
+"""
+
+import logging
+from typing import Any, Callable, Dict, Optional, Sequence, Tuple
+
+from app.agents.callback_agent import process_callback
+from app.agents.demo_agent import build_demo_response
+
+logger = logging.getLogger(__name__)
+
+# Slash command -> handler taking the full message content and returning
+# the demo_response the matching sub-agent would produce
+COMMAND_ROUTES: Dict[str, Callable[[str], Dict[str, Any]]] = {
+    "/demo": build_demo_response,
+}
+
+
+def _message_content(message: Any) -> Optional[str]:
+    """Text content of an OpenAI-format dict or LangChain message."""
+    if isinstance(message, dict):
+        content = message.get("content")
+    else:
+        content = getattr(message, "content", None)
+    return content if isinstance(content, str) else None
+
+
+def _match_command(messages: Sequence[Any]) -> Optional[Tuple[str, str]]:
+    """(command, content) if the last message is a routed command."""
+    if not messages:
+        return None
+    content = _message_content(messages[-1])
+    if content is None:
+        return None
+    # Same rule as is_demo_command: "<command> <args>" after stripping
+    command, sep, _ = content.strip().partition(" ")
+    if not sep or command not in COMMAND_ROUTES:
+        return None
+    return command, content
+
+
+def has_fast_path(messages: Sequence[Any]) -> bool:
+    """True if dispatch_chat would answer these messages without the LLM."""
+    return _match_command(messages) is not None
+
+
+def dispatch_chat(messages: Sequence[Any]) -> Optional[Dict[str, Any]]:
+    """Answer a chat request without LangGraph if it hits a command route.
+
+    Args:
+        messages: Conversation messages; only the last one is inspected
+
+    Returns:
+        The demo_response for a recognized command, or None to fall back
+        to the orchestrator graph
+    """
+    match = _match_command(messages)
+    if match is None:
+        return None
+    command, content = match
+    logger.info(f"Fast-path dispatch for {command}")
+    return COMMAND_ROUTES[command](content)
+
+
+def dispatch_callback(callback_context: Dict[str, Any]) -> Dict[str, Any]:
+    """Run a component callback straight through the callback agent's node.
+
+    Args:
+        callback_context: Same shape the orchestrator receives from /callback
+
+    Returns:
+        The callback_response the orchestrator graph would return
+    """
+    result = process_callback({"messages": [], "callback_context": callback_context})
+    return result.get("callback_response", {})
@@ -4,21 +4,30 @@ Routes requests to appropriate sub-agents:
 - callback_context -> callback_agent (from /callback endpoint)
 - /demo commands -> demo_agent
 - Normal messages -> LLM agent with tools
+
+Nodes are async by default (AGENT_ASYNC_NODES): the LLM is awaited with
+ainvoke and sub-agents with their graph's ainvoke, so concurrent streams
+are bounded by the event loop rather than by LangGraph's executor threads.
 """
 
 import logging
 from functools import lru_cache
-from typing import Literal
+from typing import Literal, Optional
 
 from langgraph.graph import StateGraph, END
 from langgraph.prebuilt import ToolNode, tools_condition
-from langchain_openai import ChatOpenAI
+from langchain_core.language_models import LanguageModelLike
+from langchain_core.utils.function_calling import convert_to_openai_tool
 
 from app.agents.state import AgentState
 from app.agents.tools import TOOLS
 from app.agents.demo_agent import is_demo_command, get_demo_agent_graph
 from app.agents.callback_agent import is_callback_intent, get_callback_agent_graph
 from app.core.settings import settings
+from app.services.admission import AdmissionController, get_admission_controller
+from app.services.llm_router import RoutedChatModel
+from app.services.llms import create_chat_model
+from app.services.response_cache import cache_scope
 
 logger = logging.getLogger(__name__)
 
@@ -80,6 +89,18 @@ def run_callback_subgraph(state: AgentState) -> dict:
     return {"callback_response": result.get("callback_response")}
 
 
+async def arun_demo_subgraph(state: AgentState) -> dict:
+    """Async variant of run_demo_subgraph, awaited on the event loop."""
+    result = await get_demo_agent_graph().ainvoke(state)
+    return {"demo_response": result.get("demo_response")}
+
+
+async def arun_callback_subgraph(state: AgentState) -> dict:
+    """Async variant of run_callback_subgraph, awaited on the event loop."""
+    result = await get_callback_agent_graph().ainvoke(state)
+    return {"callback_response": result.get("callback_response")}
+
+
 @lru_cache(maxsize=1)
 def get_orchestrator_graph():
     """Create and compile the orchestrator agent graph (lazy singleton).
@@ -98,26 +119,71 @@ def get_orchestrator_graph():
     logger.info(f"Orchestrator LLM Model: {settings.LLM_MODEL}")
 
     # Initialize the LLM with tools bound
-    model = ChatOpenAI(
-        model=settings.LLM_MODEL,
-        api_key=settings.LLM_API_KEY,
-        base_url=settings.LLM_BASE_URL,
-        streaming=True,
-    ).bind_tools(TOOLS)
+    chat_model = create_chat_model()
+    model = chat_model.bind_tools(TOOLS)
+    
+    return build_orchestrator_graph(
+        model,
+        async_nodes=settings.AGENT_ASYNC_NODES,
+        # A routed model admits each call on its endpoint model's controller
+        admission=None if isinstance(chat_model, RoutedChatModel) else get_admission_controller(),
+    )
+
+
+@lru_cache(maxsize=1)
+def get_response_cache_scope() -> str:
+    """Response cache scope for the llm_agent node: model(s) and tool schemas."""
+    model = settings.LLM_ENDPOINTS or settings.LLM_MODEL
+    return cache_scope(model, [convert_to_openai_tool(tool) for tool in TOOLS])
+
+
+def build_orchestrator_graph(
+    model: LanguageModelLike,
+    async_nodes: bool = True,
+    admission: Optional[AdmissionController] = None,
+):
+    """Compile the orchestrator graph around a tool-bound chat model.
+    
+    Args:
+        model: Chat model with TOOLS already bound
+        async_nodes: Await the model and sub-agents on the event loop
+            instead of running sync nodes on LangGraph's thread pool
+        admission: Bound and prioritize concurrent model calls; the
+            request's priority comes from current_priority. Async nodes
+            only: sync nodes run on LangGraph's thread pool, which already
+            bounds them, and the asyncio-based slots can't be held there
+    
+    Returns:
+        Compiled LangGraph graph ready for invocation/streaming.
+    """
 
     def call_model(state: AgentState):
         """LLM agent node: call the model with current messages."""
         response = model.invoke(state["messages"])
         return {"messages": [response]}
 
+    async def acall_model(state: AgentState):
+        """LLM agent node: await the model with current messages."""
+        if admission is None:
+            response = await model.ainvoke(state["messages"])
+        else:
+            async with admission.slot():
+                response = await model.ainvoke(state["messages"])
+        return {"messages": [response]}
+
     # Build the graph
     graph = StateGraph(AgentState)
     
     # Add nodes
-    graph.add_node("llm_agent", call_model)
+    if async_nodes:
+        graph.add_node("llm_agent", acall_model)
+        graph.add_node("demo_agent", arun_demo_subgraph)
+        graph.add_node("callback_agent", arun_callback_subgraph)
+    else:
+        graph.add_node("llm_agent", call_model)
+        graph.add_node("demo_agent", run_demo_subgraph)
+        graph.add_node("callback_agent", run_callback_subgraph)
     graph.add_node("tools", ToolNode(TOOLS))
-    graph.add_node("demo_agent", run_demo_subgraph)
-    graph.add_node("callback_agent", run_callback_subgraph)
     
     # Add routing from start
     graph.add_conditional_edges(
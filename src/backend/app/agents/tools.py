@@ -1,9 +1,19 @@
 """LangGraph tools for the orchestrator agent."""
 
+import httpx
 import requests
 from langchain_core.tools import tool
 
 
+def _weather_url(latitude: float, longitude: float) -> str:
+    return (
+        f"https://api.open-meteo.com/v1/forecast?"
+        f"latitude={latitude}&longitude={longitude}&"
+        f"current=temperature_2m&hourly=temperature_2m&"
+        f"daily=sunrise,sunset&timezone=auto"
+    )
+
+
 @tool
 def get_current_weather(latitude: float, longitude: float) -> dict:
     """Get the current weather at a location.
@@ -15,20 +25,29 @@ def get_current_weather(latitude: float, longitude: float) -> dict:
     Returns:
         Weather data including temperature, sunrise, sunset, and hourly forecast
     """
-    url = (
-        f"https://api.open-meteo.com/v1/forecast?"
-        f"latitude={latitude}&longitude={longitude}&"
-        f"current=temperature_2m&hourly=temperature_2m&"
-        f"daily=sunrise,sunset&timezone=auto"
-    )
-
     try:
-        response = requests.get(url)
+        response = requests.get(_weather_url(latitude, longitude))
         response.raise_for_status()
         return response.json()
     except requests.RequestException as e:
         return {"error": f"Error fetching weather data: {e}"}
 
 
+async def _aget_current_weather(latitude: float, longitude: float) -> dict:
+    """Async variant of get_current_weather, used by async graph nodes."""
+    try:
+        async with httpx.AsyncClient() as client:
+            response = await client.get(_weather_url(latitude, longitude))
+            response.raise_for_status()
+            return response.json()
+    except httpx.HTTPError as e:
+        return {"error": f"Error fetching weather data: {e}"}
+
+
+# Async ToolNode runs await the coroutine, so a client disconnect cancels
+# the HTTP request instead of leaving it running on a worker thread
+get_current_weather.coroutine = _aget_current_weather
+
+
 # List of all available tools for the orchestrator
 TOOLS = [get_current_weather]
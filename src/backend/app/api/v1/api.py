@@ -1,7 +1,8 @@
 from fastapi import APIRouter
-from app.api.v1.endpoints import sse, chat, callback
+from app.api.v1.endpoints import sse, chat, callback, metrics
 
 api_router = APIRouter()
 api_router.include_router(chat.router, tags=["chat"])
 api_router.include_router(sse.router, tags=["sse"])
-api_router.include_router(callback.router, tags=["callback"])
\ No newline at end of file
+api_router.include_router(callback.router, tags=["callback"])
+api_router.include_router(metrics.router, tags=["metrics"])
\ No newline at end of file
@@ -0,0 +1,25 @@
+"""Shared dependencies for API routes."""
+
+import secrets
+from typing import Optional
+
+from fastapi import Header, HTTPException
+
+from app.core.settings import settings
+
+
+async def require_operator(authorization: Optional[str] = Header(None)):
+    """Gate operator endpoints on `Authorization: Bearer <OPERATOR_TOKEN>`.
+
+    They expose per-connection client details, so without a configured
+    token they are not served at all.
+    """
+    if not settings.OPERATOR_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    scheme, _, token = (authorization or "").partition(" ")
+    if scheme.lower() != "bearer" or not secrets.compare_digest(token.encode(), settings.OPERATOR_TOKEN.encode()):
+        raise HTTPException(
+            status_code=401,
+            detail="Invalid operator token",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
@@ -1,18 +1,31 @@
 """Callback endpoint for frontend component confirmations.
 
-Routes callback requests through the orchestrator agent for proper
-architecture alignment. The callback_agent handles the logic,
-and this endpoint handles async SSE scheduling.
+Callbacks are a deterministic orchestrator route, so they are dispatched
+straight to the callback_agent (app.agents.dispatch) rather than through
+the compiled graph. The callback_agent handles the logic, and this
+endpoint handles async SSE scheduling.
+
+Callbacks are deduplicated on their callback_context: repeated clicks while
+the first one's event is still pending return that event's job instead of
+running the agent and scheduling another broadcast. The scheduled events
+can be listed, cancelled and rescheduled under /agent/callback/scheduled.
+
+/agent/callbacks/batch handles many confirmations (e.g. bulk "read later")
+in one request, and the resulting events are scheduled in a single insertion.
 """
 
+import asyncio
+import hashlib
+import json
 import logging
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional
 
-from fastapi import APIRouter
-from pydantic import BaseModel
+from fastapi import APIRouter, HTTPException, Query
+from pydantic import BaseModel, Field
 
-from app.agents import get_orchestrator_graph
-from app.services.scheduler import schedule_sse_event
+from app.agents.dispatch import dispatch_callback
+from app.services.scheduler import event_scheduler, schedule_sse_event
+from app.services.sse import GLOBAL_CHANNEL, conversation_channel, user_channel
 
 logger = logging.getLogger(__name__)
 
@@ -24,7 +37,9 @@ class CallbackRequest(BaseModel):
     action: str  # e.g., "confirm", "save", "read_later"
     component_type: str  # e.g., "resource-preview"
     data: Dict[str, Any]  # Component-specific data
-    delay_seconds: Optional[float] = 5.0  # Configurable delay for testing
+    delay_seconds: float = Field(5.0, ge=0)  # Configurable delay for testing
+    user_id: Optional[str] = None  # Scope the resulting SSE event to this user
+    conversation_id: Optional[str] = None  # ...or to this conversation
 
 
 class CallbackResponse(BaseModel):
@@ -32,47 +47,202 @@ class CallbackResponse(BaseModel):
     success: bool
     message: str
     scheduled_event: Optional[str] = None
+    job_id: Optional[str] = None  # Handle for the scheduled-event endpoints
+    coalesced: bool = False  # True if this duplicated a pending callback
+
+
+class CallbackBatchRequest(BaseModel):
+    """Request body for the batch callback endpoint."""
+    callbacks: List[CallbackRequest] = Field(..., min_length=1, max_length=500)
+
+
+class CallbackBatchResponse(BaseModel):
+    """Per-callback results, in request order."""
+    results: List[CallbackResponse]
+
+
+class RescheduleRequest(BaseModel):
+    """Request body for moving a scheduled event."""
+    delay_seconds: float = Field(..., ge=0)
+
+
+def resolve_channel(request: CallbackRequest) -> str:
+    """Pick the narrowest SSE channel the callback can be delivered on."""
+    if request.conversation_id:
+        return conversation_channel(request.conversation_id)
+    if request.user_id:
+        return user_channel(request.user_id)
+    return GLOBAL_CHANNEL
+
+
+def build_callback_context(request: CallbackRequest) -> Dict[str, Any]:
+    return {
+        "action": request.action,
+        "component_type": request.component_type,
+        "data": request.data,
+        "delay_seconds": request.delay_seconds,
+    }
+
+
+def callback_dedupe_key(request: CallbackRequest, channel: str) -> str:
+    """Stable key for the callback_context, scoped to its delivery channel.
+
+    delay_seconds is left out so a repeated click with a different delay
+    still coalesces into the pending event.
+    """
+    context = {
+        "action": request.action,
+        "component_type": request.component_type,
+        "data": request.data,
+        "channel": channel,
+    }
+    canonical = json.dumps(context, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
 
 
 @router.post("/agent/callback", response_model=CallbackResponse)
 async def handle_callback(request: CallbackRequest):
     """Handle callbacks from frontend components.
     
-    Routes through the orchestrator agent which delegates to callback_agent.
+    Dispatches to callback_agent without entering the orchestrator graph.
     The agent returns scheduling info, and we handle async SSE scheduling here.
     """
     logger.info(f"Received callback: action={request.action}, type={request.component_type}")
     logger.debug(f"Callback data: {request.data}")
     
-    # Get the orchestrator graph
-    graph = get_orchestrator_graph()
-    
-    # Invoke with callback_context (triggers callback_agent routing)
-    result = await graph.ainvoke({
-        "messages": [],  # No messages for callback
-        "callback_context": {
-            "action": request.action,
-            "component_type": request.component_type,
-            "data": request.data,
-            "delay_seconds": request.delay_seconds,
-        }
-    })
+    channel = resolve_channel(request)
+    dedupe_key = callback_dedupe_key(request, channel)
+    pending = event_scheduler.coalesce(dedupe_key)
+    if pending is not None:
+        # Duplicate click: skip the agent and the extra broadcast
+        logger.info(f"Coalesced duplicate callback into pending job {pending.job_id}")
+        return CallbackResponse(
+            success=True,
+            message="Already scheduled",
+            scheduled_event=pending.event_type,
+            job_id=pending.job_id,
+            coalesced=True,
+        )
     
-    # Extract callback response from agent result
-    callback_response = result.get("callback_response", {})
+    callback_response = dispatch_callback(build_callback_context(request))
     
     # Handle SSE scheduling if agent returned scheduling info
     sse_event = callback_response.get("sse_event")
+    scheduled = None
     if sse_event:
-        schedule_sse_event(
+        # The scheduler also coalesces on the same key if a duplicate got in first
+        scheduled = schedule_sse_event(
             event_type=sse_event["event_type"],
             event_data=sse_event["event_data"],
             delay_seconds=sse_event["delay_seconds"],
+            channel=channel,
+            dedupe_key=dedupe_key,
         )
-        logger.info(f"Scheduled SSE event: {sse_event['event_type']} in {sse_event['delay_seconds']}s")
     
     return CallbackResponse(
         success=callback_response.get("success", False),
         message=callback_response.get("message", "Unknown error"),
         scheduled_event=callback_response.get("scheduled_event"),
+        job_id=scheduled.job_id if scheduled else None,
+        coalesced=bool(scheduled and scheduled.coalesced),
     )
+
+
+@router.post("/agent/callbacks/batch", response_model=CallbackBatchResponse)
+async def handle_callback_batch(request: CallbackBatchRequest):
+    """Handle many component callbacks in one pass.
+    
+    Each request is dispatched directly to the callback agent, duplicates
+    (within the batch or of pending events) are coalesced, and all resulting
+    SSE events are scheduled together so equal delays fire as one broadcast
+    per channel.
+    """
+    logger.info(f"Received callback batch of {len(request.callbacks)}")
+    
+    responses: List[CallbackResponse] = []
+    # Dedupe key of the job scheduled below that each response refers to
+    response_keys: List[Optional[str]] = []
+    to_schedule: List[Dict[str, Any]] = []
+    batch_keys = set()
+    for callback in request.callbacks:
+        channel = resolve_channel(callback)
+        dedupe_key = callback_dedupe_key(callback, channel)
+        if dedupe_key in batch_keys:
+            # Repeated within this batch: filled in once it is scheduled
+            responses.append(CallbackResponse(success=True, message="Already scheduled", coalesced=True))
+            response_keys.append(dedupe_key)
+            continue
+        pending = event_scheduler.coalesce(dedupe_key)
+        if pending is not None:
+            responses.append(CallbackResponse(
+                success=True,
+                message="Already scheduled",
+                scheduled_event=pending.event_type,
+                job_id=pending.job_id,
+                coalesced=True,
+            ))
+            response_keys.append(None)
+            continue
+        
+        callback_response = dispatch_callback(build_callback_context(callback))
+        responses.append(CallbackResponse(
+            success=callback_response.get("success", False),
+            message=callback_response.get("message", "Unknown error"),
+            scheduled_event=callback_response.get("scheduled_event"),
+        ))
+        sse_event = callback_response.get("sse_event")
+        if sse_event:
+            batch_keys.add(dedupe_key)
+            to_schedule.append({**sse_event, "channel": channel, "dedupe_key": dedupe_key})
+            response_keys.append(dedupe_key)
+        else:
+            response_keys.append(None)
+    
+    scheduled = {event.dedupe_key: event for event in event_scheduler.schedule_many(to_schedule)}
+    for response, dedupe_key in zip(responses, response_keys):
+        if dedupe_key is None:
+            continue
+        event = event_scheduler.coalesce(dedupe_key) if response.coalesced else scheduled[dedupe_key]
+        response.job_id = event.job_id
+        response.scheduled_event = event.event_type
+    
+    logger.info(f"Scheduled {len(to_schedule)} SSE events for callback batch of {len(responses)}")
+    return CallbackBatchResponse(results=responses)
+
+
+@router.get("/agent/callback/scheduled")
+async def list_scheduled_events(
+    channel: Optional[str] = Query(None),
+    limit: int = Query(100, ge=1, le=1000),
+    offset: int = Query(0, ge=0),
+):
+    """Pending scheduled events, soonest first, plus scheduler stats."""
+    now = asyncio.get_running_loop().time()
+    events = event_scheduler.pending(channel)[offset:offset + limit]
+    return {
+        "stats": event_scheduler.stats(),
+        "events": [event.to_dict(now) for event in events],
+    }
+
+
+@router.get("/agent/callback/scheduled/{job_id}")
+async def get_scheduled_event(job_id: str):
+    event = event_scheduler.get(job_id)
+    if event is None:
+        raise HTTPException(status_code=404, detail="Scheduled event not found")
+    return event.to_dict(asyncio.get_running_loop().time())
+
+
+@router.delete("/agent/callback/scheduled/{job_id}")
+async def cancel_scheduled_event(job_id: str):
+    if not event_scheduler.cancel(job_id):
+        raise HTTPException(status_code=404, detail="Scheduled event not found")
+    return {"success": True, "job_id": job_id}
+
+
+@router.post("/agent/callback/scheduled/{job_id}/reschedule")
+async def reschedule_scheduled_event(job_id: str, request: RescheduleRequest):
+    event = event_scheduler.get(job_id)
+    if event is None or not event.reschedule(request.delay_seconds):
+        raise HTTPException(status_code=404, detail="Scheduled event not found")
+    return event.to_dict(asyncio.get_running_loop().time())
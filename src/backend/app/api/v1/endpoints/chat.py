@@ -1,15 +1,32 @@
 """Chat API endpoint using LangGraph orchestrator."""
 
 import logging
-from typing import List
+from typing import List, Optional
 
-from fastapi import APIRouter, Query
-from fastapi.responses import StreamingResponse
+from fastapi import APIRouter, Header, HTTPException, Query
+from fastapi.responses import JSONResponse
 from pydantic import BaseModel
 
 from app.agents import get_orchestrator_graph
+from app.agents.dispatch import dispatch_chat, has_fast_path
+from app.agents.orchestrator import get_response_cache_scope
+from app.services.admission import AdmissionRejected, Priority, admit_any
+from app.services.llms import admission_controllers
+from app.core.settings import settings
+from app.services.response_cache import ResponseCache, response_cache
+from app.services.singleflight import chat_flights
 from app.utils.prompt import ClientMessage, convert_to_openai_messages
-from app.utils.stream import stream_text, patch_response_with_headers
+from app.utils.stream import (
+    MESSAGE_ID_SLOT,
+    DeltaWindow,
+    EventStreamResponse,
+    parse_delta_window,
+    patch_response_with_headers,
+    restamp_message_id,
+    stream_cached_response,
+    stream_demo_response,
+    stream_text,
+)
 
 # Configure logging
 logging.basicConfig(level=logging.DEBUG)
@@ -22,12 +39,38 @@ class Request(BaseModel):
     messages: List[ClientMessage]
 
 
+def _flight_key(cache_key: str, protocol: str, engine: str, window: Optional[DeltaWindow],
+                priority: Priority) -> str:
+    """Coalesce only requests that would get the same stream, at the same priority."""
+    window_key = f"{window.seconds}/{window.max_bytes}" if window is not None else "-"
+    return f"{cache_key}:{protocol}:{engine}:{window_key}:{priority.name}"
+
+
 @router.post("/agent/chat")
-async def handle_chat_data(request: Request, protocol: str = Query('data')):
+async def handle_chat_data(
+    request: Request,
+    protocol: str = Query('data'),
+    engine: str = Query(settings.CHAT_STREAM_ENGINE, pattern="^(events|lean)$"),
+    priority: str = Header("interactive", alias="X-Priority"),
+    cache_control: str = Header("", alias="Cache-Control"),
+    delta_window: str = Header(settings.CHAT_DELTA_WINDOW, alias="X-Delta-Window"),
+):
     """Handle chat requests using LangGraph orchestrator.
     
     Receives messages from frontend, converts to OpenAI format,
     streams through LangGraph orchestrator, and returns SSE response.
+    Requests that would queue for the LLM past their SLO are shed with
+    429/503 and Retry-After before streaming starts.
+    
+    Identical conversations are answered from the response cache without
+    calling the LLM; send `Cache-Control: no-cache` to force a fresh answer
+    (which then replaces the cached one). Identical requests that arrive
+    while one is still generating share its stream (CHAT_SINGLEFLIGHT), as
+    long as they also ask for the same protocol, engine, delta window and
+    priority.
+    `engine` picks how graph output is read (see app.utils.stream).
+    `X-Delta-Window: <ms>[,<bytes>]` merges adjacent text deltas into one
+    frame per window ("0" sends every delta as it arrives).
     """
     logger.debug("=" * 50)
     logger.debug("Received chat request")
@@ -36,11 +79,78 @@ async def handle_chat_data(request: Request, protocol: str = Query('data')):
     messages = request.messages
     openai_messages = convert_to_openai_messages(messages)
     
+    try:
+        window = parse_delta_window(delta_window)
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"Invalid X-Delta-Window: {delta_window}")
+
+    request_priority = Priority.BACKGROUND if priority.lower() == "background" else Priority.INTERACTIVE
+    cache_key = flight_key = None
+    # Fast-path routes never reach the LLM (or build the graph), so only
+    # cache, coalesce and gate the rest
+    if has_fast_path(openai_messages):
+        demo_response = dispatch_chat(openai_messages)
+        if demo_response is not None:
+            response = EventStreamResponse(stream_demo_response(demo_response))
+            return patch_response_with_headers(response, protocol)
+    else:
+        cache_key = ResponseCache.key(openai_messages, get_response_cache_scope())
+        if response_cache is not None and "no-cache" not in cache_control.lower():
+            cached = await response_cache.get(cache_key)
+            if cached is not None:
+                logger.debug("Serving chat response from cache")
+                response = EventStreamResponse(stream_cached_response(cached))
+                return patch_response_with_headers(response, protocol)
+        # Followers of an identical in-flight request cost no LLM call
+        flight_key = _flight_key(cache_key, protocol, engine, window, request_priority)
+        flight = chat_flights.follow(flight_key) if settings.CHAT_SINGLEFLIGHT else None
+        if flight is not None:
+            logger.debug("Joining identical in-flight chat request")
+            response = EventStreamResponse(restamp_message_id(flight.subscribe()))
+            return patch_response_with_headers(response, protocol)
+        try:
+            admit_any(admission_controllers(), request_priority)
+        except AdmissionRejected as e:
+            logger.warning(f"Shedding chat request: {e.reason}")
+            return JSONResponse(
+                status_code=e.status_code,
+                content={"detail": e.reason},
+                headers={"Retry-After": e.retry_after_header},
+            )
+    
     # Get the orchestrator graph (lazy initialization)
     graph = get_orchestrator_graph()
 
-    response = StreamingResponse(
-        stream_text(graph, openai_messages, protocol),
-        media_type="text/event-stream"
-    )
+    if flight_key is not None and settings.CHAT_SINGLEFLIGHT:
+        # Lead a flight that outlives this request, so followers that
+        # joined are not cut off if the leader disconnects
+        flight = chat_flights.join(flight_key, lambda: stream_text(
+            graph,
+            openai_messages,
+            protocol,
+            fast_path=False,
+            priority=request_priority,
+            cache=response_cache,
+            cache_key=cache_key,
+            message_id=MESSAGE_ID_SLOT,
+            engine=engine,
+            delta_window=window,
+        ))
+        body = restamp_message_id(flight.subscribe())
+    else:
+        body = stream_text(
+            graph,
+            openai_messages,
+            protocol,
+            fast_path=False,
+            priority=request_priority,
+            cache=response_cache,
+            cache_key=cache_key,
+            engine=engine,
+            delta_window=window,
+        )
+
+    # Cancels the body as soon as the client disconnects, which cancels the
+    # graph run (or leaves the flight, cancelled with its last subscriber)
+    response = EventStreamResponse(body)
     return patch_response_with_headers(response, protocol)
@@ -0,0 +1,25 @@
+"""Operator metrics endpoints."""
+
+from fastapi import APIRouter, Depends
+
+from app.api.v1.deps import require_operator
+from app.services import llms
+from app.services.admission import admission_stats
+from app.services.response_cache import response_cache
+from app.services.singleflight import chat_flights
+from app.utils.stream import generation_stats
+
+router = APIRouter()
+
+
+@router.get("/metrics/llm", dependencies=[Depends(require_operator)])
+async def get_llm_metrics():
+    """LLM HTTP pool, routing, admission, caching, coalescing and cancellation state."""
+    return {
+        "admission": admission_stats(),
+        "response_cache": response_cache.stats() if response_cache is not None else None,
+        "singleflight": chat_flights.stats(),
+        "generations": generation_stats.stats(),
+        "http_pool": llms.llm_http_pool.stats(),
+        "endpoints": llms.llm_router.stats() if llms.llm_router is not None else None,
+    }
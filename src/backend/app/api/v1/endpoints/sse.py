@@ -1,51 +1,121 @@
-import asyncio
+from typing import List, Optional
 
-from fastapi import APIRouter, Request
-from fastapi.responses import StreamingResponse
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request
 
+from app.api.v1.deps import require_operator
 from app.services.policies import PolicyService
-from app.services.sse import sse_manager
+from app.services.sse import (
+    conversation_channel,
+    encode_sse_frame,
+    is_valid_channel,
+    parse_last_event_id,
+    sse_manager,
+    user_channel,
+)
+from app.utils.stream import EventStreamResponse
 
 router = APIRouter()
 
+# Pre-encoded once at import; identical for every new connection
+INVITE_FRAME = encode_sse_frame(
+    "conversation_invite",
+    '{"type": "conversation_invite", "context_id": "daily_log", "message": "Good morning! Ready for your daily log?", "confidence": 0.9}',
+)
+
+
+def parse_subscription(
+    user_id: Optional[str],
+    conversation_id: Optional[str],
+    channels: Optional[str],
+) -> List[str]:
+    """Build the channel list for a subscription spec.
+
+    `channels` is a comma-separated list of explicit channel names
+    (e.g. "user:42,conversation:abc"); user_id/conversation_id are shortcuts.
+    The global channel is always included by the manager.
+    """
+    requested = [c.strip() for c in (channels or "").split(",") if c.strip()]
+    if user_id:
+        requested.append(user_channel(user_id))
+    if conversation_id:
+        requested.append(conversation_channel(conversation_id))
+
+    invalid = [c for c in requested if not is_valid_channel(c)]
+    if invalid:
+        raise HTTPException(status_code=400, detail=f"Invalid channels: {', '.join(invalid)}")
+    return requested
+
 
 @router.get("/agent/events")
-async def sse_endpoint(request: Request):
+async def sse_endpoint(
+    request: Request,
+    client_id: Optional[str] = Query(None),
+    user_id: Optional[str] = Query(None),
+    conversation_id: Optional[str] = Query(None),
+    channels: Optional[str] = Query(None),
+    last_event_id: Optional[str] = Query(None),
+    last_event_id_header: Optional[str] = Header(None, alias="Last-Event-ID"),
+):
+    subscription = parse_subscription(user_id, conversation_id, channels)
+    # EventSource sends the header on its own reconnects; clients that
+    # recreate the EventSource pass it as a query parameter instead
+    resume_from = parse_last_event_id(last_event_id_header or last_event_id)
+
     async def event_generator():
         # Check if already shutting down
         if sse_manager.is_shutting_down():
             return
 
         # 1. Initial Check on Connection
-        policy = PolicyService()
-        confidence = policy.evaluate_proactive_trigger("daily_tick", {"time": "now"})
+        # Resuming clients already got the invite on their first connection
+        if resume_from is None:
+            policy = PolicyService()
+            confidence = policy.evaluate_proactive_trigger("daily_tick", {"time": "now"})
 
-        if policy.should_emit_prompt_card(confidence):
-            # Immediate prompt for new connection
-            invite_payload = '{"type": "conversation_invite", "context_id": "daily_log", "message": "Good morning! Ready for your daily log?", "confidence": 0.9}'
-            yield f"event: conversation_invite\ndata: {invite_payload}\n\n"
+            if policy.should_emit_prompt_card(confidence):
+                # Immediate prompt for new connection
+                yield INVITE_FRAME
 
         # 2. Subscribe to Broadcasts
-        queue = await sse_manager.connect()
+        # Parks on the connection until a frame arrives or it is closed
+        # (shutdown / eviction). Client disconnects cancel the generator via
+        # EventStreamResponse, so idle subscribers never wake up.
+        connection = await sse_manager.connect(
+            subscription,
+            resume_from,
+            client_id or (f"{request.client.host}:{request.client.port}" if request.client else None),
+        )
         try:
             while True:
-                if await request.is_disconnected():
-                    break
-                if sse_manager.is_shutting_down():
+                data = await connection.get()
+                if data is None:  # Closed
                     break
-
-                # Use wait_for with timeout to check shutdown periodically
-                try:
-                    data = await asyncio.wait_for(queue.get(), timeout=1.0)
-                    if data is None:  # Shutdown signal
-                        break
-                    yield data
-                except asyncio.TimeoutError:
-                    continue  # Check shutdown status again
-
-        except asyncio.CancelledError:
-            pass
+                yield data
         finally:
-            sse_manager.disconnect(queue)
+            sse_manager.disconnect(connection)
+
+    return EventStreamResponse(event_generator())
+
+
+@router.get("/agent/events/connections", dependencies=[Depends(require_operator)])
+async def list_sse_connections(
+    channel: Optional[str] = Query(None),
+    limit: int = Query(100, ge=1, le=1000),
+    offset: int = Query(0, ge=0),
+):
+    """Operator introspection: aggregate SSE stats plus a page of connections.
+
+    Requires the operator token (see require_operator).
+    """
+    return {
+        "stats": sse_manager.stats(),
+        "connections": sse_manager.list_connections(channel, limit, offset),
+    }
+
 
-    return StreamingResponse(event_generator(), media_type="text/event-stream")
\ No newline at end of file
+@router.get("/agent/events/connections/{connection_id}", dependencies=[Depends(require_operator)])
+async def get_sse_connection(connection_id: str):
+    connection = sse_manager.get_connection(connection_id)
+    if connection is None:
+        raise HTTPException(status_code=404, detail="Connection not found")
+    return connection.stats()
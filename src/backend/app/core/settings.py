@@ -24,7 +24,84 @@ class Settings:
     LLM_BASE_URL: str = os.getenv("LLM_BASE_URL", "https://api.openai.com/v1")
     LLM_API_KEY: str = os.getenv("LLM_API_KEY", "")
     LLM_MODEL: str = os.getenv("LLM_MODEL", "gpt-4o-mini")
+    # Optional pool of OpenAI-compatible endpoints, comma separated, each
+    # "base_url" or "base_url|model" (defaults to LLM_MODEL). When set, calls
+    # are balanced across them with failover, ejection and hedging
+    LLM_ENDPOINTS: str = os.getenv("LLM_ENDPOINTS", "")
+    LLM_EJECT_AFTER_ERRORS: int = int(os.getenv("LLM_EJECT_AFTER_ERRORS", "3"))
+    LLM_EJECT_SECONDS: float = float(os.getenv("LLM_EJECT_SECONDS", "30"))
+    # Duplicate a request on a second endpoint once it exceeds the p95
+    # time-to-first-token (LLM_HEDGE_DEFAULT_SECONDS until there is data)
+    LLM_HEDGE: bool = os.getenv("LLM_HEDGE", "true").lower() == "true"
+    LLM_HEDGE_DEFAULT_SECONDS: float = float(os.getenv("LLM_HEDGE_DEFAULT_SECONDS", "2"))
+    # Shared connection pool for LLM calls (app.services.llms)
+    LLM_HTTP_MAX_CONNECTIONS: int = int(os.getenv("LLM_HTTP_MAX_CONNECTIONS", "100"))
+    LLM_HTTP_MAX_KEEPALIVE: int = int(os.getenv("LLM_HTTP_MAX_KEEPALIVE", "20"))
+    LLM_HTTP_KEEPALIVE_EXPIRY: float = float(os.getenv("LLM_HTTP_KEEPALIVE_EXPIRY", "30"))
+    # Needs the h2 package (pip install "httpx[http2]")
+    LLM_HTTP2: bool = os.getenv("LLM_HTTP2", "false").lower() == "true"
+    LLM_HTTP_CONNECT_TIMEOUT: float = float(os.getenv("LLM_HTTP_CONNECT_TIMEOUT", "5"))
+    LLM_HTTP_READ_TIMEOUT: float = float(os.getenv("LLM_HTTP_READ_TIMEOUT", "60"))
+    LLM_HTTP_WRITE_TIMEOUT: float = float(os.getenv("LLM_HTTP_WRITE_TIMEOUT", "10"))
+    # Max wait for a free connection when the pool is exhausted
+    LLM_HTTP_POOL_TIMEOUT: float = float(os.getenv("LLM_HTTP_POOL_TIMEOUT", "5"))
+    # Admission control per model: concurrent LLM calls, waiting callers,
+    # and the max queue wait before shedding with 429 + Retry-After
+    LLM_MAX_CONCURRENCY: int = int(os.getenv("LLM_MAX_CONCURRENCY", "32"))
+    LLM_MAX_QUEUE: int = int(os.getenv("LLM_MAX_QUEUE", "256"))
+    LLM_QUEUE_SLO_SECONDS: float = float(os.getenv("LLM_QUEUE_SLO_SECONDS", "5"))
+    LLM_BACKGROUND_QUEUE_SLO_SECONDS: float = float(os.getenv("LLM_BACKGROUND_QUEUE_SLO_SECONDS", "60"))
+    # Exact-match cache of LLM chat responses (app.services.response_cache);
+    # RESPONSE_CACHE_PERSIST adds a sqlite tier on DB_URI shared by workers
+    RESPONSE_CACHE_ENABLED: bool = os.getenv("RESPONSE_CACHE_ENABLED", "true").lower() == "true"
+    RESPONSE_CACHE_MAX_ENTRIES: int = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "1024"))
+    RESPONSE_CACHE_TTL_SECONDS: float = float(os.getenv("RESPONSE_CACHE_TTL_SECONDS", "300"))
+    RESPONSE_CACHE_PERSIST: bool = os.getenv("RESPONSE_CACHE_PERSIST", "false").lower() == "true"
+    # Identical concurrent chat requests share one LLM generation
+    CHAT_SINGLEFLIGHT: bool = os.getenv("CHAT_SINGLEFLIGHT", "true").lower() == "true"
+    # Default /agent/chat stream engine, overridable per request (?engine=):
+    # "events" (astream_events v2) or "lean" (messages/updates stream modes)
+    CHAT_STREAM_ENGINE: str = os.getenv("CHAT_STREAM_ENGINE", "events")
+    # Default text-delta coalescing window, "<ms>" or "<ms>,<bytes>" (e.g.
+    # "20,256"); empty or "0" streams every delta. Per request: X-Delta-Window
+    CHAT_DELTA_WINDOW: str = os.getenv("CHAT_DELTA_WINDOW", "")
+    # Run orchestrator nodes as coroutines (false: sync nodes on a thread pool)
+    AGENT_ASYNC_NODES: bool = os.getenv("AGENT_ASYNC_NODES", "true").lower() == "true"
     
+    # SSE
+    # Max frames buffered per subscriber before the overflow policy applies
+    SSE_QUEUE_MAXSIZE: int = int(os.getenv("SSE_QUEUE_MAXSIZE", "256"))
+    # drop_oldest | drop_newest | disconnect
+    SSE_OVERFLOW_POLICY: str = os.getenv("SSE_OVERFLOW_POLICY", "drop_oldest")
+    # Last-Event-ID replay: per-channel ring buffer bounds, plus a total
+    # memory cap across channels (least recently published evicted first)
+    SSE_REPLAY_MAX_EVENTS: int = int(os.getenv("SSE_REPLAY_MAX_EVENTS", "128"))
+    SSE_REPLAY_MAX_BYTES: int = int(os.getenv("SSE_REPLAY_MAX_BYTES", str(256 * 1024)))
+    SSE_REPLAY_MAX_TOTAL_BYTES: int = int(os.getenv("SSE_REPLAY_MAX_TOTAL_BYTES", str(64 * 1024 * 1024)))
+    # Cross-worker fan-out: "local" (single process) or "unix" (Unix-socket
+    # broker elected among the workers on this host)
+    SSE_BACKEND: str = os.getenv("SSE_BACKEND", "local")
+    SSE_BROKER_PATH: str = os.getenv("SSE_BROKER_PATH", "/tmp/agentic-sse.sock")
+    # Keep-alive comments for idle connections (0 disables); the wheel visits
+    # one slot per tick, so wakeups ~ 1/tick + idle connections / interval
+    SSE_HEARTBEAT_INTERVAL: float = float(os.getenv("SSE_HEARTBEAT_INTERVAL", "30"))
+    SSE_HEARTBEAT_TICK: float = float(os.getenv("SSE_HEARTBEAT_TICK", "1"))
+    
+    # Scheduler
+    # Persist scheduled SSE events in the DB_URI sqlite database so they
+    # survive restarts (at-least-once delivery). schedule() returns before
+    # the write is flushed, so a crash within SCHEDULER_FLUSH_INTERVAL of
+    # scheduling can still lose an event
+    SCHEDULER_PERSIST: bool = os.getenv("SCHEDULER_PERSIST", "true").lower() == "true"
+    # Buffered job writes are flushed in one transaction per interval
+    SCHEDULER_FLUSH_INTERVAL: float = float(os.getenv("SCHEDULER_FLUSH_INTERVAL", "0.05"))
+    # Jobs of a scheduler that misses its lease are adopted by another worker
+    SCHEDULER_LEASE_SECONDS: float = float(os.getenv("SCHEDULER_LEASE_SECONDS", "30"))
+    
+    # Operator endpoints (SSE connection introspection, /metrics/llm)
+    # require "Authorization: Bearer <OPERATOR_TOKEN>"; unset disables them
+    OPERATOR_TOKEN: str = os.getenv("OPERATOR_TOKEN", "")
+
     # JWT
     JWT_SECRET_KEY: str = os.getenv("JWT_SECRET_KEY", "your-secret-key")
     JWT_ALGORITHM: str = "HS256"
@@ -6,9 +6,14 @@ from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from vercel.headers import set_headers
 
+from app.agents.mock_responses import MOCK_RESPONSES
 from app.api.v1.api import api_router
 from app.core.settings import settings
+from app.services.llms import llm_http_pool
+from app.services.response_cache import response_cache
+from app.services.scheduler import event_scheduler
 from app.services.sse import sse_manager
+from app.utils.stream import demo_frame_cache
 
 logger = logging.getLogger(__name__)
 
@@ -30,12 +35,8 @@ async def lifespan(app: FastAPI):
         # SSE loops will detect this within their timeout period
         sse_manager._shutdown_event.set()
         
-        # Push None to all queues synchronously (safe for simple puts)
-        for queue in sse_manager.active_connections:
-            try:
-                queue.put_nowait(None)
-            except Exception:
-                pass
+        # Close all connections synchronously to wake their readers
+        sse_manager.close_all()
         
         # Forward to uvicorn's original handler for proper shutdown
         if signum == signal.SIGINT and callable(original_sigint):
@@ -47,12 +48,23 @@ async def lifespan(app: FastAPI):
     signal.signal(signal.SIGTERM, chained_signal_handler)
 
     logger.info("Application starting up...")
+    llm_http_pool.open(sync=not settings.AGENT_ASYNC_NODES)
+    await sse_manager.start()
+    await event_scheduler.start()
+    if response_cache is not None:
+        await response_cache.open()
+    demo_frame_cache.warm(MOCK_RESPONSES.values())
     yield
     
     # Shutdown - cleanup any remaining connections
     logger.info("Application shutting down...")
+    await event_scheduler.stop()
+    if response_cache is not None:
+        await response_cache.close()
     if not sse_manager.is_shutting_down():
         await sse_manager.shutdown()
+    await sse_manager.stop()
+    await llm_http_pool.aclose()
 
 
 app = FastAPI(
@@ -0,0 +1,230 @@
+"""Admission control for LLM calls.
+
+Each model gets an AdmissionController that bounds how many calls run at
+once. Callers over the limit wait in a priority queue (interactive chat
+ahead of background work) and are shed with AdmissionRejected once their
+queue-time SLO can't be met, instead of piling onto upstream rate limits.
+
+/agent/chat checks admit_any() before it starts streaming, so an overloaded
+worker answers with a fast 429/503 and Retry-After. The llm_agent node then
+holds a slot() for the duration of each model call; with LLM_ENDPOINTS the
+router instead takes a slot on the controller of the endpoint it calls.
+
+Controllers are asyncio-based, so sync nodes (AGENT_ASYNC_NODES=false),
+which LangGraph runs on worker threads, only get the up-front check: their
+concurrency is already bounded by that thread pool.
+"""
+
+import asyncio
+import contextvars
+import heapq
+import logging
+import math
+import time
+from collections import deque
+from enum import IntEnum
+from typing import Any, Deque, Dict, List, Optional, Sequence, Tuple
+
+from app.core.settings import settings
+
+logger = logging.getLogger(__name__)
+
+
+class Priority(IntEnum):
+    """Lower values are admitted first."""
+    INTERACTIVE = 0
+    BACKGROUND = 1
+
+
+# Priority of the request being served; set by stream_text for graph nodes
+current_priority: contextvars.ContextVar[Priority] = contextvars.ContextVar(
+    "current_priority", default=Priority.INTERACTIVE
+)
+
+
+class AdmissionRejected(Exception):
+    """Raised when a call is shed; maps to 429 (SLO) or 503 (queue full)."""
+
+    def __init__(self, reason: str, retry_after: float, status_code: int = 429):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = retry_after
+        self.status_code = status_code
+
+    @property
+    def retry_after_header(self) -> str:
+        return str(max(1, math.ceil(self.retry_after)))
+
+
+class AdmissionController:
+    """Bounded concurrency plus a priority wait queue for one model."""
+
+    def __init__(
+        self,
+        name: str,
+        max_concurrency: int = 32,
+        max_queue: int = 256,
+        slo_seconds: Optional[Dict[Priority, float]] = None,
+        ewma_alpha: float = 0.2,
+    ):
+        self.name = name
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.slo_seconds = slo_seconds or {Priority.INTERACTIVE: 5.0, Priority.BACKGROUND: 60.0}
+        self.ewma_alpha = ewma_alpha
+        self.in_flight = 0
+        # (priority, sequence, future); cancelled waiters are skipped lazily
+        self._queue: List[Tuple[int, int, asyncio.Future]] = []
+        self._sequence = 0
+        self.service_seconds = 0.0  # EWMA of time holding a slot
+        self.admitted = 0
+        self.shed = 0
+        self.wait_samples: Deque[float] = deque(maxlen=1024)
+
+    def queue_depth(self, priority: Priority = Priority.BACKGROUND) -> int:
+        """Live waiters that would be admitted before a caller at `priority`."""
+        return sum(1 for p, _, future in self._queue if p <= priority and not future.done())
+
+    def estimated_wait(self, priority: Priority) -> float:
+        if self.in_flight < self.max_concurrency and not self._queue:
+            return 0.0
+        ahead = self.queue_depth(priority) + 1
+        return ahead / self.max_concurrency * self.service_seconds
+
+    def rejection(self, priority: Priority) -> Optional[AdmissionRejected]:
+        """Why a call at `priority` would be shed right now, if it would."""
+        if self.queue_depth() >= self.max_queue:
+            return AdmissionRejected(
+                f"{self.name} queue is full", self.estimated_wait(priority), status_code=503
+            )
+        wait = self.estimated_wait(priority)
+        if wait > self.slo_seconds[priority]:
+            return AdmissionRejected(f"{self.name} queue wait of {wait:.1f}s exceeds SLO", wait)
+        return None
+
+    def admit(self, priority: Priority):
+        """Shed up front if the queue is full or the wait would break the SLO."""
+        rejected = self.rejection(priority)
+        if rejected is not None:
+            self.shed += 1
+            raise rejected
+
+    def try_acquire(self) -> bool:
+        """Take a free slot without queueing; False if the model is saturated."""
+        if self.in_flight >= self.max_concurrency:
+            return False
+        self.in_flight += 1
+        self.admitted += 1
+        self.wait_samples.append(0.0)
+        return True
+
+    async def acquire(self, priority: Priority):
+        self.admit(priority)
+        started = time.perf_counter()
+        if self.in_flight >= self.max_concurrency:
+            future = asyncio.get_running_loop().create_future()
+            self._sequence += 1
+            heapq.heappush(self._queue, (priority, self._sequence, future))
+            try:
+                await asyncio.wait_for(future, self.slo_seconds[priority])
+            except asyncio.TimeoutError:
+                self.shed += 1
+                raise AdmissionRejected(
+                    f"{self.name} queue wait exceeded {self.slo_seconds[priority]}s SLO",
+                    self.estimated_wait(priority),
+                )
+            except asyncio.CancelledError:
+                # Slot handed over just as we were cancelled: pass it on
+                if future.done() and not future.cancelled():
+                    self._release_slot()
+                raise
+        else:
+            self.in_flight += 1
+        self.admitted += 1
+        self.wait_samples.append(time.perf_counter() - started)
+
+    def release(self, held_seconds: float):
+        if self.service_seconds == 0.0:
+            self.service_seconds = held_seconds
+        else:
+            self.service_seconds += self.ewma_alpha * (held_seconds - self.service_seconds)
+        self._release_slot()
+
+    def _release_slot(self):
+        # Hand the slot directly to the best live waiter, if any
+        while self._queue:
+            _, _, future = heapq.heappop(self._queue)
+            if not future.done():
+                future.set_result(None)
+                return
+        self.in_flight -= 1
+
+    def slot(self, priority: Optional[Priority] = None) -> "_Slot":
+        """`async with controller.slot():` around a model call."""
+        return _Slot(self, current_priority.get() if priority is None else priority)
+
+    def stats(self) -> Dict[str, Any]:
+        waits = sorted(self.wait_samples)
+        return {
+            "in_flight": self.in_flight,
+            "max_concurrency": self.max_concurrency,
+            "queue_depth": {p.name.lower(): sum(
+                1 for q, _, future in self._queue if q == p and not future.done()
+            ) for p in Priority},
+            "admitted": self.admitted,
+            "shed": self.shed,
+            "avg_service_ms": round(self.service_seconds * 1000, 2),
+            "wait_p50_ms": round(waits[len(waits) // 2] * 1000, 2) if waits else None,
+            "wait_p95_ms": round(waits[min(len(waits) - 1, math.ceil(len(waits) * 0.95) - 1)] * 1000, 2)
+            if waits else None,
+        }
+
+
+class _Slot:
+    def __init__(self, controller: AdmissionController, priority: Priority):
+        self.controller = controller
+        self.priority = priority
+
+    async def __aenter__(self):
+        await self.controller.acquire(self.priority)
+        self.started = time.perf_counter()
+
+    async def __aexit__(self, *exc_info):
+        self.controller.release(time.perf_counter() - self.started)
+
+
+_controllers: Dict[str, AdmissionController] = {}
+
+
+def get_admission_controller(model: Optional[str] = None) -> AdmissionController:
+    """Controller for `model` (default LLM_MODEL), created from settings."""
+    model = model or settings.LLM_MODEL
+    controller = _controllers.get(model)
+    if controller is None:
+        controller = _controllers[model] = AdmissionController(
+            model,
+            max_concurrency=settings.LLM_MAX_CONCURRENCY,
+            max_queue=settings.LLM_MAX_QUEUE,
+            slo_seconds={
+                Priority.INTERACTIVE: settings.LLM_QUEUE_SLO_SECONDS,
+                Priority.BACKGROUND: settings.LLM_BACKGROUND_QUEUE_SLO_SECONDS,
+            },
+        )
+    return controller
+
+
+def admit_any(controllers: Sequence[AdmissionController], priority: Priority):
+    """Shed up front only if every model the call may be routed to would."""
+    rejections = []
+    for controller in controllers:
+        rejected = controller.rejection(priority)
+        if rejected is None:
+            return
+        rejections.append((controller, rejected))
+    controller, rejected = min(rejections, key=lambda item: item[1].retry_after)
+    controller.shed += 1
+    raise rejected
+
+
+def admission_stats() -> Dict[str, Any]:
+    return {name: controller.stats() for name, controller in _controllers.items()}
@@ -0,0 +1,216 @@
+"""SQLite-backed persistence for scheduled SSE events.
+
+Pending events are written to the `scheduled_events` table on the configured
+DB_URI so they survive restarts and deploys. Writes are buffered and flushed
+in one transaction per batch; the due-time column is indexed so recovery can
+stream jobs out in deadline order. Until its batch is flushed a job exists
+only in memory, so a crash inside the flush interval loses it.
+
+Delivery is at-least-once: a job row is only deleted after its broadcast, so
+a crash in between fires it again on recovery. The job id doubles as the
+idempotency key consumers can dedupe on.
+
+With several workers sharing the database, every row records its owning
+scheduler and each scheduler renews a lease. Rows whose owner's lease has
+expired (a dead or restarted worker) are claimed by a live scheduler, so a
+job is recovered by exactly one worker. Writes never take a row back from
+another scheduler that holds a live lease on it.
+"""
+
+import logging
+import time
+import uuid
+from typing import Any, Dict, List, Optional, Tuple
+
+import aiosqlite
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS scheduled_events (
+    job_id TEXT PRIMARY KEY,
+    event_type TEXT NOT NULL,
+    channel TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    due_at REAL NOT NULL,
+    owner TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    dedupe_key TEXT
+);
+CREATE INDEX IF NOT EXISTS ix_scheduled_events_due_at ON scheduled_events (due_at);
+CREATE INDEX IF NOT EXISTS ix_scheduled_events_owner ON scheduled_events (owner, due_at);
+CREATE TABLE IF NOT EXISTS scheduler_leases (
+    owner TEXT PRIMARY KEY,
+    expires_at REAL NOT NULL
+);
+"""
+
+# Columns added after the first release, for existing databases
+MIGRATIONS = {
+    "dedupe_key": "ALTER TABLE scheduled_events ADD COLUMN dedupe_key TEXT",
+}
+
+# (job_id, event_type, channel, payload, due_at, dedupe_key)
+JobRow = Tuple[str, str, str, str, float, Optional[str]]
+
+
+def sqlite_path_from_uri(db_uri: str) -> Optional[str]:
+    """Extract the file path from a sqlite DB_URI, or None for other databases.
+
+    e.g. "sqlite+aiosqlite:///./local.db" -> "./local.db"
+    """
+    scheme, sep, rest = db_uri.partition("://")
+    if not sep or not scheme.split("+")[0] == "sqlite":
+        return None
+    # sqlite:///relative.db and sqlite:////absolute.db
+    return rest[1:] if rest.startswith("/") else rest
+
+
+class SQLiteJobStore:
+    """Batched, lease-aware job table for EventScheduler."""
+
+    def __init__(self, path: str, lease_seconds: float = 30.0, page_size: int = 1000):
+        self.path = path
+        self.lease_seconds = lease_seconds
+        self.page_size = page_size
+        self.owner = uuid.uuid4().hex
+        self._db: Optional[aiosqlite.Connection] = None
+        # job_id -> row to upsert, or None to delete; last write wins
+        self._pending: Dict[str, Optional[JobRow]] = {}
+        self.flushes = 0
+        self.rows_written = 0
+
+    @property
+    def dirty(self) -> bool:
+        return bool(self._pending)
+
+    async def open(self):
+        self._db = await aiosqlite.connect(self.path)
+        await self._db.execute("PRAGMA journal_mode=WAL")
+        await self._db.execute("PRAGMA synchronous=NORMAL")
+        await self._db.executescript(SCHEMA)
+        cursor = await self._db.execute("PRAGMA table_info(scheduled_events)")
+        columns = {row[1] for row in await cursor.fetchall()}
+        for column, statement in MIGRATIONS.items():
+            if column not in columns:
+                await self._db.execute(statement)
+        await self._db.commit()
+        await self.renew_lease()
+
+    async def close(self):
+        if self._db is None:
+            return
+        await self.flush()
+        # Release our lease so another worker can adopt leftovers right away
+        await self._db.execute("DELETE FROM scheduler_leases WHERE owner = ?", (self.owner,))
+        await self._db.commit()
+        await self._db.close()
+        self._db = None
+
+    def upsert(
+        self,
+        job_id: str,
+        event_type: str,
+        channel: str,
+        payload: str,
+        due_at: float,
+        dedupe_key: Optional[str] = None,
+    ):
+        self._pending[job_id] = (job_id, event_type, channel, payload, due_at, dedupe_key)
+
+    def delete(self, job_id: str):
+        self._pending[job_id] = None
+
+    async def flush(self):
+        """Write buffered upserts and deletes in a single transaction."""
+        if not self._pending or self._db is None:
+            return
+        pending, self._pending = self._pending, {}
+        now = time.time()
+        upserts = [
+            (*row, self.owner, now, now) for row in pending.values() if row is not None
+        ]
+        deletes = [(job_id,) for job_id, row in pending.items() if row is None]
+        if upserts:
+            await self._db.executemany(
+                "INSERT INTO scheduled_events "
+                "(job_id, event_type, channel, payload, due_at, dedupe_key, owner, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT(job_id) DO UPDATE SET due_at = excluded.due_at, owner = excluded.owner "
+                # Only our own rows, or ones whose owner's lease has lapsed
+                "WHERE scheduled_events.owner = excluded.owner OR scheduled_events.owner NOT IN "
+                "(SELECT owner FROM scheduler_leases WHERE expires_at >= ?)",
+                upserts,
+            )
+        if deletes:
+            await self._db.executemany("DELETE FROM scheduled_events WHERE job_id = ?", deletes)
+        await self._db.commit()
+        self.flushes += 1
+        self.rows_written += len(pending)
+
+    async def renew_lease(self):
+        await self._db.execute(
+            "INSERT INTO scheduler_leases (owner, expires_at) VALUES (?, ?) "
+            "ON CONFLICT(owner) DO UPDATE SET expires_at = excluded.expires_at",
+            (self.owner, time.time() + self.lease_seconds),
+        )
+        await self._db.commit()
+
+    async def claim_orphans(self) -> Optional[str]:
+        """Move jobs whose owner's lease has expired under a new claim token.
+
+        The token gets its own lease, so if we die while loading the claim
+        the jobs become orphans again. Returns None if nothing was claimed.
+        """
+        now = time.time()
+        token = uuid.uuid4().hex
+        await self._db.execute("DELETE FROM scheduler_leases WHERE expires_at < ?", (now,))
+        await self._db.execute(
+            "INSERT INTO scheduler_leases (owner, expires_at) VALUES (?, ?)",
+            (token, now + self.lease_seconds),
+        )
+        cursor = await self._db.execute(
+            "UPDATE scheduled_events SET owner = ? "
+            "WHERE owner NOT IN (SELECT owner FROM scheduler_leases)",
+            (token,),
+        )
+        claimed = cursor.rowcount
+        if not claimed:
+            await self._db.execute("DELETE FROM scheduler_leases WHERE owner = ?", (token,))
+        await self._db.commit()
+        return token if claimed else None
+
+    async def iter_claimed(self, token: str):
+        """Stream a claim's jobs in due-time order, a page at a time."""
+        after_due_at, after_job_id = float("-inf"), ""
+        while True:
+            # Keyset pagination on the (owner, due_at) index
+            cursor = await self._db.execute(
+                "SELECT job_id, event_type, channel, payload, due_at, dedupe_key FROM scheduled_events "
+                "WHERE owner = ? AND (due_at > ? OR (due_at = ? AND job_id > ?)) "
+                "ORDER BY due_at, job_id LIMIT ?",
+                (token, after_due_at, after_due_at, after_job_id, self.page_size),
+            )
+            rows: List[JobRow] = await cursor.fetchall()
+            if not rows:
+                return
+            yield rows
+            after_job_id, after_due_at = rows[-1][0], rows[-1][4]
+
+    async def finish_claim(self, token: str):
+        """Hand a fully loaded claim over to this scheduler's own lease."""
+        await self._db.execute(
+            "UPDATE scheduled_events SET owner = ? WHERE owner = ?", (self.owner, token)
+        )
+        await self._db.execute("DELETE FROM scheduler_leases WHERE owner = ?", (token,))
+        await self._db.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "store": "sqlite",
+            "store_path": self.path,
+            "store_owner": self.owner,
+            "store_pending_writes": len(self._pending),
+            "store_flushes": self.flushes,
+            "store_rows_written": self.rows_written,
+        }
@@ -0,0 +1,374 @@
+"""Latency-aware routing across several OpenAI-compatible LLM endpoints.
+
+RoutedChatModel is a chat model that fronts one ChatOpenAI per endpoint
+(LLM_ENDPOINTS) and, per call:
+
+- picks the healthy endpoint with the lowest EWMA latency weighted by its
+  outstanding requests (least outstanding, then fastest);
+- fails over to another endpoint if a call hits a connection error,
+  timeout, 429 or 5xx before its first token; other errors (e.g. a 400 for
+  an over-long prompt) would fail the same way anywhere, so they are raised
+  at once and not counted against the endpoint;
+- ejects an endpoint for LLM_EJECT_SECONDS after LLM_EJECT_AFTER_ERRORS
+  consecutive errors;
+- hedges: if no first token has arrived within the p95 of recent
+  time-to-first-token, the same request is started on a second endpoint
+  and whichever answers first wins (the other is cancelled). A hedge that
+  fails is replaced by another endpoint while any is left;
+- admits each attempt on its endpoint model's AdmissionController: a call
+  waits for a slot on the chosen endpoint (or fails over if that model sheds
+  it), while hedges only go to endpoints with a slot free right now.
+
+The wrapped async models are called through their _astream hook with no
+run manager, so only the router reports callbacks and astream_events sees
+a single chat model run.
+"""
+
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Any, AsyncIterator, Deque, Dict, List, Optional, Sequence, Set
+
+import httpx
+import openai
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import BaseMessage, message_chunk_to_message
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langchain_core.utils.function_calling import convert_to_openai_tool
+from pydantic import ConfigDict, PrivateAttr
+
+from app.services.admission import AdmissionController, AdmissionRejected, current_priority
+
+logger = logging.getLogger(__name__)
+
+
+def is_endpoint_error(error: BaseException) -> bool:
+    """Whether `error` is the endpoint's fault, so another one may succeed."""
+    status = getattr(error, "status_code", None)
+    if isinstance(status, int):
+        return status == 429 or status >= 500
+    return isinstance(error, (
+        openai.APIConnectionError,  # includes APITimeoutError
+        httpx.TransportError,
+        asyncio.TimeoutError,
+        ConnectionError,
+    ))
+
+
+class LLMEndpoint:
+    """One upstream model plus its load and health bookkeeping."""
+
+    def __init__(
+        self,
+        name: str,
+        model: BaseChatModel,
+        admission: Optional[AdmissionController] = None,
+        ewma_alpha: float = 0.3,
+    ):
+        self.name = name
+        self.model = model
+        self.admission = admission
+        self.ewma_alpha = ewma_alpha
+        self.ewma_latency = 0.0  # seconds to first token (or full response)
+        self.outstanding = 0
+        self.requests = 0
+        self.errors = 0
+        self.consecutive_errors = 0
+        self.ejected_until = 0.0
+        self.hedges_won = 0
+
+    def is_healthy(self, now: float) -> bool:
+        return now >= self.ejected_until
+
+    def score(self) -> float:
+        # Unmeasured endpoints score 0 so they get tried early
+        return self.ewma_latency * (self.outstanding + 1)
+
+    def record_latency(self, seconds: float):
+        self._update_ewma(seconds)
+        self.consecutive_errors = 0
+
+    def record_lost_race(self, seconds: float):
+        """A hedge race was lost after `seconds` without a first token.
+
+        The true latency is at least that long, so fold it in; otherwise a
+        stalled endpoint that is always cancelled would keep looking fast.
+        """
+        if seconds > self.ewma_latency:
+            self._update_ewma(seconds)
+
+    def _update_ewma(self, seconds: float):
+        if self.ewma_latency == 0.0:
+            self.ewma_latency = seconds
+        else:
+            self.ewma_latency += self.ewma_alpha * (seconds - self.ewma_latency)
+
+    def record_error(self, eject_after: int, eject_seconds: float):
+        self.errors += 1
+        self.consecutive_errors += 1
+        if self.consecutive_errors >= eject_after:
+            self.ejected_until = time.monotonic() + eject_seconds
+            self.consecutive_errors = 0
+            logger.warning(f"Ejecting LLM endpoint {self.name} for {eject_seconds}s")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "healthy": self.is_healthy(time.monotonic()),
+            "outstanding": self.outstanding,
+            "ewma_latency_ms": round(self.ewma_latency * 1000, 2),
+            "requests": self.requests,
+            "errors": self.errors,
+            "hedges_won": self.hedges_won,
+        }
+
+
+class _Attempt:
+    """A streaming call in progress on one endpoint, holding its admission slot."""
+
+    def __init__(self, endpoint: LLMEndpoint, stream: AsyncIterator[ChatGenerationChunk]):
+        self.endpoint = endpoint
+        self.stream = stream
+        self.started = time.perf_counter()
+        self.next_chunk = asyncio.ensure_future(stream.__anext__())
+        endpoint.outstanding += 1
+        endpoint.requests += 1
+
+    async def close(self):
+        self.next_chunk.cancel()
+        try:
+            await self.next_chunk
+        except BaseException:
+            pass
+        try:
+            await self.stream.aclose()
+        except Exception:
+            pass
+        self.endpoint.outstanding -= 1
+        if self.endpoint.admission is not None:
+            self.endpoint.admission.release(time.perf_counter() - self.started)
+
+
+class RoutedChatModel(BaseChatModel):
+    """Chat model that balances, fails over and hedges across endpoints."""
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    endpoints: List[LLMEndpoint]
+    eject_after_errors: int = 3
+    eject_seconds: float = 30.0
+    hedge: bool = True
+    # Hedge delay before enough samples exist, and its floor afterwards
+    hedge_default_seconds: float = 2.0
+    hedge_min_seconds: float = 0.05
+    hedge_min_samples: int = 20
+    _first_token_samples: Deque[float] = PrivateAttr(default_factory=lambda: deque(maxlen=256))
+
+    @property
+    def _llm_type(self) -> str:
+        return "routed-chat"
+
+    def bind_tools(self, tools: Sequence[Any], **kwargs: Any):
+        formatted = [convert_to_openai_tool(tool) for tool in tools]
+        return self.bind(tools=formatted, **kwargs)
+
+    # ----- Endpoint selection -----
+
+    def _pick(self, exclude: Set[str]) -> Optional[LLMEndpoint]:
+        now = time.monotonic()
+        candidates = [e for e in self.endpoints if e.name not in exclude]
+        healthy = [e for e in candidates if e.is_healthy(now)]
+        if healthy:
+            return min(healthy, key=lambda e: (e.score(), e.outstanding))
+        # Everything is ejected: fail open on the one back soonest
+        return min(candidates, key=lambda e: e.ejected_until, default=None)
+
+    def hedge_delay(self) -> float:
+        """p95 of recent time-to-first-token, used as the hedging budget."""
+        if len(self._first_token_samples) < self.hedge_min_samples:
+            return self.hedge_default_seconds
+        ordered = sorted(self._first_token_samples)
+        p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+        return max(self.hedge_min_seconds, p95)
+
+    def _record_first_token(self, attempt: _Attempt):
+        latency = time.perf_counter() - attempt.started
+        attempt.endpoint.record_latency(latency)
+        self._first_token_samples.append(latency)
+
+    def _record_error(self, endpoint: LLMEndpoint, error: BaseException):
+        logger.warning(f"LLM endpoint {endpoint.name} failed: {error!r}")
+        endpoint.record_error(self.eject_after_errors, self.eject_seconds)
+
+    # ----- Calls -----
+
+    async def _start(self, messages: List[BaseMessage], stop: Optional[List[str]], kwargs: Dict[str, Any],
+                     tried: Set[str], wait: bool) -> Optional[_Attempt]:
+        """Start a call on the best untried endpoint whose model admits it.
+
+        With wait=False (hedges) busy endpoints are passed over and left
+        untried. With wait=True the call queues for a slot, and an endpoint
+        whose model sheds it counts as tried; if every one did, the last
+        rejection is raised.
+        """
+        busy: Set[str] = set()
+        rejected: Optional[AdmissionRejected] = None
+        while (endpoint := self._pick(tried | busy)) is not None:
+            admission = endpoint.admission
+            if admission is not None:
+                if not wait:
+                    if not admission.try_acquire():
+                        busy.add(endpoint.name)
+                        continue
+                else:
+                    try:
+                        await admission.acquire(current_priority.get())
+                    except AdmissionRejected as e:
+                        tried.add(endpoint.name)
+                        rejected = e
+                        continue
+            tried.add(endpoint.name)
+            return _Attempt(endpoint, endpoint.model._astream(messages, stop=stop, **kwargs))
+        if rejected is not None:
+            raise rejected
+        return None
+
+    async def _astream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Any = None,
+        **kwargs: Any,
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        tried: Set[str] = set()
+        attempts: List[_Attempt] = []
+        first = await self._start(messages, stop, kwargs, tried, wait=True)
+        if first is None:
+            raise RuntimeError("No LLM endpoints configured")
+        attempts.append(first)
+        hedge_at = first.started + self.hedge_delay() if self.hedge else None
+        exhausted = False
+        winner: Optional[_Attempt] = None
+        chunk: Optional[ChatGenerationChunk] = None
+        last_error: Optional[BaseException] = None
+        try:
+            # Race attempts for the first chunk
+            while winner is None:
+                # One attempt before the hedge delay, two after it; attempts
+                # that failed are replaced while untried endpoints remain
+                hedging = hedge_at is not None and time.perf_counter() >= hedge_at
+                while not exhausted and len(attempts) < (2 if hedging else 1):
+                    attempt = await self._start(messages, stop, kwargs, tried, wait=not attempts)
+                    if attempt is None:
+                        # A hedge may only have found busy endpoints
+                        exhausted = len(tried) == len(self.endpoints)
+                        break
+                    if attempts:
+                        logger.info(f"Hedging LLM request on {attempt.endpoint.name}")
+                    attempts.append(attempt)
+                if not attempts:
+                    raise last_error
+                by_task = {attempt.next_chunk: attempt for attempt in attempts}
+                done, _ = await asyncio.wait(
+                    by_task,
+                    timeout=None if hedging or exhausted or hedge_at is None
+                    else max(0.0, hedge_at - time.perf_counter()),
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+                for task in done:
+                    attempt = by_task[task]
+                    try:
+                        chunk = task.result()
+                    except StopAsyncIteration:
+                        chunk = None
+                    except Exception as e:
+                        if not is_endpoint_error(e):
+                            # The request itself is bad: don't replay it
+                            raise
+                        last_error = e
+                        self._record_error(attempt.endpoint, e)
+                        attempts.remove(attempt)
+                        await attempt.close()
+                        continue
+                    winner = attempt
+                    break
+
+            attempts.remove(winner)
+            for loser in attempts:
+                loser.endpoint.record_lost_race(time.perf_counter() - loser.started)
+                await loser.close()
+            attempts.clear()
+            self._record_first_token(winner)
+            if winner is not first:
+                winner.endpoint.hedges_won += 1
+
+            if chunk is None:
+                return
+            if run_manager:
+                await run_manager.on_llm_new_token(chunk.text, chunk=chunk)
+            yield chunk
+            try:
+                async for chunk in winner.stream:
+                    if run_manager:
+                        await run_manager.on_llm_new_token(chunk.text, chunk=chunk)
+                    yield chunk
+            except Exception as e:
+                # Too late to fail over once tokens have been emitted
+                if is_endpoint_error(e):
+                    self._record_error(winner.endpoint, e)
+                raise
+        finally:
+            for attempt in attempts:
+                await attempt.close()
+            if winner is not None:
+                await winner.close()
+
+    async def _agenerate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Any = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        # Route through the streaming path so hedging and failover apply
+        chunks = [chunk async for chunk in self._astream(messages, stop, run_manager=run_manager, **kwargs)]
+        if not chunks:
+            raise RuntimeError("LLM endpoint returned an empty response")
+        merged = chunks[0]
+        for chunk in chunks[1:]:
+            merged += chunk
+        return ChatResult(generations=[ChatGeneration(
+            message=message_chunk_to_message(merged.message),
+            generation_info=merged.generation_info,
+        )])
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                  run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        """Sync calls (AGENT_ASYNC_NODES=false): balance and fail over, no hedging.
+
+        Admission slots are asyncio-based and not taken here; see admission.
+        """
+        tried: Set[str] = set()
+        last_error: Optional[BaseException] = None
+        while (endpoint := self._pick(tried)) is not None:
+            tried.add(endpoint.name)
+            endpoint.outstanding += 1
+            endpoint.requests += 1
+            started = time.perf_counter()
+            try:
+                result = endpoint.model._generate(messages, stop=stop, run_manager=run_manager, **kwargs)
+            except Exception as e:
+                if not is_endpoint_error(e):
+                    raise
+                last_error = e
+                self._record_error(endpoint, e)
+                continue
+            finally:
+                endpoint.outstanding -= 1
+            endpoint.record_latency(time.perf_counter() - started)
+            return result
+        raise last_error or RuntimeError("No LLM endpoints configured")
+
+    def stats(self) -> List[Dict[str, Any]]:
+        return [endpoint.stats() for endpoint in self.endpoints]
@@ -0,0 +1,284 @@
+"""Shared HTTP connection pool for LLM calls.
+
+Every ChatOpenAI client built by the app is handed the same httpx clients,
+so connections (and their TLS sessions) to LLM_BASE_URL are kept alive and
+reused across requests instead of being set up per client. Pool limits,
+keep-alive, HTTP/2 and per-phase timeouts come from the LLM_HTTP_* settings.
+
+The async client serves the default async orchestrator nodes; a sync client
+with the same configuration backs AGENT_ASYNC_NODES=false and is only created
+in that mode. The app lifespan opens the pool on startup and closes it on
+shutdown; closing also drops the cached graph and router, so models bound to
+the closed clients are rebuilt on the next startup.
+
+create_chat_model() builds the chat model on top of the pool: one ChatOpenAI
+for LLM_BASE_URL, or a RoutedChatModel across LLM_ENDPOINTS.
+"""
+
+import logging
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import httpx
+from langchain_core.language_models import BaseChatModel
+from langchain_openai import ChatOpenAI
+
+from app.core.settings import settings
+from app.services.admission import AdmissionController, get_admission_controller
+from app.services.llm_router import LLMEndpoint, RoutedChatModel
+
+logger = logging.getLogger(__name__)
+
+
+class PoolMetrics:
+    """Request counters shared by the sync and async transports."""
+
+    def __init__(self):
+        self.requests = 0
+        self.failed = 0
+        # Requests sent but still waiting for response headers
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.header_seconds = 0.0
+
+    def start(self) -> float:
+        self.requests += 1
+        self.in_flight += 1
+        self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        return time.perf_counter()
+
+    def finish(self, started: float, failed: bool):
+        self.in_flight -= 1
+        self.header_seconds += time.perf_counter() - started
+        if failed:
+            self.failed += 1
+
+    def stats(self) -> Dict[str, Any]:
+        answered = self.requests - self.in_flight
+        return {
+            "requests": self.requests,
+            "failed": self.failed,
+            "in_flight": self.in_flight,
+            "peak_in_flight": self.peak_in_flight,
+            "avg_time_to_headers_ms": round(1000 * self.header_seconds / answered, 2) if answered else None,
+        }
+
+
+class InstrumentedAsyncTransport(httpx.AsyncHTTPTransport):
+    def __init__(self, metrics: PoolMetrics, **kwargs: Any):
+        super().__init__(**kwargs)
+        self.metrics = metrics
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        started = self.metrics.start()
+        failed = True
+        try:
+            response = await super().handle_async_request(request)
+            failed = response.status_code >= 500
+            return response
+        finally:
+            self.metrics.finish(started, failed)
+
+
+class InstrumentedTransport(httpx.HTTPTransport):
+    def __init__(self, metrics: PoolMetrics, **kwargs: Any):
+        super().__init__(**kwargs)
+        self.metrics = metrics
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        started = self.metrics.start()
+        failed = True
+        try:
+            response = super().handle_request(request)
+            failed = response.status_code >= 500
+            return response
+        finally:
+            self.metrics.finish(started, failed)
+
+
+def _connection_stats(transport: Optional[httpx.BaseTransport]) -> Optional[Dict[str, int]]:
+    if transport is None:
+        return {"open": 0, "idle": 0, "active": 0}
+    # httpx does not expose its connection pool publicly; report nothing
+    # rather than break /stats if a httpx/httpcore release changes it
+    connections = getattr(getattr(transport, "_pool", None), "connections", None)
+    if connections is None:
+        return None
+    try:
+        idle = sum(1 for connection in connections if connection.is_idle())
+    except AttributeError:
+        return None
+    return {"open": len(connections), "idle": idle, "active": len(connections) - idle}
+
+
+class LLMHttpPool:
+    """Lifespan-scoped httpx clients for the LLM provider."""
+
+    def __init__(
+        self,
+        max_connections: int = 100,
+        max_keepalive_connections: int = 20,
+        keepalive_expiry: float = 30.0,
+        http2: bool = False,
+        connect_timeout: float = 5.0,
+        read_timeout: float = 60.0,
+        write_timeout: float = 10.0,
+        pool_timeout: float = 5.0,
+    ):
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self.timeout = httpx.Timeout(
+            connect=connect_timeout,
+            read=read_timeout,
+            write=write_timeout,
+            pool=pool_timeout,
+        )
+        self.http2 = http2 and _h2_available()
+        self.metrics = PoolMetrics()
+        self._async_transport: Optional[InstrumentedAsyncTransport] = None
+        self._transport: Optional[InstrumentedTransport] = None
+        self._async_client: Optional[httpx.AsyncClient] = None
+        self._client: Optional[httpx.Client] = None
+
+    @property
+    def async_client(self) -> httpx.AsyncClient:
+        if self._async_client is None or self._async_client.is_closed:
+            self._async_transport = InstrumentedAsyncTransport(
+                self.metrics, limits=self.limits, http2=self.http2
+            )
+            self._async_client = httpx.AsyncClient(
+                transport=self._async_transport, timeout=self.timeout
+            )
+        return self._async_client
+
+    @property
+    def client(self) -> httpx.Client:
+        if self._client is None or self._client.is_closed:
+            self._transport = InstrumentedTransport(
+                self.metrics, limits=self.limits, http2=self.http2
+            )
+            self._client = httpx.Client(transport=self._transport, timeout=self.timeout)
+        return self._client
+
+    def open(self, sync: bool = False):
+        """Create the clients up front; the sync one only when sync nodes use it."""
+        self.async_client
+        if sync:
+            self.client
+
+    async def aclose(self):
+        global llm_router
+        # Cached models hold references to these clients; drop them so a
+        # later lifespan builds fresh ones instead of reusing closed clients
+        from app.agents.orchestrator import get_orchestrator_graph
+
+        get_orchestrator_graph.cache_clear()
+        llm_router = None
+        if self._async_client is not None:
+            await self._async_client.aclose()
+            self._async_client = self._async_transport = None
+        if self._client is not None:
+            self._client.close()
+            self._client = self._transport = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "base_url": settings.LLM_BASE_URL,
+            "http2": self.http2,
+            "max_connections": self.limits.max_connections,
+            "max_keepalive_connections": self.limits.max_keepalive_connections,
+            "keepalive_expiry": self.limits.keepalive_expiry,
+            "async_connections": _connection_stats(self._async_transport),
+            "sync_connections": _connection_stats(self._transport),
+            **self.metrics.stats(),
+        }
+
+
+def _h2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        logger.warning("LLM_HTTP2 is enabled but the h2 package is not installed; using HTTP/1.1")
+        return False
+    return True
+
+
+llm_http_pool = LLMHttpPool(
+    max_connections=settings.LLM_HTTP_MAX_CONNECTIONS,
+    max_keepalive_connections=settings.LLM_HTTP_MAX_KEEPALIVE,
+    keepalive_expiry=settings.LLM_HTTP_KEEPALIVE_EXPIRY,
+    http2=settings.LLM_HTTP2,
+    connect_timeout=settings.LLM_HTTP_CONNECT_TIMEOUT,
+    read_timeout=settings.LLM_HTTP_READ_TIMEOUT,
+    write_timeout=settings.LLM_HTTP_WRITE_TIMEOUT,
+    pool_timeout=settings.LLM_HTTP_POOL_TIMEOUT,
+)
+
+# Set by create_chat_model when LLM_ENDPOINTS is configured
+llm_router: Optional[RoutedChatModel] = None
+
+
+def parse_endpoints(value: str) -> List[Tuple[str, str]]:
+    """Parse LLM_ENDPOINTS into (base_url, model) pairs."""
+    endpoints = []
+    for entry in value.split(","):
+        entry = entry.strip()
+        if not entry:
+            continue
+        base_url, _, model = entry.partition("|")
+        endpoints.append((base_url.strip(), model.strip() or settings.LLM_MODEL))
+    return endpoints
+
+
+def _chat_openai(base_url: str, model: str, max_retries: Optional[int] = None) -> ChatOpenAI:
+    # Reuse pooled keep-alive connections across all LLM calls; the sync
+    # client is only needed when the orchestrator runs sync nodes
+    http_clients: Dict[str, Any] = {"http_async_client": llm_http_pool.async_client}
+    if not settings.AGENT_ASYNC_NODES:
+        http_clients["http_client"] = llm_http_pool.client
+    return ChatOpenAI(
+        model=model,
+        api_key=settings.LLM_API_KEY,
+        base_url=base_url,
+        streaming=True,
+        max_retries=max_retries,
+        # The OpenAI client sends its own per-request timeout, which would
+        # otherwise override the pool clients' LLM_HTTP_* timeouts
+        timeout=llm_http_pool.timeout,
+        **http_clients,
+    )
+
+
+def admission_controllers() -> List[AdmissionController]:
+    """Admission controllers of every model a chat call may be routed to."""
+    models = [model for _, model in parse_endpoints(settings.LLM_ENDPOINTS)] or [settings.LLM_MODEL]
+    return [get_admission_controller(model) for model in dict.fromkeys(models)]
+
+
+def create_chat_model() -> BaseChatModel:
+    """Chat model for the orchestrator, backed by the shared HTTP pool."""
+    global llm_router
+    endpoints = parse_endpoints(settings.LLM_ENDPOINTS)
+    if not endpoints:
+        return _chat_openai(settings.LLM_BASE_URL, settings.LLM_MODEL)
+
+    logger.info(f"Routing LLM calls across {len(endpoints)} endpoints")
+    llm_router = RoutedChatModel(
+        endpoints=[
+            # The router fails over instead of retrying the same endpoint
+            LLMEndpoint(
+                f"{base_url}|{model}",
+                _chat_openai(base_url, model, max_retries=0),
+                admission=get_admission_controller(model),
+            )
+            for base_url, model in endpoints
+        ],
+        eject_after_errors=settings.LLM_EJECT_AFTER_ERRORS,
+        eject_seconds=settings.LLM_EJECT_SECONDS,
+        hedge=settings.LLM_HEDGE,
+        hedge_default_seconds=settings.LLM_HEDGE_DEFAULT_SECONDS,
+    )
+    return llm_router
@@ -0,0 +1,185 @@
+"""Exact-match cache for LLM chat responses.
+
+A chat turn is keyed on a canonical hash of the converted OpenAI messages
+plus a scope string identifying the model and its bound tool schemas, so a
+change of model or tools never serves stale answers. Entries hold the text
+deltas of the response and are replayed by stream_text as the same
+text-delta frames the model produced.
+
+Two tiers:
+- an in-memory LRU (RESPONSE_CACHE_MAX_ENTRIES), checked first;
+- an optional SQLite table on the DB_URI database (RESPONSE_CACHE_PERSIST)
+  shared by workers and kept across restarts; hits are promoted to memory.
+
+Both honour RESPONSE_CACHE_TTL_SECONDS. Only plain text turns the model
+finished with "stop" are stored: responses that called tools (whose outputs
+go stale, e.g. weather), were cut off (e.g. "length") or emitted an error
+are not cached.
+"""
+
+import hashlib
+import json
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Sequence
+
+import aiosqlite
+
+from app.core.settings import settings
+from app.services.job_store import sqlite_path_from_uri
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS llm_response_cache (
+    cache_key TEXT PRIMARY KEY,
+    deltas TEXT NOT NULL,
+    finish_reason TEXT,
+    expires_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_llm_response_cache_expires_at ON llm_response_cache (expires_at);
+"""
+
+
+class CachedResponse:
+    """Text deltas and finish reason of one completed chat turn."""
+
+    __slots__ = ("deltas", "finish_reason", "expires_at")
+
+    def __init__(self, deltas: List[str], finish_reason: Optional[str], expires_at: float):
+        self.deltas = deltas
+        self.finish_reason = finish_reason
+        self.expires_at = expires_at
+
+
+def _drop_empty(value: Any) -> Any:
+    # None/absent fields are equivalent in the OpenAI message format
+    if isinstance(value, dict):
+        return {k: _drop_empty(v) for k, v in value.items() if v is not None}
+    if isinstance(value, list):
+        return [_drop_empty(v) for v in value]
+    return value
+
+
+def canonical_json(value: Any) -> str:
+    return json.dumps(_drop_empty(value), sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+
+
+def cache_scope(model: str, tools: Sequence[Dict[str, Any]]) -> str:
+    """Fingerprint of the model name and its bound tool schemas."""
+    return hashlib.sha256(canonical_json({"model": model, "tools": list(tools)}).encode()).hexdigest()
+
+
+class ResponseCache:
+    """In-memory LRU over an optional SQLite tier, both with a TTL."""
+
+    def __init__(self, max_entries: int = 1024, ttl_seconds: float = 300.0, path: Optional[str] = None):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.path = path
+        self._entries: "OrderedDict[str, CachedResponse]" = OrderedDict()
+        self._db: Optional[aiosqlite.Connection] = None
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.stores = 0
+
+    async def open(self):
+        if self.path is None:
+            return
+        self._db = await aiosqlite.connect(self.path)
+        await self._db.execute("PRAGMA journal_mode=WAL")
+        await self._db.executescript(SCHEMA)
+        await self._db.execute("DELETE FROM llm_response_cache WHERE expires_at <= ?", (time.time(),))
+        await self._db.commit()
+
+    async def close(self):
+        if self._db is not None:
+            await self._db.close()
+            self._db = None
+
+    @staticmethod
+    def key(messages: Sequence[Any], scope: str) -> str:
+        """Canonical hash of the conversation within a model/tools scope."""
+        digest = hashlib.sha256(scope.encode())
+        digest.update(canonical_json(list(messages)).encode())
+        return digest.hexdigest()
+
+    async def get(self, key: str) -> Optional[CachedResponse]:
+        now = time.time()
+        entry = self._entries.get(key)
+        if entry is not None:
+            if entry.expires_at > now:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry
+            del self._entries[key]
+
+        if self._db is not None:
+            cursor = await self._db.execute(
+                "SELECT deltas, finish_reason, expires_at FROM llm_response_cache "
+                "WHERE cache_key = ? AND expires_at > ?",
+                (key, now),
+            )
+            row = await cursor.fetchone()
+            if row is not None:
+                entry = CachedResponse(json.loads(row[0]), row[1], row[2])
+                self._remember(key, entry)
+                self.hits += 1
+                self.disk_hits += 1
+                return entry
+
+        self.misses += 1
+        return None
+
+    async def set(self, key: str, deltas: List[str], finish_reason: Optional[str] = None):
+        entry = CachedResponse(deltas, finish_reason, time.time() + self.ttl_seconds)
+        self._remember(key, entry)
+        self.stores += 1
+        if self._db is not None:
+            await self._db.execute(
+                "INSERT OR REPLACE INTO llm_response_cache (cache_key, deltas, finish_reason, expires_at) "
+                "VALUES (?, ?, ?, ?)",
+                (key, json.dumps(deltas), finish_reason, entry.expires_at),
+            )
+            await self._db.commit()
+
+    def _remember(self, key: str, entry: CachedResponse):
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "persistent": self._db is not None,
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "stores": self.stores,
+            "hit_ratio": round(self.hits / lookups, 3) if lookups else None,
+        }
+
+
+def create_response_cache() -> Optional[ResponseCache]:
+    """Build the response cache from settings, or None when disabled."""
+    if not settings.RESPONSE_CACHE_ENABLED:
+        return None
+    path = None
+    if settings.RESPONSE_CACHE_PERSIST:
+        path = sqlite_path_from_uri(settings.DB_URI)
+        if path is None:
+            logger.warning("RESPONSE_CACHE_PERSIST needs a sqlite DB_URI, caching responses in memory only")
+    return ResponseCache(
+        max_entries=settings.RESPONSE_CACHE_MAX_ENTRIES,
+        ttl_seconds=settings.RESPONSE_CACHE_TTL_SECONDS,
+        path=path,
+    )
+
+
+response_cache = create_response_cache()
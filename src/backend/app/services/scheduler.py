@@ -1,45 +1,465 @@
 """Scheduler service for delayed SSE broadcasts.
 
-Simple fire-and-forget scheduler using asyncio for demo purposes.
-Events are not persisted and will be lost on server restart.
+A single scheduler task sleeps until the earliest deadline in a min-heap,
+so pending events cost one heap entry each instead of one sleeping task
+and timer handle. Events due together are fired as one batch, grouped
+into a single broadcast per channel.
+
+With SCHEDULER_PERSIST enabled, pending events are also written to a SQLite
+job store on DB_URI (see app.services.job_store) and recovered at startup,
+so deploys and restarts no longer lose them. Delivery is then at-least-once:
+each broadcast carries an `idempotency_key` (the job id) to dedupe on.
+Writes are buffered for SCHEDULER_FLUSH_INTERVAL, though, and schedule()
+returns before they reach the database: an event scheduled just before a
+crash can still be lost.
+
+Events scheduled with a `dedupe_key` are coalesced: while one is pending,
+scheduling the same key again returns the existing handle instead of
+queueing a duplicate broadcast.
 """
 
 import asyncio
+import heapq
 import json
 import logging
-from typing import Any, Dict
+import time
+import uuid
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Tuple
 
-from app.services.sse import sse_manager
+from app.core.settings import settings
+from app.services.job_store import SQLiteJobStore, sqlite_path_from_uri
+from app.services.sse import GLOBAL_CHANNEL, SSEManager, sse_manager
 
 logger = logging.getLogger(__name__)
 
 
-async def _delayed_broadcast(delay_seconds: float, event_type: str, event_data: Dict[str, Any]):
-    """Internal async function to wait and then broadcast SSE event."""
-    logger.info(f"Scheduled SSE event '{event_type}' in {delay_seconds}s")
-    await asyncio.sleep(delay_seconds)
-    
-    # Convert data to JSON string for SSE
-    data_json = json.dumps(event_data)
-    await sse_manager.broadcast(event_type, data_json)
-    logger.info(f"Broadcasted SSE event '{event_type}': {data_json[:100]}...")
+class ScheduledEvent:
+    """Handle to a pending SSE broadcast tracked by the scheduler."""
+
+    def __init__(
+        self,
+        job_id: str,
+        event_type: str,
+        payload: str,
+        channel: str,
+        deadline: float,
+        dedupe_key: Optional[str] = None,
+        scheduler: Optional["EventScheduler"] = None,
+    ):
+        self.job_id = job_id
+        self.event_type = event_type
+        # JSON-encoded once, for both the job store and the broadcast
+        self.payload = payload
+        self.channel = channel
+        self.deadline = deadline
+        self.dedupe_key = dedupe_key
+        self.scheduler = scheduler
+        # Duplicate schedules folded into this event
+        self.coalesced = 0
+
+    def cancel(self) -> bool:
+        return self.scheduler.cancel(self.job_id)
+
+    def reschedule(self, delay_seconds: float) -> bool:
+        return self.scheduler.reschedule(self.job_id, delay_seconds)
+
+    def to_dict(self, now: float) -> Dict[str, Any]:
+        return {
+            "job_id": self.job_id,
+            "event_type": self.event_type,
+            "channel": self.channel,
+            "dedupe_key": self.dedupe_key,
+            "coalesced": self.coalesced,
+            "due_in_seconds": max(0.0, self.deadline - now),
+        }
+
+
+class EventScheduler:
+    """Single-task delayed event scheduler over a min-heap.
+
+    Cancel and reschedule are O(1)/O(log n): stale heap entries are skipped
+    lazily when they reach the top. Events whose deadlines fall within
+    `batch_window` seconds of each other are fired together, at most
+    `max_batch` per broadcast round so a recovered backlog streams out in
+    bulk without starving the loop. Events stay tracked until their
+    broadcast succeeds; a failed one is retried after `retry_delay`.
+
+    With a `store`, every schedule/reschedule/cancel/fire is buffered into
+    it and flushed every `flush_interval` seconds in one transaction.
+    """
+
+    def __init__(
+        self,
+        manager: SSEManager = sse_manager,
+        batch_window: float = 0.01,
+        max_batch: int = 500,
+        store: Optional[SQLiteJobStore] = None,
+        flush_interval: float = 0.05,
+        retry_delay: float = 1.0,
+    ):
+        self.manager = manager
+        self.batch_window = batch_window
+        self.max_batch = max_batch
+        self.store = store
+        self.flush_interval = flush_interval
+        # Delay before re-firing events whose broadcast failed
+        self.retry_delay = retry_delay
+        # (deadline, sequence, job_id); sequence keeps equal deadlines FIFO
+        self._heap: List[Tuple[float, int, str]] = []
+        self._jobs: Dict[str, ScheduledEvent] = {}
+        self._by_dedupe_key: Dict[str, ScheduledEvent] = {}
+        self._sequence = 0
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._store_dirty = asyncio.Event()
+        self._store_task: Optional[asyncio.Task] = None
+        self.fired = 0
+        self.batches = 0
+        self.recovered = 0
+        self.coalesced = 0
+        self.failed = 0
+
+    def _ensure_started(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    def _push(self, event: ScheduledEvent):
+        self._sequence += 1
+        heapq.heappush(self._heap, (event.deadline, self._sequence, event.job_id))
+        # Only an earlier head changes how long the loop should sleep
+        if self._heap[0][2] == event.job_id:
+            self._wakeup.set()
+
+    def _persist(self, event: ScheduledEvent):
+        if self.store is None:
+            return
+        # Store wall-clock time: the loop clock restarts with the process
+        due_at = time.time() + (event.deadline - asyncio.get_running_loop().time())
+        self.store.upsert(
+            event.job_id, event.event_type, event.channel, event.payload, due_at, event.dedupe_key
+        )
+        self._store_dirty.set()
+
+    def _unpersist(self, job_id: str):
+        if self.store is None:
+            return
+        self.store.delete(job_id)
+        self._store_dirty.set()
+
+    def _track(self, event: ScheduledEvent):
+        self._jobs[event.job_id] = event
+        if event.dedupe_key is not None:
+            self._by_dedupe_key[event.dedupe_key] = event
+
+    def _untrack(self, job_id: str) -> Optional[ScheduledEvent]:
+        event = self._jobs.pop(job_id, None)
+        if event is not None and event.dedupe_key is not None:
+            self._by_dedupe_key.pop(event.dedupe_key, None)
+        return event
+
+    def schedule(
+        self,
+        event_type: str,
+        event_data: Dict[str, Any],
+        delay_seconds: float,
+        channel: str = GLOBAL_CHANNEL,
+        dedupe_key: Optional[str] = None,
+    ) -> ScheduledEvent:
+        """Schedule a broadcast and return its handle.
+
+        If an event with the same `dedupe_key` is still pending, that event's
+        handle is returned and nothing new is queued.
+        """
+        self._ensure_started()
+        now = asyncio.get_running_loop().time()
+        return self._schedule_at(event_type, event_data, now + max(0.0, delay_seconds), channel, dedupe_key)
+
+    def schedule_many(self, events: List[Dict[str, Any]]) -> List[ScheduledEvent]:
+        """Schedule several broadcasts in one insertion.
+
+        Each item takes the keyword arguments of `schedule`. Delays are
+        measured from a single clock reading, so events with equal delays
+        share a deadline and fire in one batch (one broadcast per channel).
+        """
+        self._ensure_started()
+        now = asyncio.get_running_loop().time()
+        return [
+            self._schedule_at(
+                item["event_type"],
+                item["event_data"],
+                now + max(0.0, item["delay_seconds"]),
+                item.get("channel", GLOBAL_CHANNEL),
+                item.get("dedupe_key"),
+            )
+            for item in events
+        ]
+
+    def _schedule_at(
+        self,
+        event_type: str,
+        event_data: Dict[str, Any],
+        deadline: float,
+        channel: str,
+        dedupe_key: Optional[str],
+    ) -> ScheduledEvent:
+        if dedupe_key is not None:
+            existing = self.coalesce(dedupe_key)
+            if existing is not None:
+                return existing
+        job_id = uuid.uuid4().hex
+        if isinstance(event_data, dict):
+            event_data = {**event_data, "idempotency_key": job_id}
+        event = ScheduledEvent(
+            job_id=job_id,
+            event_type=event_type,
+            payload=json.dumps(event_data),
+            channel=channel,
+            deadline=deadline,
+            dedupe_key=dedupe_key,
+            scheduler=self,
+        )
+        self._track(event)
+        self._push(event)
+        self._persist(event)
+        return event
+
+    def cancel(self, job_id: str) -> bool:
+        """Cancel a pending event. Returns False if it is unknown or already fired."""
+        if self._untrack(job_id) is None:
+            return False
+        self._unpersist(job_id)
+        self._maybe_compact()
+        return True
+
+    def _maybe_compact(self):
+        """Rebuild the heap once stale entries outnumber live ones."""
+        if len(self._heap) > 2 * len(self._jobs) + 64:
+            self._heap = [
+                entry for entry in self._heap
+                if (event := self._jobs.get(entry[2])) is not None and event.deadline == entry[0]
+            ]
+            heapq.heapify(self._heap)
+
+    def reschedule(self, job_id: str, delay_seconds: float) -> bool:
+        """Move a pending event to fire `delay_seconds` from now."""
+        event = self._jobs.get(job_id)
+        if event is None:
+            return False
+        event.deadline = asyncio.get_running_loop().time() + max(0.0, delay_seconds)
+        self._push(event)
+        self._persist(event)
+        self._maybe_compact()
+        return True
+
+    def get(self, job_id: str) -> Optional[ScheduledEvent]:
+        return self._jobs.get(job_id)
+
+    def find(self, dedupe_key: str) -> Optional[ScheduledEvent]:
+        """The pending event scheduled under `dedupe_key`, if any."""
+        return self._by_dedupe_key.get(dedupe_key)
+
+    def coalesce(self, dedupe_key: str) -> Optional[ScheduledEvent]:
+        """Fold a duplicate into the pending event for `dedupe_key`, if any."""
+        event = self._by_dedupe_key.get(dedupe_key)
+        if event is not None:
+            event.coalesced += 1
+            self.coalesced += 1
+        return event
+
+    def pending(self, channel: Optional[str] = None) -> List[ScheduledEvent]:
+        events = self._jobs.values()
+        if channel is not None:
+            events = [event for event in events if event.channel == channel]
+        return sorted(events, key=lambda event: event.deadline)
+
+    def stats(self) -> Dict[str, Any]:
+        stats = {
+            "pending": len(self._jobs),
+            "heap_size": len(self._heap),
+            "fired": self.fired,
+            "batches": self.batches,
+            "recovered": self.recovered,
+            "coalesced": self.coalesced,
+            "failed": self.failed,
+        }
+        if self.store is not None:
+            stats.update(self.store.stats())
+        return stats
+
+    async def start(self):
+        """Open the job store and adopt pending jobs left by dead schedulers."""
+        if self.store is not None:
+            await self.store.open()
+            await self._claim_orphans()
+            self._store_task = asyncio.create_task(self._maintain_store())
+        self._ensure_started()
+
+    async def stop(self):
+        for task in (self._task, self._store_task):
+            if task is None:
+                continue
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        self._task = self._store_task = None
+        if self.store is not None:
+            # Unfired jobs stay in the table for the next start
+            await self.store.close()
+
+    async def _claim_orphans(self):
+        token = await self.store.claim_orphans()
+        if token is None:
+            return
+        loop = asyncio.get_running_loop()
+        recovered = 0
+        async for rows in self.store.iter_claimed(token):
+            offset = loop.time() - time.time()
+            for job_id, event_type, channel, payload, due_at, dedupe_key in rows:
+                if job_id in self._jobs:
+                    continue
+                # Overdue jobs land at the top of the heap and fire at once
+                event = ScheduledEvent(
+                    job_id, event_type, payload, channel, due_at + offset, dedupe_key, self
+                )
+                self._track(event)
+                self._push(event)
+                recovered += 1
+        await self.store.finish_claim(token)
+        self.recovered += recovered
+        logger.info(f"Recovered {recovered} scheduled SSE events from the job store")
+
+    async def _maintain_store(self):
+        """Flush buffered writes, renew our lease and adopt orphaned jobs."""
+        loop = asyncio.get_running_loop()
+        lease_interval = self.store.lease_seconds / 3
+        next_lease = loop.time() + lease_interval
+        while True:
+            try:
+                await asyncio.wait_for(self._store_dirty.wait(), next_lease - loop.time())
+                # Let a burst of schedules accumulate into one transaction
+                await asyncio.sleep(self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            try:
+                self._store_dirty.clear()
+                await self.store.flush()
+                if loop.time() >= next_lease:
+                    next_lease = loop.time() + lease_interval
+                    await self.store.renew_lease()
+                    await self._claim_orphans()
+            except Exception:
+                logger.exception("Scheduler job store maintenance failed")
+
+    def _pop_due(self, now: float) -> List[ScheduledEvent]:
+        due: List[ScheduledEvent] = []
+        horizon = now + self.batch_window
+        while self._heap and self._heap[0][0] <= horizon and len(due) < self.max_batch:
+            deadline, _, job_id = heapq.heappop(self._heap)
+            event = self._jobs.get(job_id)
+            # Skip cancelled jobs and entries superseded by a reschedule
+            if event is None or event.deadline != deadline:
+                continue
+            due.append(event)
+        return due
+
+    async def _fire(self, due: List[ScheduledEvent]):
+        by_channel: Dict[str, List[ScheduledEvent]] = defaultdict(list)
+        for event in due:
+            by_channel[event.channel].append(event)
+        fired = 0
+        for channel, events in by_channel.items():
+            try:
+                await self.manager.broadcast_many(
+                    channel, [(event.event_type, event.payload) for event in events]
+                )
+            except Exception:
+                logger.exception(f"Failed to fire {len(events)} scheduled SSE events on {channel}")
+                self._retry(events)
+                continue
+            # Forget and delete only after the broadcast: a crash in between
+            # re-fires, a failure retries
+            for event in events:
+                if self._jobs.get(event.job_id) is event:
+                    self._untrack(event.job_id)
+                self._unpersist(event.job_id)
+            fired += len(events)
+        self.fired += fired
+        self.batches += 1
+        logger.debug(f"Fired {fired} scheduled SSE events on {len(by_channel)} channels")
+
+    def _retry(self, events: List[ScheduledEvent]):
+        self.failed += len(events)
+        deadline = asyncio.get_running_loop().time() + self.retry_delay
+        for event in events:
+            # Cancelled while the broadcast was in flight
+            if self._jobs.get(event.job_id) is not event:
+                continue
+            event.deadline = deadline
+            self._push(event)
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            due = self._pop_due(loop.time())
+            if due:
+                await self._fire(due)
+                # Local broadcasts never await: yield between batches
+                await asyncio.sleep(0)
+                continue
+
+            timeout = self._heap[0][0] - loop.time() if self._heap else None
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+
+def create_job_store() -> Optional[SQLiteJobStore]:
+    """Build the job store from settings, or None to keep events in memory."""
+    if not settings.SCHEDULER_PERSIST:
+        return None
+    path = sqlite_path_from_uri(settings.DB_URI)
+    if path is None:
+        logger.warning("SCHEDULER_PERSIST needs a sqlite DB_URI, keeping scheduled events in memory")
+        return None
+    return SQLiteJobStore(path, lease_seconds=settings.SCHEDULER_LEASE_SECONDS)
+
+
+event_scheduler = EventScheduler(
+    store=create_job_store(),
+    flush_interval=settings.SCHEDULER_FLUSH_INTERVAL,
+)
 
 
 def schedule_sse_event(
     event_type: str,
     event_data: Dict[str, Any],
     delay_seconds: float = 5.0,
-) -> None:
+    channel: str = GLOBAL_CHANNEL,
+    dedupe_key: Optional[str] = None,
+) -> ScheduledEvent:
     """Schedule an SSE event to be broadcast after a delay.
-    
-    This is a fire-and-forget function that creates an async task.
-    The task will run in the background and broadcast the event after the delay.
-    
+
+    The event is queued on the shared scheduler, whose single background
+    task broadcasts it once the delay has elapsed.
+
     Args:
         event_type: SSE event type (e.g., 'url_summary_complete')
         event_data: Data to send with the event
         delay_seconds: Delay before broadcasting (default: 5.0 for testing)
+        channel: SSE channel to publish on (default: every connection)
+        dedupe_key: Coalesce with a pending event scheduled under the same key
+
+    Returns:
+        Handle exposing job_id, cancel() and reschedule()
     """
-    # Create background task - fire and forget
-    asyncio.create_task(_delayed_broadcast(delay_seconds, event_type, event_data))
-    logger.info(f"Created scheduled SSE task: {event_type} in {delay_seconds}s")
+    event = event_scheduler.schedule(event_type, event_data, delay_seconds, channel, dedupe_key)
+    if event.coalesced:
+        logger.info(f"Coalesced SSE event {event_type} into pending job {event.job_id}")
+    else:
+        logger.info(f"Scheduled SSE event {event.job_id}: {event_type} on {channel} in {delay_seconds}s")
+    return event
@@ -0,0 +1,119 @@
+"""Coalescing of identical in-flight streaming requests.
+
+The first request for a key becomes the leader: its stream runs as a
+background task (a "flight") that appends each frame to a buffer. Requests
+for the same key that arrive while the flight is running attach as
+followers and read the same buffer from the start, so N identical requests
+cost one upstream generation.
+
+The flight does not belong to any one request, so a leader that
+disconnects does not cut its followers off. Once every subscriber has gone
+the flight is cancelled, which stops the upstream generation. It is
+forgotten as soon as it completes or is abandoned; later requests start a
+new flight (or hit the response cache).
+"""
+
+import asyncio
+import logging
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class Flight:
+    """A running stream and the frames it has produced so far."""
+
+    def __init__(self, key: str):
+        self.key = key
+        self.frames: List[Any] = []
+        self.done = False
+        self.abandoned = False
+        self.subscribers = 0
+        self.task: Optional[asyncio.Task] = None
+        # Replaced after every wakeup so waiters only see new frames
+        self._changed = asyncio.Event()
+
+    def _notify(self):
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    async def run(self, frames: AsyncIterator[Any]):
+        try:
+            async for frame in frames:
+                self.frames.append(frame)
+                self._notify()
+        except Exception:
+            # The stream has already reported the error in-band
+            logger.exception(f"Coalesced stream {self.key[:12]} failed")
+        finally:
+            self.done = True
+            self._notify()
+
+    async def subscribe(self) -> AsyncIterator[Any]:
+        """Every frame of the flight, from the first, as it is produced."""
+        self.subscribers += 1
+        try:
+            index = 0
+            while True:
+                changed = self._changed
+                while index < len(self.frames):
+                    yield self.frames[index]
+                    index += 1
+                if self.done:
+                    return
+                await changed.wait()
+        finally:
+            self.subscribers -= 1
+            if self.subscribers == 0 and not self.done and self.task is not None:
+                # Nobody is reading anymore: stop the generation
+                self.abandoned = True
+                self.task.cancel()
+
+
+class SingleFlight:
+    """Registry of in-flight streams keyed by request identity."""
+
+    def __init__(self):
+        self._flights: Dict[str, Flight] = {}
+        self.leaders = 0
+        self.followers = 0
+        self.abandoned = 0
+
+    def follow(self, key: str) -> Optional[Flight]:
+        """The running flight for `key` to attach to, if any."""
+        flight = self._flights.get(key)
+        if flight is None or flight.abandoned:
+            return None
+        self.followers += 1
+        return flight
+
+    def join(self, key: str, start: Callable[[], AsyncIterator[Any]]) -> Flight:
+        """The running flight for `key`, or a new one streaming `start()`."""
+        flight = self.follow(key)
+        if flight is not None:
+            return flight
+        self.leaders += 1
+        flight = self._flights[key] = Flight(key)
+        flight.task = asyncio.create_task(self._run(flight, start()))
+        return flight
+
+    async def _run(self, flight: Flight, frames: AsyncIterator[Any]):
+        try:
+            await flight.run(frames)
+        finally:
+            if flight.abandoned:
+                self.abandoned += 1
+            if self._flights.get(flight.key) is flight:
+                del self._flights[flight.key]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "in_flight": len(self._flights),
+            "subscribers": sum(flight.subscribers for flight in self._flights.values()),
+            "leaders": self.leaders,
+            "followers": self.followers,
+            "abandoned": self.abandoned,
+        }
+
+
+chat_flights = SingleFlight()
@@ -1,40 +1,589 @@
 import asyncio
 import logging
-from typing import List
+import math
+import time
+import uuid
+from collections import OrderedDict, deque
+from enum import Enum
+from itertools import islice
+from typing import Any, Deque, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+from app.core.settings import settings
 
 logger = logging.getLogger(__name__)
 
+# Log one broadcast in every N at INFO; the rest only at DEBUG
+BROADCAST_LOG_SAMPLE_EVERY = 100
+
+
+# SSE comment frame: ignored by EventSource, keeps proxies from idling us out
+HEARTBEAT_FRAME = b": keep-alive\n\n"
+
+# Every connection is subscribed to the global channel
+GLOBAL_CHANNEL = "global"
+USER_CHANNEL_PREFIX = "user:"
+CONVERSATION_CHANNEL_PREFIX = "conversation:"
+
+
+def user_channel(user_id: str) -> str:
+    return f"{USER_CHANNEL_PREFIX}{user_id}"
+
+
+def conversation_channel(conversation_id: str) -> str:
+    return f"{CONVERSATION_CHANNEL_PREFIX}{conversation_id}"
+
+
+def is_valid_channel(channel: str) -> bool:
+    """Check a channel name is global, user:<id> or conversation:<id>."""
+    if channel == GLOBAL_CHANNEL:
+        return True
+    for prefix in (USER_CHANNEL_PREFIX, CONVERSATION_CHANNEL_PREFIX):
+        if channel.startswith(prefix) and len(channel) > len(prefix):
+            return True
+    return False
+
+
+def encode_sse_frame(event: str, data: str, event_id: Optional[int] = None) -> bytes:
+    """Serialize and UTF-8 encode an SSE frame once.
+
+    The resulting immutable bytes object is shared by reference across every
+    subscriber queue and handed to the ASGI server as-is, so fan-out does no
+    per-subscriber formatting or encoding.
+    """
+    frame = f"event: {event}\ndata: {data}\n\n".encode("utf-8")
+    if event_id is None:
+        return frame
+    return stamp_event_id(event_id, frame)
+
+
+def stamp_event_id(event_id: int, frame: bytes) -> bytes:
+    """Prefix an encoded frame with its `id:` field."""
+    return b"id: %d\n" % event_id + frame
+
+
+def parse_last_event_id(value: Optional[str]) -> Optional[int]:
+    """Parse a Last-Event-ID header value, ignoring anything we didn't issue."""
+    if not value:
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        return None
+
+
+class ReplayBuffer:
+    """Ring buffer of recent (event_id, frame) pairs for one channel.
+
+    Bounded both by event count and by total frame bytes; the oldest frames
+    are evicted first.
+    """
+
+    def __init__(self, max_events: int, max_bytes: int):
+        self.max_events = max_events
+        self.max_bytes = max_bytes
+        self.size_bytes = 0
+        self._frames: Deque[Tuple[int, bytes]] = deque()
+
+    def __len__(self) -> int:
+        return len(self._frames)
+
+    def append(self, event_id: int, frame: bytes):
+        self._frames.append((event_id, frame))
+        self.size_bytes += len(frame)
+        while self._frames and (
+            len(self._frames) > self.max_events or self.size_bytes > self.max_bytes
+        ):
+            _, evicted = self._frames.popleft()
+            self.size_bytes -= len(evicted)
+
+    def since(self, last_event_id: int) -> List[Tuple[int, bytes]]:
+        """Frames with an id greater than `last_event_id`, oldest first."""
+        newer: List[Tuple[int, bytes]] = []
+        for entry in reversed(self._frames):
+            if entry[0] <= last_event_id:
+                break
+            newer.append(entry)
+        newer.reverse()
+        return newer
+
+
+class OverflowPolicy(str, Enum):
+    """What to do when a subscriber queue is full."""
+    DROP_OLDEST = "drop_oldest"  # Evict the oldest queued frame
+    DROP_NEWEST = "drop_newest"  # Discard the frame being broadcast
+    DISCONNECT = "disconnect"  # Evict the slow subscriber
+
+
+class SSEConnection:
+    """A single SSE subscriber with a bounded frame buffer.
+
+    Frames are kept in a deque with a single waiter future instead of an
+    asyncio.Queue: a broadcast is one append plus, only if the reader is
+    parked, one future wakeup.
+
+    `lag` is the number of frames waiting to be written to the client,
+    `dropped` counts frames lost to the overflow policy, `bytes_sent` and
+    `frames_sent` count what has been handed to the response.
+    """
+
+    def __init__(
+        self,
+        maxsize: int,
+        overflow_policy: OverflowPolicy,
+        channels: Iterable[str] = (),
+        client_id: Optional[str] = None,
+    ):
+        self.connection_id = uuid.uuid4().hex
+        self.client_id = client_id
+        self.connected_at = time.time()
+        self.channels: Set[str] = {GLOBAL_CHANNEL, *channels}
+        self.maxsize = maxsize
+        self.overflow_policy = overflow_policy
+        self.enqueued = 0
+        self.dropped = 0
+        self.bytes_sent = 0
+        self.frames_sent = 0
+        self.closed = False
+        self._frames: Deque[bytes] = deque()
+        self._waiter: Optional[asyncio.Future] = None
+        # Heartbeat wheel bookkeeping: slot index, and `enqueued` at last visit
+        self._heartbeat_slot: Optional[int] = None
+        self._heartbeat_mark = 0
+
+    @property
+    def lag(self) -> int:
+        return len(self._frames)
+
+    async def get(self) -> Optional[bytes]:
+        """Wait for the next frame. Returns None when the connection is closed."""
+        while not self._frames:
+            if self.closed:
+                return None
+            self._waiter = asyncio.get_running_loop().create_future()
+            try:
+                await self._waiter
+            finally:
+                self._waiter = None
+        frame = self._frames.popleft()
+        self.frames_sent += 1
+        self.bytes_sent += len(frame)
+        return frame
+
+    def _wake(self):
+        waiter = self._waiter
+        if waiter is not None and not waiter.done():
+            waiter.set_result(None)
+
+    def offer(self, payload: bytes) -> bool:
+        """Enqueue a frame without blocking, applying the overflow policy.
+
+        Returns False if the subscriber should be evicted.
+        """
+        if self.closed:
+            return False
+        frames = self._frames
+        if self.maxsize and len(frames) >= self.maxsize:
+            self.dropped += 1
+            if self.overflow_policy == OverflowPolicy.DROP_NEWEST:
+                return True
+            if self.overflow_policy == OverflowPolicy.DISCONNECT:
+                return False
+            frames.popleft()
+        frames.append(payload)
+        self.enqueued += 1
+        self._wake()
+        return True
+
+    def preload(self, frames: List[bytes]):
+        """Queue replayed frames ahead of live traffic, keeping the newest."""
+        if self.maxsize and len(frames) > self.maxsize:
+            self.dropped += len(frames) - self.maxsize
+            frames = frames[-self.maxsize:]
+        self._frames.extend(frames)
+        self.enqueued += len(frames)
+        self._wake()
+
+    def close(self):
+        """Mark closed and wake the reader so get() returns None.
+
+        Pending frames are discarded.
+        """
+        self.closed = True
+        self._frames.clear()
+        self._wake()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "connection_id": self.connection_id,
+            "client_id": self.client_id,
+            "connected_at": self.connected_at,
+            "channels": sorted(self.channels),
+            "lag": self.lag,
+            "enqueued": self.enqueued,
+            "dropped": self.dropped,
+            "frames_sent": self.frames_sent,
+            "bytes_sent": self.bytes_sent,
+            "closed": self.closed,
+        }
+
+
+class HeartbeatWheel:
+    """Keep-alive scheduler for all connections, driven by one timer.
+
+    Connections are spread over `interval / tick` slots. Every tick the wheel
+    visits one slot, so each connection is visited once per interval, and
+    only connections that received no frame since the previous visit get a
+    heartbeat. Total wakeups are one per tick plus one per idle connection
+    per interval, with no per-connection timers.
+    """
+
+    def __init__(self, interval: float, tick: float):
+        self.interval = interval
+        self.tick = tick
+        self._slots: List[Set[SSEConnection]] = [
+            set() for _ in range(max(1, math.ceil(interval / tick)))
+        ]
+        self._cursor = 0
+        self.sent = 0
+        self._task: Optional[asyncio.Task] = None
+
+    def add(self, connection: SSEConnection):
+        # The current slot was just visited: first heartbeat after a full turn
+        connection._heartbeat_slot = self._cursor
+        connection._heartbeat_mark = connection.enqueued
+        self._slots[self._cursor].add(connection)
+
+    def remove(self, connection: SSEConnection):
+        if connection._heartbeat_slot is not None:
+            self._slots[connection._heartbeat_slot].discard(connection)
+            connection._heartbeat_slot = None
+
+    def start(self):
+        if self._task is None and self.interval > 0:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.tick)
+            self._cursor = (self._cursor + 1) % len(self._slots)
+            self.visit(self._slots[self._cursor])
+
+    def visit(self, slot: Set[SSEConnection]):
+        for connection in slot:
+            # Traffic since the last visit already kept the connection alive;
+            # a backlog means the client isn't reading anyway
+            if connection.enqueued == connection._heartbeat_mark and not connection.lag:
+                if connection.offer(HEARTBEAT_FRAME):
+                    self.sent += 1
+            connection._heartbeat_mark = connection.enqueued
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "heartbeat_interval": self.interval,
+            "heartbeat_slots": len(self._slots),
+            "heartbeats_sent": self.sent,
+        }
+
+
+class SSEBackend:
+    """Fan-out transport behind SSEManager.broadcast.
+
+    A backend carries id-less encoded frames to every SSEManager that should
+    see them (possibly in other processes), assigns event ids, and hands the
+    result to each manager's `deliver()`.
+    """
+
+    manager: Optional["SSEManager"] = None
+
+    async def start(self, manager: "SSEManager"):
+        self.manager = manager
+
+    async def stop(self):
+        pass
+
+    async def publish(self, channel: str, frame: bytes):
+        raise NotImplementedError
+
+    async def publish_many(self, channel: str, frames: Sequence[bytes]):
+        """Publish several frames to `channel`, each taking its own event id."""
+        for frame in frames:
+            await self.publish(channel, frame)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"backend": type(self).__name__}
+
+
+class LocalBackend(SSEBackend):
+    """In-process fan-out: a single worker owns all of its subscribers."""
+
+    async def publish(self, channel: str, frame: bytes):
+        self.manager.deliver(channel, self.manager.next_event_id(), frame)
+
+    async def publish_many(self, channel: str, frames: Sequence[bytes]):
+        self.manager.deliver_many(channel, [(self.manager.next_event_id(), frame) for frame in frames])
+
+
+def create_backend(name: str = settings.SSE_BACKEND) -> SSEBackend:
+    """Build the fan-out backend selected by SSE_BACKEND."""
+    if name == "local":
+        return LocalBackend()
+    if name == "unix":
+        from app.services.sse_broker import UnixSocketBackend
+
+        return UnixSocketBackend(settings.SSE_BROKER_PATH)
+    raise ValueError(f"Unknown SSE backend: {name}")
+
 
 class SSEManager:
-    def __init__(self):
-        self.active_connections: List[asyncio.Queue] = []
+    def __init__(
+        self,
+        backend: Optional[SSEBackend] = None,
+        queue_maxsize: int = settings.SSE_QUEUE_MAXSIZE,
+        overflow_policy: OverflowPolicy = OverflowPolicy(settings.SSE_OVERFLOW_POLICY),
+        replay_max_events: int = settings.SSE_REPLAY_MAX_EVENTS,
+        replay_max_bytes: int = settings.SSE_REPLAY_MAX_BYTES,
+        replay_max_total_bytes: int = settings.SSE_REPLAY_MAX_TOTAL_BYTES,
+        heartbeat_interval: float = settings.SSE_HEARTBEAT_INTERVAL,
+        heartbeat_tick: float = settings.SSE_HEARTBEAT_TICK,
+    ):
+        self.backend = backend or LocalBackend()
+        # connection_id -> connection: O(1) register and remove
+        self.active_connections: Dict[str, SSEConnection] = {}
+        # channel -> subscribers, so a publish only touches its audience
+        self._subscribers: Dict[str, Set[SSEConnection]] = {}
+        self.queue_maxsize = queue_maxsize
+        self.overflow_policy = overflow_policy
+        self.evicted = 0
+        self.broadcasts = 0
+        self.replayed = 0
+        # channel -> recent frames for Last-Event-ID resume. Ordered by last
+        # publish so the total byte cap evicts the least active channels.
+        self._replay: "OrderedDict[str, ReplayBuffer]" = OrderedDict()
+        self._replay_bytes = 0
+        self.replay_max_events = replay_max_events
+        self.replay_max_bytes = replay_max_bytes
+        self.replay_max_total_bytes = replay_max_total_bytes
+        # Seeded from the wall clock so ids keep increasing across restarts
+        # and a client's Last-Event-ID never points into the future.
+        self._last_event_id = time.time_ns() // 1000
+        self._heartbeats = HeartbeatWheel(heartbeat_interval, heartbeat_tick)
         self._shutdown_event = asyncio.Event()
+        # Bind now so publishing works before start() (the module singleton
+        # is created outside a running loop); remote backends queue
+        # publishes until connected
+        self.backend.manager = self
+
+    async def start(self):
+        """Start the fan-out backend and heartbeats (called from the app lifespan)."""
+        await self.backend.start(self)
+        self._heartbeats.start()
+
+    async def stop(self):
+        """Stop the fan-out backend and heartbeats (called from the app lifespan)."""
+        await self._heartbeats.stop()
+        await self.backend.stop()
 
-    async def connect(self) -> asyncio.Queue:
-        queue = asyncio.Queue()
-        self.active_connections.append(queue)
+    def next_event_id(self) -> int:
+        """Allocate the next event id (used by whichever process assigns ids)."""
+        self._last_event_id += 1
+        return self._last_event_id
+
+    async def connect(
+        self,
+        channels: Iterable[str] = (),
+        last_event_id: Optional[int] = None,
+        client_id: Optional[str] = None,
+    ) -> SSEConnection:
+        """Register a subscriber on the global channel plus `channels`.
+
+        With `last_event_id`, frames the client missed on those channels are
+        queued first. Replay and registration happen without yielding to the
+        event loop, so nothing is duplicated or lost in between.
+        """
+        connection = SSEConnection(
+            self.queue_maxsize, self.overflow_policy, channels, client_id
+        )
+        if self.is_shutting_down():
+            connection.close()
+            return connection
+        if last_event_id is not None:
+            missed = self._replay_since(connection.channels, last_event_id)
+            if missed:
+                connection.preload(missed)
+                self.replayed += len(missed)
+        self.active_connections[connection.connection_id] = connection
+        for channel in connection.channels:
+            self._subscribers.setdefault(channel, set()).add(connection)
+        self._heartbeats.add(connection)
         logger.info(f"New SSE connection. Total: {len(self.active_connections)}")
-        return queue
+        return connection
 
-    def disconnect(self, queue: asyncio.Queue):
-        if queue in self.active_connections:
-            self.active_connections.remove(queue)
+    def disconnect(self, connection: SSEConnection):
+        self._heartbeats.remove(connection)
+        for channel in connection.channels:
+            subscribers = self._subscribers.get(channel)
+            if subscribers is not None:
+                subscribers.discard(connection)
+                if not subscribers:
+                    del self._subscribers[channel]
+        if self.active_connections.pop(connection.connection_id, None) is not None:
             logger.info(f"SSE connection removed. Total: {len(self.active_connections)}")
 
-    async def broadcast(self, event: str, data: str):
-        """Broadcasts a message to all active connections."""
-        payload = f"event: {event}\ndata: {data}\n\n"
-        logger.info(f"Broadcasting SSE: {payload.strip()}")
+    async def broadcast(self, event: str, data: str, channel: str = GLOBAL_CHANNEL):
+        """Broadcasts a message to the subscribers of `channel`.
+
+        The frame is encoded once and handed to the backend, which stamps
+        the event id and delivers it to every worker's manager.
+        """
+        await self.backend.publish(channel, encode_sse_frame(event, data))
+
+    async def broadcast_many(self, channel: str, events: Sequence[Tuple[str, str]]):
+        """Broadcast several (event, data) pairs to `channel` in one pass.
+
+        Every event keeps its own id and replay entry, so Last-Event-ID
+        resumes mid-batch. With the local backend the batch is still written
+        to each subscriber as one queue slot.
+        """
+        if not events:
+            return
+        await self.backend.publish_many(channel, [encode_sse_frame(event, data) for event, data in events])
+
+    def deliver(self, channel: str, event_id: int, frame: bytes):
+        """Deliver an id-less frame from the backend to local subscribers.
+
+        The global channel reaches every connection. Cost is proportional to
+        the channel's subscribers, not to all connections. Never blocks on a
+        slow subscriber: full queues are handled by the overflow policy, and
+        subscribers that must be evicted are closed.
+        """
+        self.deliver_many(channel, [(event_id, frame)])
 
-        # We iterate over a copy to safely remove dead connections if needed
-        # though disconnect() usually handles explicit disconnects.
-        for queue in self.active_connections:
-            await queue.put(payload)
+    def deliver_many(self, channel: str, events: Sequence[Tuple[int, bytes]]):
+        """Deliver (event id, id-less frame) pairs as one write per subscriber."""
+        payloads = []
+        for event_id, frame in events:
+            # Keep the id counter ahead of ids assigned elsewhere, so a
+            # worker promoted to assign ids never reuses one
+            if event_id > self._last_event_id:
+                self._last_event_id = event_id
+            payload = stamp_event_id(event_id, frame)
+            # Buffer even without subscribers: the audience may be mid-reconnect
+            self._record_replay(channel, event_id, payload)
+            payloads.append(payload)
+
+        subscribers = self._subscribers.get(channel)
+        if not subscribers or not payloads:
+            return
+        payload = payloads[0] if len(payloads) == 1 else b"".join(payloads)
+        event_id = events[-1][0]
+
+        self.broadcasts += 1
+        if self.broadcasts % BROADCAST_LOG_SAMPLE_EVERY == 1:
+            logger.info(
+                f"Broadcasting SSE id={event_id} channel={channel} bytes={len(payload)} "
+                f"subscribers={len(subscribers)} (sampled 1/{BROADCAST_LOG_SAMPLE_EVERY})"
+            )
+        elif logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"Broadcasting SSE id={event_id} channel={channel} bytes={len(payload)}")
+
+        evicted = [
+            connection for connection in subscribers
+            if not connection.offer(payload)
+        ]
+        for connection in evicted:
+            logger.warning(
+                f"Evicting slow SSE subscriber (lag={connection.lag}, dropped={connection.dropped})"
+            )
+            connection.close()
+            self.disconnect(connection)
+        self.evicted += len(evicted)
+
+    def _record_replay(self, channel: str, event_id: int, payload: bytes):
+        buffer = self._replay.get(channel)
+        if buffer is None:
+            buffer = ReplayBuffer(self.replay_max_events, self.replay_max_bytes)
+            self._replay[channel] = buffer
+        else:
+            self._replay.move_to_end(channel)
+
+        size_before = buffer.size_bytes
+        buffer.append(event_id, payload)
+        self._replay_bytes += buffer.size_bytes - size_before
+
+        # Drop whole buffers of the least recently published channels
+        while self._replay_bytes > self.replay_max_total_bytes and len(self._replay) > 1:
+            _, evicted = self._replay.popitem(last=False)
+            self._replay_bytes -= evicted.size_bytes
+
+    def _replay_since(self, channels: Iterable[str], last_event_id: int) -> List[bytes]:
+        """Missed frames across `channels`, merged back into id order."""
+        missed: List[Tuple[int, bytes]] = []
+        for channel in channels:
+            buffer = self._replay.get(channel)
+            if buffer is not None:
+                missed.extend(buffer.since(last_event_id))
+        missed.sort(key=lambda entry: entry[0])
+        return [frame for _, frame in missed]
+
+    def get_connection(self, connection_id: str) -> Optional[SSEConnection]:
+        return self.active_connections.get(connection_id)
+
+    def list_connections(
+        self,
+        channel: Optional[str] = None,
+        limit: int = 100,
+        offset: int = 0,
+    ) -> List[Dict[str, Any]]:
+        """Per-connection metadata for operators, optionally for one channel."""
+        if channel is None:
+            connections: Iterable[SSEConnection] = self.active_connections.values()
+        else:
+            connections = self._subscribers.get(channel, ())
+        return [
+            connection.stats()
+            for connection in islice(connections, offset, offset + limit)
+        ]
+
+    def stats(self) -> Dict[str, Any]:
+        """Aggregate queue and traffic counters across connections."""
+        connections = self.active_connections.values()
+        return {
+            "connections": len(self.active_connections),
+            "queue_maxsize": self.queue_maxsize,
+            "overflow_policy": self.overflow_policy.value,
+            "evicted": self.evicted,
+            "broadcasts": self.broadcasts,
+            "channels": len(self._subscribers),
+            "last_event_id": self._last_event_id,
+            "replayed": self.replayed,
+            "replay_channels": len(self._replay),
+            "replay_bytes": self._replay_bytes,
+            **self.backend.stats(),
+            **self._heartbeats.stats(),
+            "total_lag": sum(c.lag for c in connections),
+            "max_lag": max((c.lag for c in connections), default=0),
+            "total_dropped": sum(c.dropped for c in connections),
+            "total_bytes_sent": sum(c.bytes_sent for c in connections),
+        }
 
     def is_shutting_down(self) -> bool:
         """Check if shutdown has been initiated."""
         return self._shutdown_event.is_set()
 
+    def close_all(self):
+        """Close every connection so readers wake up (signal-handler safe)."""
+        for connection in self.active_connections.values():
+            connection.close()
+
     async def shutdown(self):
         """Signal all connections to close and wait for cleanup."""
         logger.info(
@@ -42,16 +591,16 @@ class SSEManager:
         )
         self._shutdown_event.set()
 
-        # Push a shutdown signal (None) to all queues to unblock waiting gets
-        for queue in self.active_connections:
-            await queue.put(None)
+        # Close every connection to unblock waiting gets
+        self.close_all()
 
         # Wait briefly for connections to cleanup
         await asyncio.sleep(0.5)
 
         # Force clear remaining connections
         self.active_connections.clear()
+        self._subscribers.clear()
         logger.info("SSE manager shutdown complete.")
 
 
-sse_manager = SSEManager()
+sse_manager = SSEManager(create_backend())
@@ -0,0 +1,273 @@
+"""Unix-domain-socket broker for cross-worker SSE fan-out.
+
+With `uvicorn --workers N` every worker has its own SSEManager, so a callback
+handled by one worker must reach subscribers connected to the others. One
+worker per host is elected broker by taking an exclusive lock next to the
+socket path; the rest connect to it as peers.
+
+    worker --PUBLISH(channel, frame)--> broker
+    broker assigns the event id
+    broker --DELIVER(channel, id, frame)--> every peer (once per worker)
+    each worker stamps the id and fans out to its own subscribers
+
+If the broker dies its lock is released by the OS, and the peers race to
+take over. No external services are involved.
+
+The broker is the only source of event ids, so Last-Event-ID resume works
+across workers. While no broker is reachable (startup, failover), publishes
+are queued, bounded by `max_pending`, and sent once one is.
+"""
+
+import asyncio
+import fcntl
+import logging
+import os
+import struct
+from collections import deque
+from typing import Any, Deque, Dict, Optional, Set, Tuple
+
+from app.services.sse import SSEBackend, SSEManager
+
+logger = logging.getLogger(__name__)
+
+# PUBLISH: frame length, channel length | channel | frame
+PUBLISH_HEADER = struct.Struct("!IH")
+# DELIVER: frame length, channel length, event id | channel | frame
+DELIVER_HEADER = struct.Struct("!IHQ")
+
+
+def pack_publish(channel: str, frame: bytes) -> bytes:
+    channel_bytes = channel.encode("utf-8")
+    return PUBLISH_HEADER.pack(len(frame), len(channel_bytes)) + channel_bytes + frame
+
+
+def pack_deliver(channel: str, event_id: int, frame: bytes) -> bytes:
+    channel_bytes = channel.encode("utf-8")
+    return DELIVER_HEADER.pack(len(frame), len(channel_bytes), event_id) + channel_bytes + frame
+
+
+class UnixSocketBackend(SSEBackend):
+    """SSE backend that fans frames out across workers through a local broker."""
+
+    def __init__(
+        self,
+        path: str,
+        reconnect_delay: float = 0.5,
+        max_peer_buffer: int = 8 * 1024 * 1024,
+        drain_timeout: float = 5.0,
+        max_pending: int = 10_000,
+    ):
+        self.path = path
+        self.lock_path = f"{path}.lock"
+        self.reconnect_delay = reconnect_delay
+        # Peers that stop reading are dropped rather than buffered forever
+        self.max_peer_buffer = max_peer_buffer
+        self.drain_timeout = drain_timeout
+        self.manager: Optional[SSEManager] = None
+        self.is_broker = False
+        self.published = 0
+        # (channel, frame) published while no broker was reachable
+        self._pending: Deque[Tuple[str, bytes]] = deque(maxlen=max_pending)
+        self.queued_publishes = 0
+        self.dropped_publishes = 0
+        self._peers: Set[asyncio.StreamWriter] = set()
+        self._peer_tasks: Set[asyncio.Task] = set()
+        self._broker_writer: Optional[asyncio.StreamWriter] = None
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._lock_fd: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self, manager: SSEManager):
+        self.manager = manager
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        # Closing a peer's transport ends its handler with an EOF
+        for writer in list(self._peers):
+            writer.close()
+        self._peers.clear()
+        if self._peer_tasks:
+            await asyncio.gather(*self._peer_tasks, return_exceptions=True)
+        if self._broker_writer is not None:
+            self._broker_writer.close()
+            self._broker_writer = None
+        if self._server is not None:
+            self._server.close()
+            self._server = None
+            try:
+                os.unlink(self.path)
+            except FileNotFoundError:
+                pass
+        if self._lock_fd is not None:
+            os.close(self._lock_fd)
+            self._lock_fd = None
+        self.is_broker = False
+
+    async def publish(self, channel: str, frame: bytes):
+        self.published += 1
+        if self.is_broker:
+            await self._fan_out(channel, frame)
+        elif self._broker_writer is not None:
+            if not await self._send_to_broker(self._broker_writer, channel, frame):
+                self._pending.append((channel, frame))
+        else:
+            # Broker unreachable (startup or failover): stamping a local id
+            # could collide with the broker's, so wait for one instead
+            if len(self._pending) == self._pending.maxlen:
+                self.dropped_publishes += 1
+                logger.warning("SSE broker unavailable and publish queue full, dropping oldest event")
+            self._pending.append((channel, frame))
+            self.queued_publishes += 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "backend": type(self).__name__,
+            "broker_path": self.path,
+            "is_broker": self.is_broker,
+            "broker_connected": self.is_broker or self._broker_writer is not None,
+            "broker_peers": len(self._peers),
+            "published": self.published,
+            "pending_publishes": len(self._pending),
+            "queued_publishes": self.queued_publishes,
+            "dropped_publishes": self.dropped_publishes,
+        }
+
+    # ----- Election / connection loop -----
+
+    async def _run(self):
+        while True:
+            if await self._try_become_broker():
+                logger.info(f"SSE broker elected in pid {os.getpid()} at {self.path}")
+                while self._pending:
+                    await self._fan_out(*self._pending.popleft())
+                await self._server.serve_forever()
+                return
+            try:
+                reader, writer = await asyncio.open_unix_connection(self.path)
+            except OSError:
+                await asyncio.sleep(self.reconnect_delay)
+                continue
+
+            logger.info(f"SSE worker {os.getpid()} connected to broker at {self.path}")
+            try:
+                if await self._send_pending(writer):
+                    self._broker_writer = writer
+                    await self._read_deliveries(reader)
+            except (asyncio.IncompleteReadError, OSError):
+                pass
+            finally:
+                self._broker_writer = None
+                writer.close()
+            logger.warning("Lost connection to SSE broker, re-electing")
+
+    async def _try_become_broker(self) -> bool:
+        fd = os.open(self.lock_path, os.O_CREAT | os.O_RDWR, 0o600)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            os.close(fd)
+            return False
+
+        # We hold the lock, so any socket file left behind is stale
+        try:
+            os.unlink(self.path)
+        except FileNotFoundError:
+            pass
+        try:
+            self._server = await asyncio.start_unix_server(self._handle_peer, path=self.path)
+        except OSError:
+            logger.exception(f"Could not serve SSE broker socket at {self.path}")
+            os.close(fd)
+            await asyncio.sleep(self.reconnect_delay)
+            return False
+        self._lock_fd = fd
+        self.is_broker = True
+        return True
+
+    async def _send_pending(self, writer: asyncio.StreamWriter) -> bool:
+        """Hand publishes queued while disconnected to the broker, in order."""
+        while self._pending:
+            if not await self._send_to_broker(writer, *self._pending[0]):
+                return False
+            self._pending.popleft()
+        return True
+
+    async def _send_to_broker(self, writer: asyncio.StreamWriter, channel: str, frame: bytes) -> bool:
+        """Write a publish to the broker; False if it could not be sent."""
+        try:
+            writer.write(pack_publish(channel, frame))
+            await asyncio.wait_for(writer.drain(), self.drain_timeout)
+            return True
+        except asyncio.TimeoutError:
+            # A stuck broker: reconnecting re-runs the election. The frame
+            # is already buffered, so it is not queued again
+            logger.warning("SSE broker stopped reading, reconnecting")
+            sent = True
+        except ConnectionError:
+            sent = False
+        if self._broker_writer is writer:
+            self._broker_writer = None
+        writer.close()
+        return sent
+
+    async def _read_deliveries(self, reader: asyncio.StreamReader):
+        while True:
+            header = await reader.readexactly(DELIVER_HEADER.size)
+            frame_length, channel_length, event_id = DELIVER_HEADER.unpack(header)
+            body = await reader.readexactly(channel_length + frame_length)
+            channel = body[:channel_length].decode("utf-8")
+            self.manager.deliver(channel, event_id, body[channel_length:])
+
+    # ----- Broker side -----
+
+    async def _handle_peer(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        task = asyncio.current_task()
+        self._peer_tasks.add(task)
+        self._peers.add(writer)
+        try:
+            while True:
+                header = await reader.readexactly(PUBLISH_HEADER.size)
+                frame_length, channel_length = PUBLISH_HEADER.unpack(header)
+                body = await reader.readexactly(channel_length + frame_length)
+                channel = body[:channel_length].decode("utf-8")
+                await self._fan_out(channel, body[channel_length:])
+        except (asyncio.IncompleteReadError, OSError):
+            pass
+        finally:
+            self._peer_tasks.discard(task)
+            self._peers.discard(writer)
+            writer.close()
+
+    async def _fan_out(self, channel: str, frame: bytes):
+        """Assign the event id and send the frame once to every worker."""
+        event_id = self.manager.next_event_id()
+        message = pack_deliver(channel, event_id, frame)
+        writers = []
+        for writer in list(self._peers):
+            if writer.transport.get_write_buffer_size() > self.max_peer_buffer:
+                self._drop_peer(writer)
+                continue
+            writer.write(message)
+            writers.append(writer)
+        self.manager.deliver(channel, event_id, frame)
+        if writers:
+            await asyncio.gather(*(self._drain_peer(writer) for writer in writers))
+
+    async def _drain_peer(self, writer: asyncio.StreamWriter):
+        try:
+            await asyncio.wait_for(writer.drain(), self.drain_timeout)
+        except (asyncio.TimeoutError, ConnectionError):
+            self._drop_peer(writer)
+
+    def _drop_peer(self, writer: asyncio.StreamWriter):
+        if writer in self._peers:
+            logger.warning("Dropping SSE broker peer that stopped reading")
+            self._peers.discard(writer)
+            writer.close()
@@ -0,0 +1,74 @@
+"""Serializers for Vercel AI UI message stream frames.
+
+The fixed-shape frames streamed on every chat turn (start, text-start,
+text-delta, text-end, finish, [DONE]) are built from pre-rendered
+templates: only the variable string is escaped, with the same C escaper
+json.dumps uses, so the output is byte-for-byte what format_sse produced
+for the equivalent dict.
+
+Everything else (tool inputs and outputs, components, errors) goes
+through format_sse, which uses orjson when it is installed (it escapes
+non-ASCII as raw UTF-8 rather than \\u sequences; both are valid JSON).
+"""
+
+import json
+from functools import lru_cache
+from json.encoder import encode_basestring_ascii
+from typing import Any
+
+try:
+    import orjson
+except ImportError:  # optional speedup: pip install orjson
+    orjson = None
+
+DONE_FRAME = "data: [DONE]\n\n"
+FINISH_FRAME = 'data: {"type":"finish"}\n\n'
+
+
+if orjson is not None:
+    def _dumps(payload: Any) -> str:
+        try:
+            return orjson.dumps(payload).decode()
+        except TypeError:
+            # Types orjson rejects (e.g. non-str keys): keep json's behaviour
+            return json.dumps(payload, separators=(",", ":"))
+else:
+    def _dumps(payload: Any) -> str:
+        return json.dumps(payload, separators=(",", ":"))
+
+
+def format_sse(payload: dict) -> str:
+    """Format a payload as a Server-Sent Event."""
+    return f"data: {_dumps(payload)}\n\n"
+
+
+@lru_cache(maxsize=64)
+def _text_delta_head(stream_id: str) -> str:
+    return f'data: {{"type":"text-delta","id":{encode_basestring_ascii(stream_id)},"delta":'
+
+
+def text_delta_frame(stream_id: str, delta: str) -> str:
+    """Frame for {"type": "text-delta", "id": stream_id, "delta": delta}."""
+    return f"{_text_delta_head(stream_id)}{encode_basestring_ascii(delta)}}}\n\n"
+
+
+@lru_cache(maxsize=64)
+def text_start_frame(stream_id: str) -> str:
+    return f'data: {{"type":"text-start","id":{encode_basestring_ascii(stream_id)}}}\n\n'
+
+
+@lru_cache(maxsize=64)
+def text_end_frame(stream_id: str) -> str:
+    return f'data: {{"type":"text-end","id":{encode_basestring_ascii(stream_id)}}}\n\n'
+
+
+def start_frame(message_id: str) -> str:
+    return f'data: {{"type":"start","messageId":{encode_basestring_ascii(message_id)}}}\n\n'
+
+
+@lru_cache(maxsize=16)
+def finish_frame(finish_reason: str) -> str:
+    return (
+        f'data: {{"type":"finish","messageMetadata":'
+        f'{{"finishReason":{encode_basestring_ascii(finish_reason)}}}}}\n\n'
+    )
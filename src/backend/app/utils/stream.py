@@ -1,231 +1,700 @@
 """Streaming utilities for LangGraph and SSE responses."""
 
+import asyncio
 import json
+import re
+import time
 import uuid
 import logging
-from typing import Any, Dict, Sequence
+from contextlib import asynccontextmanager
+from functools import partial
+from typing import Any, AsyncIterator, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
 
+import anyio
 from fastapi.responses import StreamingResponse
+from starlette.requests import ClientDisconnect
+from starlette.types import Receive, Scope, Send
 from langgraph.graph.state import CompiledStateGraph
+from langchain_core.messages import AIMessageChunk, ToolMessage
 from openai.types.chat.chat_completion_message_param import ChatCompletionMessageParam
 
+from app.agents.dispatch import dispatch_chat
+from app.services.admission import AdmissionRejected, Priority, current_priority
+from app.services.response_cache import CachedResponse, ResponseCache
+from app.utils.frames import (
+    DONE_FRAME,
+    FINISH_FRAME,
+    finish_frame,
+    format_sse,
+    start_frame,
+    text_delta_frame,
+    text_end_frame,
+    text_start_frame,
+)
+
 logger = logging.getLogger(__name__)
 
 
-def format_sse(payload: dict) -> str:
-    """Format a payload as a Server-Sent Event."""
-    return f"data: {json.dumps(payload, separators=(',', ':'))}\n\n"
+def format_demo_response(
+    demo_response: Dict[str, Any],
+    text_stream_id: str,
+    text_started: bool,
+    tool_call_id: Optional[str] = None,
+) -> Iterator[str]:
+    """Yield the SSE frames for a demo sub-agent response.
+    
+    Emits the optional intro text (closing the text stream), then the PAH
+    component as a tool call so message.tsx renders it like other tools.
+    """
+    logger.info(f"Emitting PAH component: {demo_response.get('type')}")
+    
+    # Emit intro text if present
+    intro_text = demo_response.get("introText")
+    if intro_text:
+        if not text_started:
+            yield text_start_frame(text_stream_id)
+        yield text_delta_frame(text_stream_id, intro_text)
+        yield text_end_frame(text_stream_id)
+    
+    # Emit PAH component as a "tool" output
+    # This follows the same pattern as regular tools (Weather, etc.)
+    # so message.tsx can render it using the existing tool-* handling
+    component_type = demo_response.get("type", "pah-unknown")
+    tool_call_id = tool_call_id or f"pah-{uuid.uuid4().hex[:8]}"
+    tool_name = component_type  # e.g., "pah-log-draft-card"
+    component_data = demo_response.get("data", {})
+    
+    # Emit tool-input-start
+    yield format_sse({
+        "type": "tool-input-start",
+        "toolCallId": tool_call_id,
+        "toolName": tool_name,
+    })
+    
+    # Emit tool-input-available (no input needed for demo)
+    yield format_sse({
+        "type": "tool-input-available",
+        "toolCallId": tool_call_id,
+        "toolName": tool_name,
+        "input": {},
+    })
+    
+    # Emit tool-output-available with PAH component data
+    yield format_sse({
+        "type": "tool-output-available",
+        "toolCallId": tool_call_id,
+        "output": component_data,
+    })
+
+
+def format_finish(finish_reason: Any = None) -> Iterator[str]:
+    """Yield the closing finish frame and the [DONE] sentinel."""
+    if isinstance(finish_reason, str) and finish_reason:
+        yield finish_frame(finish_reason)
+    elif finish_reason:
+        yield format_sse({"type": "finish", "messageMetadata": {"finishReason": finish_reason}})
+    else:
+        yield FINISH_FRAME
+    yield DONE_FRAME
+
+
+# Stand-ins for per-request ids inside cached frames; JSON-safe so they
+# survive json.dumps unchanged
+MESSAGE_ID_SLOT = "msg-@@message_id@@"
+TOOL_CALL_ID_SLOT = "pah-@@tool_call_id@@"
+_SLOT_PATTERN = re.compile(f"({re.escape(MESSAGE_ID_SLOT)}|{re.escape(TOOL_CALL_ID_SLOT)})")
+
+
+class DemoFrameCache:
+    """Pre-serialized SSE responses for the static demo components.
+    
+    Each registered mock response is rendered once into the complete frame
+    sequence (start through [DONE]) and split around the message and tool
+    call ids, so serving a /demo request only joins bytes. Entries are
+    keyed by the identity of the (constant) MOCK_RESPONSES dicts; anything
+    else, such as the help text for unknown components, is rendered fresh.
+    """
+
+    def __init__(self):
+        # id(response) -> (response, [literal bytes, slot name, literal bytes, ...])
+        self._templates: Dict[int, Tuple[Dict[str, Any], List[Any]]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def warm(self, responses: Iterable[Dict[str, Any]]):
+        for response in responses:
+            self._templates[id(response)] = (response, self._compile(response))
+        logger.info(f"Cached SSE frames for {len(self._templates)} demo components")
+
+    @staticmethod
+    def _compile(demo_response: Dict[str, Any]) -> List[Any]:
+        frames = [start_frame(MESSAGE_ID_SLOT)]
+        frames.extend(format_demo_response(demo_response, "text-1", False, TOOL_CALL_ID_SLOT))
+        # Same finish the graph path reports when the orchestrator ends
+        frames.extend(format_finish("stop"))
+        # re.split keeps the slots (capture group) at the odd positions
+        parts = _SLOT_PATTERN.split("".join(frames))
+        return [part if i % 2 else part.encode("utf-8") for i, part in enumerate(parts)]
+
+    def render(self, demo_response: Dict[str, Any], message_id: str) -> bytes:
+        """The full SSE body for `demo_response` with fresh ids patched in."""
+        entry = self._templates.get(id(demo_response))
+        if entry is not None and entry[0] is demo_response:
+            self.hits += 1
+            parts = entry[1]
+        else:
+            self.misses += 1
+            parts = self._compile(demo_response)
+        ids = {
+            MESSAGE_ID_SLOT: message_id.encode(),
+            TOOL_CALL_ID_SLOT: f"pah-{uuid.uuid4().hex[:8]}".encode(),
+        }
+        return b"".join(ids[part] if i % 2 else part for i, part in enumerate(parts))
+
+
+demo_frame_cache = DemoFrameCache()
+
+
+async def stream_demo_response(demo_response: Dict[str, Any], message_id: Optional[str] = None):
+    """Stream a fast-path demo_response as its single pre-serialized chunk."""
+    yield demo_frame_cache.render(demo_response, message_id or f"msg-{uuid.uuid4().hex}")
+
+
+def format_cached_response(cached: CachedResponse, message_id: str) -> Iterator[str]:
+    """Yield the frames of a cached chat turn, delta by delta as first streamed."""
+    yield start_frame(message_id)
+    text_stream_id = "text-1"
+    yield text_start_frame(text_stream_id)
+    for delta in cached.deltas:
+        yield text_delta_frame(text_stream_id, delta)
+    yield text_end_frame(text_stream_id)
+    yield from format_finish(cached.finish_reason)
+
+
+async def stream_cached_response(cached: CachedResponse):
+    """Serve a response cache hit as one chunk, without touching the graph."""
+    yield "".join(format_cached_response(cached, f"msg-{uuid.uuid4().hex}"))
+
+
+def parse_tool_output(tool_output: Any) -> Any:
+    """Tool result as sent in tool-output-available (JSON decoded if possible)."""
+    if hasattr(tool_output, "content"):
+        content = tool_output.content
+        # Try to parse JSON string to dict
+        if isinstance(content, str):
+            try:
+                return json.loads(content)
+            except json.JSONDecodeError:
+                return content
+        return content
+    if isinstance(tool_output, dict):
+        return tool_output
+    if isinstance(tool_output, str):
+        try:
+            return json.loads(tool_output)
+        except json.JSONDecodeError:
+            return tool_output
+    return str(tool_output) if tool_output else ""
+
+
+class DeltaWindow:
+    """Coalescing window for text deltas: flush after `seconds` or `max_bytes`."""
+
+    __slots__ = ("seconds", "max_bytes")
+
+    def __init__(self, seconds: float, max_bytes: int = 0):
+        self.seconds = seconds
+        self.max_bytes = max_bytes
+
+
+def parse_delta_window(value: str) -> Optional[DeltaWindow]:
+    """Parse "<ms>" or "<ms>,<bytes>" (e.g. "20,256"); "0" or "" disables.
+
+    Raises:
+        ValueError: If the value is malformed
+    """
+    value = value.strip()
+    if not value:
+        return None
+    milliseconds, _, max_bytes = value.partition(",")
+    window = DeltaWindow(float(milliseconds) / 1000, int(max_bytes) if max_bytes else 0)
+    if window.seconds < 0 or window.max_bytes < 0:
+        raise ValueError("window must not be negative")
+    return window if window.seconds > 0 else None
+
+
+class _Turn:
+    """Per-request stream state shared by the stream engines.
+
+    With a DeltaWindow, text deltas are buffered and merged into one
+    text-delta frame when the window fills; any other frame flushes the
+    buffer first so ordering is kept. The time limit is enforced by
+    _flush_on_window, which also flushes while the model is idle.
+    """
+
+    def __init__(self, cacheable: bool, window: Optional[DeltaWindow] = None):
+        self.window = window
+        self.pending: List[str] = []
+        self.pending_bytes = 0
+        self.pending_since = 0.0
+        # Called when text starts buffering, to arm the window timer
+        self.on_buffer: Optional[Callable[[], None]] = None
+        self.text_stream_id = "text-1"
+        self.text_started = False
+        self.text_finished = False
+        self.finish_reason = None
+        # Track tool calls to emit proper events
+        self.active_tool_calls: Dict[str, Dict[str, Any]] = {}
+        # Tool calls whose arguments are streamed from model chunks:
+        # (model run or message id, chunk index) -> model tool call id
+        self.chunk_tool_call_ids: Dict[Tuple[str, int], str] = {}
+        # Streamed calls whose tools haven't started yet
+        self.unstarted_tool_calls: Dict[str, Dict[str, Any]] = {}
+        self.demo_response_emitted = False
+        # Text deltas of a plain text turn, for the response cache
+        self.cacheable = cacheable
+        self.deltas: List[str] = []
+        # Last finish reason reported by the model ("stop", "length", ...)
+        self.model_finish_reason: Optional[str] = None
+        self.error_emitted = False
+        # Model chunks streamed (~1 token each), for generation_stats
+        self.model_chunks = 0
+        self.completed = False
+
+    def text_delta(self, content: Any) -> Iterator[str]:
+        if not self.text_started:
+            yield text_start_frame(self.text_stream_id)
+            self.text_started = True
+        if not isinstance(content, str):
+            # Content blocks rather than a string: no template, no caching
+            self.cacheable = False
+            yield from self.flush_text()
+            yield format_sse({
+                "type": "text-delta",
+                "id": self.text_stream_id,
+                "delta": content
+            })
+            return
+        self.deltas.append(content)
+        if self.window is not None:
+            if not self.pending:
+                self.pending_since = time.monotonic()
+                if self.on_buffer is not None:
+                    self.on_buffer()
+            self.pending.append(content)
+            self.pending_bytes += len(content.encode("utf-8"))
+            if self.window.max_bytes and self.pending_bytes >= self.window.max_bytes:
+                yield from self.flush_text()
+            return
+        yield text_delta_frame(self.text_stream_id, content)
+
+    def flush_text(self) -> Iterator[str]:
+        """Emit buffered text deltas as a single text-delta frame."""
+        if not self.pending:
+            return
+        delta = "".join(self.pending)
+        self.pending.clear()
+        self.pending_bytes = 0
+        yield text_delta_frame(self.text_stream_id, delta)
+
+    def flush_delay(self) -> Optional[float]:
+        """Seconds until buffered text is due, or None if nothing is buffered."""
+        if not self.pending:
+            return None
+        return max(0.0, self.pending_since + self.window.seconds - time.monotonic())
+
+    def model_chunk(self, chunk: Any):
+        """Count a streamed model chunk and note its finish reason, if any."""
+        # Once per chunk, whether it carries text, tool arguments or both;
+        # empty end-of-stream chunks are not tokens
+        if getattr(chunk, "content", None) or getattr(chunk, "tool_call_chunks", None):
+            self.model_chunks += 1
+        finish_reason = (getattr(chunk, "response_metadata", None) or {}).get("finish_reason")
+        if finish_reason:
+            self.model_finish_reason = finish_reason
+
+    def should_cache(self) -> bool:
+        # Truncated ("length") or failed answers must not be replayed as
+        # complete ones
+        return (
+            self.cacheable
+            and bool(self.deltas)
+            and self.finish_reason == "stop"
+            and self.model_finish_reason == "stop"
+            and not self.error_emitted
+            and not self.demo_response_emitted
+        )
+
+    def custom(self, payload: Dict[str, Any]) -> Iterator[str]:
+        if payload.get("type") == "error":
+            self.error_emitted = True
+        yield from self.flush_text()
+        yield format_sse(payload)
+
+    def tool_input_delta(self, stream_id: str, tool_call_chunks: Sequence[Dict[str, Any]]) -> Iterator[str]:
+        """Stream tool call arguments as the model generates them.
+
+        The first chunk of a call carries its id and name; later ones only
+        the index, which is scoped to one model message (`stream_id`).
+        """
+        for tool_call_chunk in tool_call_chunks:
+            key = (stream_id, tool_call_chunk.get("index") or 0)
+            if tool_call_chunk.get("id"):
+                self.chunk_tool_call_ids[key] = tool_call_chunk["id"]
+            tool_call_id = self.chunk_tool_call_ids.get(key)
+            if tool_call_id is None:
+                continue
+            if tool_call_id not in self.active_tool_calls:
+                if not tool_call_chunk.get("name"):
+                    continue
+                yield from self.flush_text()
+                self.cacheable = False
+                call = self.active_tool_calls[tool_call_id] = {
+                    "name": tool_call_chunk["name"],
+                    "args": None,
+                }
+                self.unstarted_tool_calls[tool_call_id] = call
+                yield format_sse({
+                    "type": "tool-input-start",
+                    "toolCallId": tool_call_id,
+                    "toolName": call["name"],
+                })
+            args = tool_call_chunk.get("args")
+            if args and tool_call_id in self.unstarted_tool_calls:
+                yield format_sse({
+                    "type": "tool-input-delta",
+                    "toolCallId": tool_call_id,
+                    "inputTextDelta": args,
+                })
+
+    def tool_input(self, tool_call_id: str, tool_name: str, tool_input: Any) -> Iterator[str]:
+        yield from self.flush_text()
+        # Tool outputs (e.g. weather) go stale; don't cache the turn
+        self.cacheable = False
+        self.unstarted_tool_calls.pop(tool_call_id, None)
+        if tool_call_id not in self.active_tool_calls:
+            self.active_tool_calls[tool_call_id] = {
+                "name": tool_name,
+                "args": tool_input
+            }
+            yield format_sse({
+                "type": "tool-input-start",
+                "toolCallId": tool_call_id,
+                "toolName": tool_name,
+            })
+
+        # Emit tool input available
+        yield format_sse({
+            "type": "tool-input-available",
+            "toolCallId": tool_call_id,
+            "toolName": tool_name,
+            "input": tool_input,
+        })
+
+    def tool_output(self, tool_call_id: str, tool_output: Any) -> Iterator[str]:
+        yield from self.flush_text()
+        yield format_sse({
+            "type": "tool-output-available",
+            "toolCallId": tool_call_id,
+            "output": parse_tool_output(tool_output),
+        })
+
+    def demo(self, demo_response: Optional[Dict[str, Any]]) -> Iterator[str]:
+        if not demo_response or self.demo_response_emitted:
+            return
+        yield from self.flush_text()
+        yield from format_demo_response(demo_response, self.text_stream_id, self.text_started)
+        if demo_response.get("introText"):
+            self.text_started = self.text_finished = True
+        self.demo_response_emitted = True
+
+    def finish(self) -> Iterator[str]:
+        yield from self.flush_text()
+        # Finalize text stream if started
+        if self.text_started and not self.text_finished:
+            yield text_end_frame(self.text_stream_id)
+            self.text_finished = True
+        yield from format_finish(self.finish_reason)
+
+
+async def _stream_events(graph: CompiledStateGraph, messages: Sequence[Any], turn: _Turn):
+    """Engine over astream_events v2: every run's start/stream/end events."""
+    async for event in graph.astream_events(
+        {"messages": messages},
+        version="v2",
+    ):
+        event_type = event.get("event")
+
+        # Handle chat model streaming (text deltas only)
+        if event_type == "on_chat_model_stream":
+            chunk = event.get("data", {}).get("chunk")
+            turn.model_chunk(chunk)
+            if chunk and hasattr(chunk, "content") and chunk.content:
+                for frame in turn.text_delta(chunk.content):
+                    yield frame
+            # Tool arguments as they are generated (tool-input-start/delta),
+            # keyed by the model's tool call id
+            if getattr(chunk, "tool_call_chunks", None):
+                for frame in turn.tool_input_delta(event.get("run_id", ""), chunk.tool_call_chunks):
+                    yield frame
+
+        # Handle tool start: tool start events carry only the arguments, so
+        # the model's tool calls (ids included) are read from the ToolNode's
+        # input, the same AIMessage the lean engine reads them from
+        elif event_type == "on_chain_start" and event.get("name") == "tools":
+            tool_node_input = event.get("data", {}).get("input")
+            messages = tool_node_input.get("messages") if isinstance(tool_node_input, dict) else None
+            for tool_call in getattr(messages[-1] if messages else None, "tool_calls", None) or ():
+                for frame in turn.tool_input(tool_call["id"], tool_call["name"], tool_call["args"]):
+                    yield frame
+
+        # Handle tool end: the ToolMessage names the tool call it answers
+        elif event_type == "on_tool_end":
+            tool_output = event.get("data", {}).get("output")
+            tool_call_id = getattr(tool_output, "tool_call_id", None) or event.get("run_id", "")
+            for frame in turn.tool_output(tool_call_id, tool_output):
+                yield frame
+
+        # Handle chain/graph end for finish reason and demo_response
+        elif event_type == "on_chain_end":
+            event_name = event.get("name", "")
+
+            # Check for demo_response from demo sub-agent
+            if event_name == "process_demo":
+                output = event.get("data", {}).get("output", {})
+                for frame in turn.demo(output.get("demo_response")):
+                    yield frame
+
+            # Check for graph end
+            if event_name == "LangGraph":
+                turn.finish_reason = "stop"
+
+
+async def _stream_lean(graph: CompiledStateGraph, messages: Sequence[Any], turn: _Turn):
+    """Engine over graph.astream's messages/updates/custom stream modes.
+
+    Only model tokens, per-node state updates and custom writer payloads
+    are produced, instead of start/stream/end events for every runnable.
+    Tool calls are read from the llm_agent message and tool results from
+    the tools node update, so toolCallId is the model's tool call id.
+    """
+    async for mode, chunk in graph.astream(
+        {"messages": messages},
+        stream_mode=["messages", "updates", "custom"],
+    ):
+        if mode == "messages":
+            message, _ = chunk
+            # ToolMessages show up here too; they are handled as updates
+            if isinstance(message, AIMessageChunk):
+                turn.model_chunk(message)
+                if message.content:
+                    for frame in turn.text_delta(message.content):
+                        yield frame
+                if message.tool_call_chunks:
+                    for frame in turn.tool_input_delta(message.id or "", message.tool_call_chunks):
+                        yield frame
+
+        elif mode == "updates":
+            for update in chunk.values():
+                if not update:
+                    continue
+                for message in update.get("messages", ()):
+                    if isinstance(message, ToolMessage):
+                        for frame in turn.tool_output(message.tool_call_id, message):
+                            yield frame
+                    else:
+                        for tool_call in getattr(message, "tool_calls", None) or ():
+                            for frame in turn.tool_input(tool_call["id"], tool_call["name"], tool_call["args"]):
+                                yield frame
+                for frame in turn.demo(update.get("demo_response")):
+                    yield frame
+
+        elif mode == "custom":
+            # get_stream_writer() payloads that already are UI stream parts
+            if isinstance(chunk, dict) and "type" in chunk:
+                for frame in turn.custom(chunk):
+                    yield frame
+
+    turn.finish_reason = "stop"
+
+
+# Selectable per request (stream_text's engine argument)
+STREAM_ENGINES = {
+    "events": _stream_events,
+    "lean": _stream_lean,
+}
+
+class GenerationStats:
+    """Completed vs client-cancelled chat generations.
+
+    Tokens are counted as streamed model chunks (about one token each with
+    OpenAI-compatible streaming). A cancelled generation is assumed to
+    have saved the average completed length minus what it had streamed.
+    """
+
+    def __init__(self, ewma_alpha: float = 0.1):
+        self.ewma_alpha = ewma_alpha
+        self.completed = 0
+        self.cancelled = 0
+        self.avg_tokens = 0.0
+        self.tokens_before_cancel = 0
+        self.tokens_saved = 0.0
+
+    def record_completed(self, tokens: int):
+        self.completed += 1
+        if self.completed == 1:
+            self.avg_tokens = float(tokens)
+        else:
+            self.avg_tokens += self.ewma_alpha * (tokens - self.avg_tokens)
+
+    def record_cancelled(self, tokens: int):
+        self.cancelled += 1
+        self.tokens_before_cancel += tokens
+        self.tokens_saved += max(0.0, self.avg_tokens - tokens)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "completed": self.completed,
+            "cancelled": self.cancelled,
+            "avg_completed_tokens": round(self.avg_tokens, 1),
+            "tokens_before_cancel": self.tokens_before_cancel,
+            "estimated_tokens_saved": round(self.tokens_saved),
+        }
+
+
+generation_stats = GenerationStats()
+
+_END = object()
+_WAKE = object()
+
+
+async def _flush_on_window(frames: AsyncIterator[str], turn: _Turn):
+    """Relay engine frames, flushing buffered text when its window expires.
+
+    The engine runs in its own task feeding a queue, so a quiet model (or
+    a slow tool) never holds buffered text past the window.
+    """
+    queue: asyncio.Queue = asyncio.Queue()
+
+    async def pump():
+        try:
+            async for frame in frames:
+                queue.put_nowait(frame)
+            queue.put_nowait(_END)
+        except BaseException as e:
+            queue.put_nowait(e)
+            raise
+
+    turn.on_buffer = lambda: queue.put_nowait(_WAKE)
+    task = asyncio.create_task(pump())
+    try:
+        while True:
+            try:
+                item = await asyncio.wait_for(queue.get(), turn.flush_delay())
+            except asyncio.TimeoutError:
+                # The queue is drained, so buffered text is next in order
+                for frame in turn.flush_text():
+                    yield frame
+                continue
+            if item is _WAKE:
+                # Text started buffering: wait again with its deadline
+                continue
+            if item is _END:
+                return
+            if isinstance(item, BaseException):
+                raise item
+            yield item
+    finally:
+        if not task.done():
+            task.cancel()
+        try:
+            await task
+        except BaseException:
+            pass
 
 
 async def stream_text(
     graph: CompiledStateGraph,
     messages: Sequence[ChatCompletionMessageParam],
     protocol: str = "data",
+    fast_path: bool = True,
+    priority: Priority = Priority.INTERACTIVE,
+    cache: Optional[ResponseCache] = None,
+    cache_key: Optional[str] = None,
+    message_id: Optional[str] = None,
+    engine: str = "events",
+    delta_window: Optional[DeltaWindow] = None,
 ):
     """Yield Server-Sent Events for a streaming LangGraph execution.
     
     Converts LangGraph events to SSE format compatible with the frontend.
+    Deterministic routes (/demo commands) are answered through the
+    dispatch table without running the graph, with the same frames,
+    served as a single pre-serialized chunk from demo_frame_cache.
     
     Args:
         graph: Compiled LangGraph graph
         messages: Messages in OpenAI format
         protocol: SSE protocol version
+        fast_path: Try app.agents.dispatch before entering LangGraph
+        priority: Admission priority for the LLM calls of this request
+        cache: Response cache to store the completed turn in
+        cache_key: Key of this conversation in `cache`
+        message_id: Id for the start frame (MESSAGE_ID_SLOT for streams
+            shared between requests, see restamp_message_id)
+        engine: "events" (astream_events v2) or "lean" (stream modes);
+            both produce the same UI message stream
+        delta_window: Merge adjacent text deltas within this window
         
     Yields:
-        SSE formatted strings
+        SSE formatted strings (bytes for cached demo responses)
     """
+    # Read by the llm_agent node's admission slot
+    current_priority.set(priority)
+    turn: Optional[_Turn] = None
     try:
-        message_id = f"msg-{uuid.uuid4().hex}"
-        text_stream_id = "text-1"
-        text_started = False
-        text_finished = False
-        finish_reason = None
-        
-        # Track tool calls to emit proper events
-        active_tool_calls: Dict[str, Dict[str, Any]] = {}
+        message_id = message_id or f"msg-{uuid.uuid4().hex}"
 
-        yield format_sse({"type": "start", "messageId": message_id})
+        demo_response = dispatch_chat(messages) if fast_path else None
+        if demo_response is not None:
+            async for frame in stream_demo_response(demo_response, message_id):
+                yield frame
+            return
 
-        # Stream events from LangGraph
-        demo_response_emitted = False
-        
-        async for event in graph.astream_events(
-            {"messages": messages},
-            version="v2",
-        ):
-            event_type = event.get("event")
-            
-            # Handle chat model streaming (text deltas only)
-            if event_type == "on_chat_model_stream":
-                chunk = event.get("data", {}).get("chunk")
-                if chunk and hasattr(chunk, "content") and chunk.content:
-                    if not text_started:
-                        yield format_sse({"type": "text-start", "id": text_stream_id})
-                        text_started = True
-                    yield format_sse({
-                        "type": "text-delta",
-                        "id": text_stream_id,
-                        "delta": chunk.content
-                    })
-                # TODO: [Future Enhancement] Restore tool_call_chunks streaming for large cards/code generation
-                # 
-                # Currently, tool call chunks are NOT handled here to avoid duplicate events.
-                # Tool events are only handled by on_tool_start and on_tool_end.
-                #
-                # The challenge is that tool_call_chunks use a different ID format than LangGraph's run_id.
-                # To restore streaming:
-                # 1. Extract tool_call_id from chunk.tool_call_chunks[].id
-                # 2. Map this to the LangGraph run_id when on_tool_start fires
-                # 3. Emit tool-input-delta events with consistent IDs
-                #
-                # Benefits of restoring:
-                # - Progressive display of tool arguments (useful for code generation previews)
-                # - Better UX for long-running tool inputs
-                #
-                # See: https://python.langchain.com/docs/concepts/streaming/
-            
-            # Handle tool start
-            elif event_type == "on_tool_start":
-                tool_name = event.get("name", "")
-                run_id = event.get("run_id", "")
-                tool_input = event.get("data", {}).get("input", {})
-                
-                # Use run_id as tool_call_id if not already tracked
-                tool_call_id = run_id
-                
-                if tool_call_id not in active_tool_calls:
-                    active_tool_calls[tool_call_id] = {
-                        "name": tool_name,
-                        "args": tool_input
-                    }
-                    yield format_sse({
-                        "type": "tool-input-start",
-                        "toolCallId": tool_call_id,
-                        "toolName": tool_name,
-                    })
-                
-                # Emit tool input available
-                yield format_sse({
-                    "type": "tool-input-available",
-                    "toolCallId": tool_call_id,
-                    "toolName": tool_name,
-                    "input": tool_input,
-                })
-            
-            # Handle tool end
-            elif event_type == "on_tool_end":
-                run_id = event.get("run_id", "")
-                tool_output = event.get("data", {}).get("output")
-                
-                tool_call_id = run_id
-                
-                # Extract and parse output content
-                if hasattr(tool_output, "content"):
-                    content = tool_output.content
-                    # Try to parse JSON string to dict
-                    if isinstance(content, str):
-                        try:
-                            output_content = json.loads(content)
-                        except json.JSONDecodeError:
-                            output_content = content
-                    else:
-                        output_content = content
-                elif isinstance(tool_output, dict):
-                    output_content = tool_output
-                elif isinstance(tool_output, str):
-                    try:
-                        output_content = json.loads(tool_output)
-                    except json.JSONDecodeError:
-                        output_content = tool_output
-                else:
-                    output_content = str(tool_output) if tool_output else ""
-                
-                yield format_sse({
-                    "type": "tool-output-available",
-                    "toolCallId": tool_call_id,
-                    "output": output_content,
-                })
-            
-            # Handle chain/graph end for finish reason and demo_response
-            elif event_type == "on_chain_end":
-                event_name = event.get("name", "")
-                event_data = event.get("data", {})
-                
-                # Check for demo_response from demo sub-agent
-                if event_name == "process_demo" and not demo_response_emitted:
-                    output = event_data.get("output", {})
-                    demo_response = output.get("demo_response")
-                    
-                    if demo_response:
-                        logger.info(f"Emitting PAH component: {demo_response.get('type')}")
-                        
-                        # Emit intro text if present
-                        intro_text = demo_response.get("introText")
-                        if intro_text:
-                            if not text_started:
-                                yield format_sse({"type": "text-start", "id": text_stream_id})
-                                text_started = True
-                            yield format_sse({
-                                "type": "text-delta",
-                                "id": text_stream_id,
-                                "delta": intro_text
-                            })
-                            yield format_sse({"type": "text-end", "id": text_stream_id})
-                            text_finished = True
-                        
-                        # Emit PAH component as a "tool" output
-                        # This follows the same pattern as regular tools (Weather, etc.)
-                        # so message.tsx can render it using the existing tool-* handling
-                        component_type = demo_response.get("type", "pah-unknown")
-                        tool_call_id = f"pah-{uuid.uuid4().hex[:8]}"
-                        tool_name = component_type  # e.g., "pah-log-draft-card"
-                        component_data = demo_response.get("data", {})
-                        
-                        # Emit tool-input-start
-                        yield format_sse({
-                            "type": "tool-input-start",
-                            "toolCallId": tool_call_id,
-                            "toolName": tool_name,
-                        })
-                        
-                        # Emit tool-input-available (no input needed for demo)
-                        yield format_sse({
-                            "type": "tool-input-available",
-                            "toolCallId": tool_call_id,
-                            "toolName": tool_name,
-                            "input": {},
-                        })
-                        
-                        # Emit tool-output-available with PAH component data
-                        yield format_sse({
-                            "type": "tool-output-available",
-                            "toolCallId": tool_call_id,
-                            "output": component_data,
-                        })
-                        
-                        demo_response_emitted = True
-                
-                # Check for graph end
-                if event_name == "LangGraph":
-                    finish_reason = "stop"
+        turn = _Turn(cacheable=cache is not None and cache_key is not None, window=delta_window)
 
-        # Finalize text stream if started
-        if text_started and not text_finished:
-            yield format_sse({"type": "text-end", "id": text_stream_id})
-            text_finished = True
+        yield start_frame(message_id)
 
-        # Emit finish event
-        finish_metadata: Dict[str, Any] = {}
-        if finish_reason:
-            finish_metadata["finishReason"] = finish_reason
-        
-        if finish_metadata:
-            yield format_sse({"type": "finish", "messageMetadata": finish_metadata})
-        else:
-            yield format_sse({"type": "finish"})
+        frames = STREAM_ENGINES[engine](graph, messages, turn)
+        if delta_window is not None:
+            frames = _flush_on_window(frames, turn)
+        async for frame in frames:
+            yield frame
+        turn.completed = True
+        generation_stats.record_completed(turn.model_chunks)
+
+        # Emit text-end and finish events
+        for frame in turn.finish():
+            yield frame
 
-        yield "data: [DONE]\n\n"
+        if turn.should_cache():
+            await cache.set(cache_key, turn.deltas, turn.finish_reason)
         
+    except (asyncio.CancelledError, GeneratorExit):
+        # Client went away: the graph, the LLM request and async tools are
+        # cancelled with this generator
+        if turn is not None and not turn.completed:
+            logger.info(f"Chat stream cancelled after {turn.model_chunks} model chunks")
+            generation_stats.record_cancelled(turn.model_chunks)
+        raise
+    except AdmissionRejected as e:
+        # Shed while queued mid-stream (headers already sent): report it
+        # in-band so the client can back off
+        logger.warning(f"LLM call shed during stream: {e.reason}")
+        yield format_sse({
+            "type": "error",
+            "error": f"Server busy, retry after {e.retry_after_header}s",
+        })
     except Exception as e:
         logger.exception("Error in stream_text")
         yield format_sse({
@@ -235,6 +704,21 @@ async def stream_text(
         raise
 
 
+async def restamp_message_id(frames: AsyncIterator[Any], message_id: Optional[str] = None):
+    """Give one subscriber of a shared stream its own message id.
+
+    The shared stream is produced with MESSAGE_ID_SLOT in its start frame,
+    which is always the first frame.
+    """
+    message_id = message_id or f"msg-{uuid.uuid4().hex}"
+    first = True
+    async for frame in frames:
+        if first:
+            frame = frame.replace(MESSAGE_ID_SLOT, message_id)
+            first = False
+        yield frame
+
+
 def patch_response_with_headers(
     response: StreamingResponse,
     protocol: str = "data",
@@ -249,4 +733,51 @@ def patch_response_with_headers(
     if protocol:
         response.headers.setdefault("x-vercel-ai-protocol", protocol)
 
-    return response
\ No newline at end of file
+    return response
+
+
+@asynccontextmanager
+async def _collapsing_task_group():
+    """Task group that re-raises a lone failure as itself, not an ExceptionGroup."""
+    try:
+        async with anyio.create_task_group() as task_group:
+            yield task_group
+    except BaseExceptionGroup as group:
+        if len(group.exceptions) != 1:
+            raise
+        error = group.exceptions[0]
+        raise error from error.__cause__ or (None if error.__suppress_context__ else error.__context__)
+
+
+class EventStreamResponse(StreamingResponse):
+    """StreamingResponse for long-lived SSE subscriptions.
+
+    Always races the body against the ASGI receive channel, whatever ASGI
+    spec version the server advertises, so an idle generator is cancelled
+    as soon as `http.disconnect` arrives instead of having to poll
+    `request.is_disconnected()`. Errors from the body propagate as
+    themselves, and a failed send as ClientDisconnect, like
+    StreamingResponse.
+    """
+
+    media_type = "text/event-stream"
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await super().__call__(scope, receive, send)
+            return
+
+        try:
+            async with _collapsing_task_group() as task_group:
+
+                async def run_until_first_complete(func) -> None:
+                    await func()
+                    task_group.cancel_scope.cancel()
+
+                task_group.start_soon(run_until_first_complete, partial(self.stream_response, send))
+                await run_until_first_complete(partial(self.listen_for_disconnect, receive))
+        except OSError:
+            raise ClientDisconnect()
+
+        if self.background is not None:
+            await self.background()
@@ -0,0 +1,88 @@
+"""Benchmark concurrent /agent/chat streams on one worker: sync vs async nodes.
+
+Drives stream_text over the orchestrator graph with a fake chat model that
+takes a fixed latency per call (time.sleep for the sync path, like a
+blocking HTTP client; asyncio.sleep for the async one). Reports wall time
+and how many model calls were in flight at once.
+
+Run from src/backend:
+    python -m benchmarks.chat_concurrency [streams] [latency_seconds]
+"""
+
+import asyncio
+import logging
+import sys
+import time
+from typing import Any, List
+
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+from app.agents.orchestrator import build_orchestrator_graph
+from app.utils.stream import stream_text
+
+logging.disable(logging.INFO)
+
+
+class SlowChatModel(BaseChatModel):
+    """Chat model stand-in with a fixed response latency."""
+
+    latency: float = 0.2
+    in_flight: int = 0
+    peak_in_flight: int = 0
+
+    @property
+    def _llm_type(self) -> str:
+        return "slow-fake"
+
+    def bind_tools(self, tools: Any, **kwargs: Any):
+        return self
+
+    def _enter(self):
+        self.in_flight += 1
+        self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+
+    def _result(self) -> ChatResult:
+        self.in_flight -= 1
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content="Hello there!"))])
+
+    def _generate(self, messages: List[BaseMessage], stop=None, run_manager=None, **kwargs) -> ChatResult:
+        self._enter()
+        time.sleep(self.latency)
+        return self._result()
+
+    async def _agenerate(self, messages: List[BaseMessage], stop=None, run_manager=None, **kwargs) -> ChatResult:
+        self._enter()
+        await asyncio.sleep(self.latency)
+        return self._result()
+
+
+async def drain(graph, index: int):
+    messages = [{"role": "user", "content": f"hello {index}"}]
+    async for _ in stream_text(graph, messages):
+        pass
+
+
+async def run(streams: int, latency: float, async_nodes: bool):
+    model = SlowChatModel(latency=latency)
+    graph = build_orchestrator_graph(model, async_nodes=async_nodes)
+    started = time.perf_counter()
+    await asyncio.gather(*(drain(graph, i) for i in range(streams)))
+    elapsed = time.perf_counter() - started
+    label = "async" if async_nodes else "sync"
+    print(f"{label:>6}: {streams} streams in {elapsed:.2f}s "
+          f"({streams / elapsed:,.0f} streams/s, peak {model.peak_in_flight} concurrent LLM calls)")
+
+
+async def main(streams: int, latency: float):
+    print(f"{streams} simultaneous streams, {latency * 1000:.0f} ms model latency")
+    await run(streams, latency, async_nodes=False)
+    await run(streams, latency, async_nodes=True)
+
+
+if __name__ == "__main__":
+    asyncio.run(main(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 500,
+        float(sys.argv[2]) if len(sys.argv) > 2 else 0.2,
+    ))
@@ -0,0 +1,64 @@
+"""Benchmark text-delta coalescing windows on a high token-rate stream.
+
+Streams scripted turns (a stubbed weather tool call, then N tokens arriving
+every `interval` seconds) through stream_text with several X-Delta-Window
+settings. Reports SSE frames (one write each), bytes on the wire, CPU per
+token and the text a client would reassemble, which must not change.
+
+Run from src/backend:
+    python -m benchmarks.delta_window [turns] [tokens] [interval_seconds]
+"""
+
+import asyncio
+import json
+import logging
+import sys
+import time
+
+from app.agents import orchestrator
+from app.utils.stream import parse_delta_window, stream_text
+from benchmarks.stream_engines import ScriptedChatModel, stub_weather_tool
+
+logging.disable(logging.INFO)
+
+WINDOWS = ["0", "20", "20,256", "50,1024"]
+
+
+def _text(frames) -> str:
+    text = []
+    for frame in frames:
+        if '"type":"text-delta"' in frame:
+            text.append(json.loads(frame[len("data: "):])["delta"])
+    return "".join(text)
+
+
+async def run(window: str, turns: int, tokens: int, interval: float):
+    graph = orchestrator.build_orchestrator_graph(ScriptedChatModel(tokens=tokens, interval=interval))
+    frames = []
+    cpu_started = time.process_time()
+    started = time.perf_counter()
+    for i in range(turns):
+        messages = [{"role": "user", "content": f"weather in Berlin? ({i})"}]
+        async for frame in stream_text(graph, messages, engine="lean", delta_window=parse_delta_window(window)):
+            frames.append(frame)
+    elapsed = time.perf_counter() - started
+    cpu = time.process_time() - cpu_started
+    size = sum(len(frame) for frame in frames)
+    print(f"window {window:>8}: {len(frames) / turns:7,.0f} frames/turn, {size / turns / 1024:6.1f} KiB/turn, "
+          f"{cpu / (turns * tokens) * 1e6:5.1f} us CPU/token, {elapsed:.2f}s wall")
+    return _text(frames)
+
+
+async def main(turns: int, tokens: int, interval: float):
+    stub_weather_tool()
+    print(f"{turns} turns x {tokens} tokens, one token every {interval * 1000:g} ms")
+    texts = {window: await run(window, turns, tokens, interval) for window in WINDOWS}
+    print("reassembled text identical:", len(set(texts.values())) == 1)
+
+
+if __name__ == "__main__":
+    asyncio.run(main(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 5,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 1000,
+        float(sys.argv[3]) if len(sys.argv) > 3 else 0.001,
+    ))
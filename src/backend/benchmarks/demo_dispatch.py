@@ -0,0 +1,69 @@
+"""Benchmark /demo latency: fast-path dispatch vs the orchestrator graph.
+
+Streams the same /demo request through stream_text with and without the
+dispatch table (served from the pre-serialized demo_frame_cache) and
+checks both produce the same bytes, ids aside.
+
+Run from src/backend:
+    python -m benchmarks.demo_dispatch [iterations] [component]
+"""
+
+import asyncio
+import logging
+import os
+import re
+import statistics
+import sys
+import time
+
+# The orchestrator builds its ChatOpenAI client eagerly; /demo never calls it
+os.environ.setdefault("LLM_API_KEY", "sk-benchmark")
+
+from app.agents import get_orchestrator_graph  # noqa: E402
+from app.agents.mock_responses import MOCK_RESPONSES  # noqa: E402
+from app.utils.stream import demo_frame_cache, stream_text  # noqa: E402
+
+logging.disable(logging.INFO)
+
+IDS = re.compile(rb'"(messageId|toolCallId)":"[^"]+"')
+
+
+async def run(graph, messages, fast_path: bool) -> bytes:
+    chunks = [chunk async for chunk in stream_text(graph, messages, fast_path=fast_path)]
+    return b"".join(c if isinstance(c, bytes) else c.encode("utf-8") for c in chunks)
+
+
+async def measure(graph, messages, fast_path: bool, iterations: int) -> list:
+    samples = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        await run(graph, messages, fast_path)
+        samples.append((time.perf_counter() - started) * 1000)
+    return samples
+
+
+def report(label: str, samples: list):
+    samples = sorted(samples)
+    p99 = samples[int(len(samples) * 0.99) - 1]
+    print(f"{label:>10}: p50 {statistics.median(samples):.3f} ms  p99 {p99:.3f} ms")
+
+
+async def main(iterations: int, component: str):
+    graph = get_orchestrator_graph()
+    demo_frame_cache.warm(MOCK_RESPONSES.values())
+    messages = [{"role": "user", "content": f"/demo {component}"}]
+
+    graph_frames = await run(graph, messages, fast_path=False)
+    fast_frames = await run(graph, messages, fast_path=True)
+    same = IDS.sub(b"", graph_frames) == IDS.sub(b"", fast_frames)
+    print(f"/demo {component}: {len(fast_frames)} bytes, identical output: {same}")
+
+    report("graph", await measure(graph, messages, False, iterations))
+    report("fast path", await measure(graph, messages, True, iterations))
+
+
+if __name__ == "__main__":
+    asyncio.run(main(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 500,
+        sys.argv[2] if len(sys.argv) > 2 else "log-draft",
+    ))
@@ -0,0 +1,92 @@
+"""Benchmark CPU cost per SSE broadcast at different subscriber counts.
+
+Compares the legacy path (f-string per broadcast, full payload logged at
+INFO, awaited put per queue, str -> bytes encode per subscriber in the
+response) with the encode-once path in SSEManager.broadcast.
+
+Run from src/backend:
+    python -m benchmarks.sse_broadcast
+"""
+
+import asyncio
+import io
+import json
+import logging
+import time
+
+from app.services.sse import SSEManager, OverflowPolicy
+
+SUBSCRIBER_COUNTS = [1_000, 10_000]
+BROADCASTS = 50
+EVENT_DATA = json.dumps({
+    "type": "url_summary_complete",
+    "status": "completed",
+    "message": "Summarization complete! Do you want to view it?",
+    "resource": {"url": "https://example.com", "title": "Resource", "summary": "x" * 200},
+})
+
+# Route log records to an in-memory sink so formatting cost is measured
+# without terminal I/O dominating the numbers.
+bench_logger = logging.getLogger("benchmarks.sse_broadcast.legacy")
+bench_logger.setLevel(logging.INFO)
+bench_logger.addHandler(logging.StreamHandler(io.StringIO()))
+bench_logger.propagate = False
+logging.getLogger("app.services.sse").addHandler(logging.StreamHandler(io.StringIO()))
+logging.getLogger("app.services.sse").setLevel(logging.INFO)
+logging.getLogger("app.services.sse").propagate = False
+
+
+async def legacy_broadcast(queues, event: str, data: str):
+    payload = f"event: {event}\ndata: {data}\n\n"
+    bench_logger.info(f"Broadcasting SSE: {payload.strip()}")
+    for queue in queues:
+        await queue.put(payload)
+
+
+def drain_legacy(queues):
+    # StreamingResponse encodes each str chunk separately per subscriber
+    for queue in queues:
+        while not queue.empty():
+            queue.get_nowait().encode("utf-8")
+
+
+def drain(connections):
+    # Frames are already bytes: the response writes them without encoding
+    for connection in connections:
+        frames = connection._frames
+        while frames:
+            frames.popleft()
+
+
+async def bench_legacy(subscribers: int) -> float:
+    queues = [asyncio.Queue() for _ in range(subscribers)]
+    start = time.process_time()
+    for _ in range(BROADCASTS):
+        await legacy_broadcast(queues, "url_summary_complete", EVENT_DATA)
+        drain_legacy(queues)
+    return (time.process_time() - start) / BROADCASTS
+
+
+async def bench_encode_once(subscribers: int) -> float:
+    manager = SSEManager(queue_maxsize=256, overflow_policy=OverflowPolicy.DROP_OLDEST)
+    connections = [await manager.connect() for _ in range(subscribers)]
+    start = time.process_time()
+    for _ in range(BROADCASTS):
+        await manager.broadcast("url_summary_complete", EVENT_DATA)
+        drain(connections)
+    return (time.process_time() - start) / BROADCASTS
+
+
+async def main():
+    print(f"{'subscribers':>12} {'legacy ms':>12} {'encode-once ms':>16} {'speedup':>8}")
+    for subscribers in SUBSCRIBER_COUNTS:
+        legacy = await bench_legacy(subscribers)
+        encode_once = await bench_encode_once(subscribers)
+        print(
+            f"{subscribers:>12} {legacy * 1000:>12.3f} {encode_once * 1000:>16.3f} "
+            f"{legacy / encode_once:>7.2f}x"
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,91 @@
+"""Micro-benchmark SSE frame serialization: json.dumps vs templates/orjson.
+
+Compares the previous format_sse (json.dumps of a fresh dict per frame)
+with app.utils.frames for the hot fixed-shape frames, and json vs the
+active format_sse backend for a tool-output payload. Also checks that the
+template output is byte-identical to json.dumps.
+
+Run from src/backend:
+    python -m benchmarks.sse_frames [iterations]
+"""
+
+import json
+import sys
+import time
+
+from app.utils import frames
+from app.utils.frames import start_frame, text_delta_frame, text_end_frame, text_start_frame
+
+DELTAS = ["Hello", " world", "! Let's", " check the", " weather in", " Zürich", " \"today\"", "\n\n- ", "🌤️"]
+
+TOOL_OUTPUT = {
+    "latitude": 47.37, "longitude": 8.54, "timezone": "Europe/Zurich",
+    "current": {"time": "2026-10-18T12:00", "temperature_2m": 14.2},
+    "hourly": {"time": [f"2026-10-18T{h:02d}:00" for h in range(24)], "temperature_2m": [10.5 + h / 4 for h in range(24)]},
+    "daily": {"sunrise": ["2026-10-18T07:41"], "sunset": ["2026-10-18T18:28"]},
+}
+
+
+def json_format_sse(payload: dict) -> str:
+    """format_sse as it was: json.dumps on a freshly built dict."""
+    return f"data: {json.dumps(payload, separators=(',', ':'))}\n\n"
+
+
+def bench(label: str, fn, iterations: int):
+    started = time.perf_counter()
+    fn(iterations)
+    elapsed = time.perf_counter() - started
+    print(f"  {label:<34} {iterations / elapsed:>12,.0f} frames/s")
+
+
+def main(iterations: int):
+    for delta in DELTAS:
+        assert text_delta_frame("text-1", delta) == json_format_sse({"type": "text-delta", "id": "text-1", "delta": delta})
+    assert start_frame("msg-1") == json_format_sse({"type": "start", "messageId": "msg-1"})
+    assert text_start_frame("text-1") == json_format_sse({"type": "text-start", "id": "text-1"})
+    assert text_end_frame("text-1") == json_format_sse({"type": "text-end", "id": "text-1"})
+    assert frames.finish_frame("stop") == json_format_sse({"type": "finish", "messageMetadata": {"finishReason": "stop"}})
+    print("template frames byte-identical to json.dumps: ok")
+
+    def json_deltas(n):
+        for i in range(n):
+            json_format_sse({"type": "text-delta", "id": "text-1", "delta": DELTAS[i % len(DELTAS)]})
+
+    def template_deltas(n):
+        for i in range(n):
+            text_delta_frame("text-1", DELTAS[i % len(DELTAS)])
+
+    def json_fixed(n):
+        for _ in range(n // 3):
+            json_format_sse({"type": "text-start", "id": "text-1"})
+            json_format_sse({"type": "text-end", "id": "text-1"})
+            json_format_sse({"type": "finish", "messageMetadata": {"finishReason": "stop"}})
+
+    def template_fixed(n):
+        for _ in range(n // 3):
+            text_start_frame("text-1")
+            text_end_frame("text-1")
+            frames.finish_frame("stop")
+
+    def json_tool(n):
+        for _ in range(n):
+            json_format_sse({"type": "tool-output-available", "toolCallId": "call_1", "output": TOOL_OUTPUT})
+
+    def fast_tool(n):
+        for _ in range(n):
+            frames.format_sse({"type": "tool-output-available", "toolCallId": "call_1", "output": TOOL_OUTPUT})
+
+    print("text-delta:")
+    bench("json.dumps format_sse", json_deltas, iterations)
+    bench("text_delta_frame template", template_deltas, iterations)
+    print("text-start / text-end / finish:")
+    bench("json.dumps format_sse", json_fixed, iterations)
+    bench("cached templates", template_fixed, iterations)
+    print(f"tool-output-available ({len(json.dumps(TOOL_OUTPUT))} B payload):")
+    bench("json.dumps format_sse", json_tool, iterations // 10)
+    backend = "orjson" if frames.orjson is not None else "json (orjson not installed)"
+    bench(f"format_sse via {backend}", fast_tool, iterations // 10)
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 500_000)
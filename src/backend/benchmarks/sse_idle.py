@@ -0,0 +1,90 @@
+"""Benchmark CPU burned by idle /agent/events subscribers.
+
+Compares the legacy subscriber loop (wait_for(queue.get(), timeout=1.0) plus
+request.is_disconnected() every iteration) with the event-driven loop that
+parks on SSEConnection.get() until data, shutdown or client disconnect.
+
+Run from src/backend:
+    python -m benchmarks.sse_idle [subscribers] [seconds]
+"""
+
+import asyncio
+import logging
+import sys
+import time
+
+from starlette.requests import Request
+
+from app.services.sse import SSEManager
+
+logging.getLogger("app.services.sse").setLevel(logging.WARNING)
+
+
+def make_request(disconnected: asyncio.Event) -> Request:
+    """Starlette request whose receive channel stays silent until disconnect."""
+    async def receive():
+        await disconnected.wait()
+        return {"type": "http.disconnect"}
+
+    return Request({"type": "http", "method": "GET", "headers": []}, receive)
+
+
+async def legacy_subscriber(request: Request, stop: asyncio.Event):
+    queue: asyncio.Queue = asyncio.Queue()
+    while not stop.is_set():
+        if await request.is_disconnected():
+            break
+        try:
+            await asyncio.wait_for(queue.get(), timeout=1.0)
+        except asyncio.TimeoutError:
+            continue
+
+
+async def event_driven_subscriber(manager: SSEManager, request: Request):
+    connection = await manager.connect()
+    # EventStreamResponse parks one listener on the receive channel
+    listener = asyncio.create_task(request.receive())
+    try:
+        while await connection.get() is not None:
+            pass
+    finally:
+        listener.cancel()
+        manager.disconnect(connection)
+
+
+async def main(subscribers: int, seconds: float):
+    disconnected = asyncio.Event()
+    stop = asyncio.Event()
+
+    tasks = [
+        asyncio.create_task(legacy_subscriber(make_request(disconnected), stop))
+        for _ in range(subscribers)
+    ]
+    await asyncio.sleep(1.5)
+    start = time.process_time()
+    await asyncio.sleep(seconds)
+    legacy_cpu = time.process_time() - start
+    stop.set()
+    await asyncio.gather(*tasks)
+
+    manager = SSEManager()
+    tasks = [
+        asyncio.create_task(event_driven_subscriber(manager, make_request(disconnected)))
+        for _ in range(subscribers)
+    ]
+    await asyncio.sleep(1.5)
+    start = time.process_time()
+    await asyncio.sleep(seconds)
+    event_cpu = time.process_time() - start
+    manager.close_all()
+    await asyncio.gather(*tasks)
+
+    print(f"{subscribers} idle subscribers over {seconds:.0f}s")
+    print(f"  legacy polling : {legacy_cpu:.3f}s CPU ({legacy_cpu / seconds * 100:.1f}% of a core)")
+    print(f"  event-driven   : {event_cpu:.3f}s CPU ({event_cpu / seconds * 100:.1f}% of a core)")
+
+
+if __name__ == "__main__":
+    subscribers = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    seconds = float(sys.argv[2]) if len(sys.argv) > 2 else 5.0
+    asyncio.run(main(subscribers, seconds))
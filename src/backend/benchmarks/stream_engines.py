@@ -0,0 +1,136 @@
+"""Benchmark stream_text engines: astream_events v2 vs lean stream modes.
+
+Streams a scripted chat turn (a weather tool call, then a long text
+answer streamed token by token) through the orchestrator graph with each
+engine. The weather tool is swapped for a local stub so no network is
+involved. Reports graph events consumed by the engine and CPU time per
+generated token.
+
+Run from src/backend:
+    python -m benchmarks.stream_engines [turns] [tokens]
+"""
+
+import asyncio
+import logging
+import sys
+import time
+from typing import Any, AsyncIterator, List
+
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage, ToolMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+from app.agents import orchestrator, tools
+from app.utils import stream
+from app.utils.stream import stream_text
+
+logging.disable(logging.INFO)
+
+
+class ScriptedChatModel(BaseChatModel):
+    """Calls the weather tool once, then streams `tokens` text tokens."""
+
+    tokens: int = 200
+    # Delay between streamed chunks (0: as fast as possible)
+    interval: float = 0.0
+
+    @property
+    def _llm_type(self) -> str:
+        return "scripted-fake"
+
+    def bind_tools(self, tools: Any, **kwargs: Any):
+        return self
+
+    def _chunks(self, messages: List[BaseMessage]) -> List[AIMessageChunk]:
+        if not any(isinstance(message, ToolMessage) for message in messages):
+            return [
+                AIMessageChunk(content="", tool_call_chunks=[{
+                    "id": "call_weather", "name": "get_current_weather", "index": 0,
+                    "args": '{"latitude": 52.52, ',
+                }]),
+                AIMessageChunk(content="", tool_call_chunks=[{
+                    "id": None, "name": None, "index": 0, "args": '"longitude": 13.41}',
+                }]),
+            ]
+        return [AIMessageChunk(content=f"token{i} ") for i in range(self.tokens)]
+
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs) -> AsyncIterator[ChatGenerationChunk]:
+        for chunk in self._chunks(messages):
+            if self.interval:
+                await asyncio.sleep(self.interval)
+            generation = ChatGenerationChunk(message=chunk)
+            if run_manager:
+                await run_manager.on_llm_new_token(chunk.content, chunk=generation)
+            yield generation
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        merged = self._chunks(messages)
+        message = merged[0]
+        for chunk in merged[1:]:
+            message += chunk
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(
+            content=message.content, tool_calls=message.tool_calls,
+        ))])
+
+
+def _stub_weather(latitude: float, longitude: float) -> dict:
+    return {"latitude": latitude, "longitude": longitude, "current": {"temperature_2m": 21.5}}
+
+
+async def _astub_weather(latitude: float, longitude: float) -> dict:
+    return _stub_weather(latitude, longitude)
+
+
+def stub_weather_tool():
+    """Answer the weather tool locally (sync and async paths)."""
+    tools.get_current_weather.func = _stub_weather
+    tools.get_current_weather.coroutine = _astub_weather
+
+
+class _CountingGraph:
+    """Counts the raw items each engine pulls from the compiled graph."""
+
+    def __init__(self, graph):
+        self.graph = graph
+        self.items = 0
+
+    async def astream_events(self, *args, **kwargs):
+        async for event in self.graph.astream_events(*args, **kwargs):
+            self.items += 1
+            yield event
+
+    async def astream(self, *args, **kwargs):
+        async for item in self.graph.astream(*args, **kwargs):
+            self.items += 1
+            yield item
+
+
+async def run(engine: str, turns: int, tokens: int):
+    graph = _CountingGraph(orchestrator.build_orchestrator_graph(ScriptedChatModel(tokens=tokens)))
+    frames = 0
+    cpu_started = time.process_time()
+    started = time.perf_counter()
+    for i in range(turns):
+        messages = [{"role": "user", "content": f"weather in Berlin? ({i})"}]
+        async for _ in stream_text(graph, messages, engine=engine):
+            frames += 1
+    elapsed = time.perf_counter() - started
+    cpu = time.process_time() - cpu_started
+    generated = turns * tokens
+    print(f"{engine:>7}: {graph.items / turns:,.0f} graph events/turn, {frames / turns:,.0f} frames/turn, "
+          f"{cpu / generated * 1e6:,.1f} us CPU/token, {elapsed:.2f}s wall")
+    return frames
+
+
+async def main(turns: int, tokens: int):
+    stub_weather_tool()
+    print(f"{turns} turns x {tokens} tokens, plus one tool call per turn")
+    for engine in stream.STREAM_ENGINES:
+        await run(engine, turns, tokens)
+
+
+if __name__ == "__main__":
+    asyncio.run(main(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 20,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 200,
+    ))
@@ -0,0 +1,20 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+
+CALLBACK = {"action": "read_later", "component_type": "resource-preview", "data": {"url": "https://example.com"}}
+
+
+@pytest.fixture
+def client():
+    return TestClient(app)
+
+
+@pytest.mark.parametrize("delay", [None, -1])
+def test_invalid_delays_are_rejected(client, delay):
+    body = {**CALLBACK, "delay_seconds": delay}
+
+    assert client.post("/api/v1/agent/callback", json=body).status_code == 422
+    assert client.post("/api/v1/agent/callbacks/batch", json={"callbacks": [body]}).status_code == 422
+    assert client.post("/api/v1/agent/callback/scheduled/unknown/reschedule", json={"delay_seconds": delay}).status_code == 422
@@ -0,0 +1,28 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from app.agents import orchestrator
+from app.core.settings import settings
+from app.main import app
+
+
+@pytest.fixture
+def client():
+    return TestClient(app)
+
+
+def test_demo_commands_need_no_llm(client, monkeypatch):
+    # No credentials: building the orchestrator's chat model would fail
+    monkeypatch.setattr(settings, "LLM_API_KEY", "")
+    monkeypatch.delenv("OPENAI_API_KEY", raising=False)
+    orchestrator.get_orchestrator_graph.cache_clear()
+
+    response = client.post(
+        "/api/v1/agent/chat",
+        json={"messages": [{"role": "user", "content": "/demo log-draft"}]},
+    )
+
+    assert response.status_code == 200
+    assert '"type":"start"' in response.text
+    assert "data: [DONE]" in response.text
+    assert orchestrator.get_orchestrator_graph.cache_info().currsize == 0
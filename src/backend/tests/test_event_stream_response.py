@@ -0,0 +1,56 @@
+import asyncio
+
+import pytest
+from starlette.requests import ClientDisconnect
+
+from app.utils.stream import EventStreamResponse
+
+SCOPE = {"type": "http", "asgi": {"spec_version": "2.4"}}
+
+
+async def _never_disconnect():
+    await asyncio.Event().wait()
+
+
+async def _ignore(message):
+    pass
+
+
+def test_body_errors_are_not_wrapped_in_exception_groups():
+    async def body():
+        yield "data: 1\n\n"
+        raise RuntimeError("upstream failed")
+
+    with pytest.raises(RuntimeError, match="upstream failed"):
+        asyncio.run(EventStreamResponse(body())(SCOPE, _never_disconnect, _ignore))
+
+
+def test_failed_send_is_a_client_disconnect():
+    async def body():
+        yield "data: 1\n\n"
+
+    async def broken_send(message):
+        raise OSError("connection reset")
+
+    with pytest.raises(ClientDisconnect):
+        asyncio.run(EventStreamResponse(body())(SCOPE, _never_disconnect, broken_send))
+
+
+def test_disconnect_cancels_the_body():
+    cancelled = []
+
+    async def body():
+        try:
+            yield "data: 1\n\n"
+            await asyncio.Event().wait()
+        except asyncio.CancelledError:
+            cancelled.append(True)
+            raise
+
+    async def disconnect():
+        await asyncio.sleep(0.01)
+        return {"type": "http.disconnect"}
+
+    asyncio.run(EventStreamResponse(body())(SCOPE, disconnect, _ignore))
+
+    assert cancelled
@@ -0,0 +1,42 @@
+import asyncio
+import time
+
+from app.services.job_store import SQLiteJobStore
+
+
+async def _owner(store: SQLiteJobStore, job_id: str) -> str:
+    cursor = await store._db.execute("SELECT owner FROM scheduled_events WHERE job_id = ?", (job_id,))
+    return (await cursor.fetchone())[0]
+
+
+def test_upsert_does_not_take_back_a_claimed_row(tmp_path):
+    async def scenario():
+        path = str(tmp_path / "jobs.db")
+        stalled, live = SQLiteJobStore(path), SQLiteJobStore(path)
+        await stalled.open()
+        await live.open()
+        stalled.upsert("job", "event", "global", "{}", time.time() + 60)
+        await stalled.flush()
+
+        # The stalled scheduler's lease lapses and the live one adopts its job
+        await stalled._db.execute("UPDATE scheduler_leases SET expires_at = 0 WHERE owner = ?", (stalled.owner,))
+        await stalled._db.commit()
+        token = await live.claim_orphans()
+        await live.finish_claim(token)
+
+        # A late reschedule from the stalled scheduler leaves the claim alone
+        stalled.upsert("job", "event", "global", "{}", time.time() + 120)
+        await stalled.flush()
+        assert await _owner(live, "job") == live.owner
+
+        # ...but rows whose owner is gone can be taken over
+        await live._db.execute("DELETE FROM scheduler_leases WHERE owner = ?", (live.owner,))
+        await live._db.commit()
+        stalled.upsert("job", "event", "global", "{}", time.time() + 120)
+        await stalled.flush()
+        assert await _owner(live, "job") == stalled.owner
+
+        await stalled.close()
+        await live.close()
+
+    asyncio.run(scenario())
@@ -0,0 +1,129 @@
+import asyncio
+import time
+
+import httpx
+import openai
+import pytest
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+from app.services.admission import AdmissionController, Priority
+from app.services.llm_router import LLMEndpoint, RoutedChatModel
+
+
+def _status_error(cls, status: int):
+    request = httpx.Request("POST", "http://llm.test/v1/chat/completions")
+    return cls("error", response=httpx.Response(status, request=request), body=None)
+
+
+class FakeChatModel(BaseChatModel):
+    delay: float = 0.0
+    error: object = None
+    text: str = "hello"
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake"
+
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs):
+        await asyncio.sleep(self.delay)
+        if self.error is not None:
+            raise self.error
+        for word in self.text.split():
+            yield ChatGenerationChunk(message=AIMessageChunk(content=word))
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        if self.error is not None:
+            raise self.error
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=self.text))])
+
+
+def _router(*models, **kwargs):
+    endpoints = [LLMEndpoint(f"e{i}", model) for i, model in enumerate(models)]
+    return RoutedChatModel(endpoints=endpoints, **kwargs), endpoints
+
+
+def test_failed_hedge_is_replaced():
+    router, _ = _router(
+        FakeChatModel(delay=1.0, text="slow"),
+        FakeChatModel(error=_status_error(openai.InternalServerError, 503)),
+        FakeChatModel(delay=0.01, text="fast"),
+        hedge_default_seconds=0.2,
+    )
+
+    started = time.perf_counter()
+    result = asyncio.run(router.ainvoke("hi"))
+
+    assert result.content == "fast"
+    assert time.perf_counter() - started < 0.5
+
+
+def test_client_errors_are_raised_without_failover():
+    bad_request = _status_error(openai.BadRequestError, 400)
+    router, endpoints = _router(
+        FakeChatModel(error=bad_request), FakeChatModel(error=bad_request), hedge=False,
+    )
+
+    with pytest.raises(openai.BadRequestError):
+        asyncio.run(router.ainvoke("hi"))
+    with pytest.raises(openai.BadRequestError):
+        router.invoke("hi")
+
+    # One endpoint tried per call, and not marked as failing
+    assert sum(endpoint.requests for endpoint in endpoints) == 2
+    assert all(endpoint.errors == 0 for endpoint in endpoints)
+
+
+def test_server_errors_fail_over():
+    router, endpoints = _router(
+        FakeChatModel(error=_status_error(openai.InternalServerError, 500)),
+        FakeChatModel(delay=0.01, text="ok"),
+        hedge=False,
+    )
+
+    assert asyncio.run(router.ainvoke("hi")).content == "ok"
+    assert router.invoke("hi").content == "ok"
+    assert endpoints[0].errors == 2
+
+
+def test_ainvoke_returns_a_message():
+    router, _ = _router(FakeChatModel(text="one two"), hedge=False)
+
+    result = asyncio.run(router.ainvoke("hi"))
+
+    assert type(result) is AIMessage
+    assert result.content == "onetwo"
+
+
+def test_hedge_delay_is_p95():
+    router, _ = _router(FakeChatModel(), hedge_min_samples=20, hedge_min_seconds=0.0)
+    router._first_token_samples.extend(float(i) for i in range(1, 21))
+
+    assert router.hedge_delay() == 20.0
+
+
+def test_endpoint_model_admission_fails_over_when_shedding():
+    slo = {Priority.INTERACTIVE: 0.1, Priority.BACKGROUND: 0.1}
+    saturated = AdmissionController("m0", max_concurrency=1, slo_seconds=slo)
+    saturated.in_flight = 1
+    saturated.service_seconds = 10.0
+    idle = AdmissionController("m1", max_concurrency=1, slo_seconds=slo)
+    router = RoutedChatModel(endpoints=[
+        LLMEndpoint("e0", FakeChatModel(text="first"), admission=saturated),
+        LLMEndpoint("e1", FakeChatModel(text="second"), admission=idle),
+    ])
+
+    result = asyncio.run(router.ainvoke("hi"))
+
+    assert result.content == "second"
+    assert saturated.shed == 1
+    assert idle.admitted == 1
+    assert idle.in_flight == 0
+
+
+def test_admission_p95_uses_nearest_rank():
+    controller = AdmissionController("m")
+    controller.wait_samples.extend(i / 1000 for i in range(1, 31))
+
+    assert controller.stats()["wait_p95_ms"] == 29.0
@@ -0,0 +1,59 @@
+import asyncio
+
+from openai._models import FinalRequestOptions
+
+from app.core.settings import settings
+from app.services import llms
+
+
+def _request_timeout(client):
+    options = FinalRequestOptions.construct(method="post", url="/chat/completions", json_data={})
+    return client._build_request(options).extensions["timeout"]
+
+
+def test_chat_openai_requests_use_pool_timeouts(monkeypatch):
+    monkeypatch.setattr(settings, "LLM_API_KEY", "test-key")
+    pool = llms.LLMHttpPool(connect_timeout=1.5, read_timeout=20, write_timeout=3, pool_timeout=4)
+    monkeypatch.setattr(llms, "llm_http_pool", pool)
+
+    model = llms._chat_openai("http://127.0.0.1:9/v1", "test-model")
+
+    expected = {"connect": 1.5, "read": 20.0, "write": 3.0, "pool": 4.0}
+    assert _request_timeout(model.root_async_client) == expected
+    assert _request_timeout(model.root_client) == expected
+
+
+def test_connection_stats_tolerates_unknown_transport():
+    class Transport:
+        pass
+
+    assert llms._connection_stats(None) == {"open": 0, "idle": 0, "active": 0}
+    assert llms._connection_stats(Transport()) is None
+
+
+
+def test_restarted_lifespan_rebuilds_graph_on_open_clients(monkeypatch):
+    from app.agents.orchestrator import get_orchestrator_graph
+    from app.main import app, lifespan
+
+    monkeypatch.setattr(settings, "LLM_API_KEY", "test-key")
+    monkeypatch.setattr(settings, "AGENT_ASYNC_NODES", True)
+    # The lifespan chains SIGINT/SIGTERM handlers; keep the test's own
+    monkeypatch.setattr("signal.signal", lambda *args: None)
+
+    async def run():
+        async with lifespan(app):
+            first = llms.llm_http_pool.async_client
+            get_orchestrator_graph()
+        assert first.is_closed
+        assert get_orchestrator_graph.cache_info().currsize == 0
+        # Only async nodes run, so no sync client is opened for them
+        assert llms.llm_http_pool._client is None
+
+        async with lifespan(app):
+            second = llms.llm_http_pool.async_client
+            get_orchestrator_graph()
+            assert second is not first
+            assert not second.is_closed
+
+    asyncio.run(run())
@@ -0,0 +1,28 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core.settings import settings
+from app.main import app
+
+OPERATOR_ROUTES = ["/api/v1/agent/events/connections", "/api/v1/metrics/llm"]
+
+
+@pytest.fixture
+def client():
+    return TestClient(app)
+
+
+@pytest.mark.parametrize("path", OPERATOR_ROUTES)
+def test_operator_routes_are_disabled_without_a_token(client, monkeypatch, path):
+    monkeypatch.setattr(settings, "OPERATOR_TOKEN", "")
+
+    assert client.get(path).status_code == 404
+
+
+@pytest.mark.parametrize("path", OPERATOR_ROUTES)
+def test_operator_routes_require_the_token(client, monkeypatch, path):
+    monkeypatch.setattr(settings, "OPERATOR_TOKEN", "s3cret")
+
+    assert client.get(path).status_code == 401
+    assert client.get(path, headers={"Authorization": "Bearer wrong"}).status_code == 401
+    assert client.get(path, headers={"Authorization": "Bearer s3cret"}).status_code == 200
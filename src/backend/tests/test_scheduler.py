@@ -0,0 +1,56 @@
+import asyncio
+
+from app.services.scheduler import EventScheduler
+from app.services.sse import GLOBAL_CHANNEL, SSEManager
+
+
+def _ids(frames):
+    return [line for frame in frames for line in frame.split(b"\n") if line.startswith(b"id: ")]
+
+
+def test_batched_events_keep_their_own_ids():
+    async def scenario():
+        manager = SSEManager()
+        connection = await manager.connect()
+        scheduler = EventScheduler(manager)
+        scheduler.schedule_many([
+            {"event_type": "done", "event_data": {"n": i}, "delay_seconds": 0} for i in range(3)
+        ])
+        while scheduler.fired < 3:
+            await asyncio.sleep(0.01)
+        await scheduler.stop()
+
+        # One write to the subscriber, three ids
+        frame = await connection.get()
+        ids = _ids([frame])
+        assert len(ids) == 3 and len(set(ids)) == 3
+        # Resuming from the first id replays only the other two
+        first = int(ids[0].split(b": ")[1])
+        assert _ids(manager._replay_since([GLOBAL_CHANNEL], first)) == ids[1:]
+
+    asyncio.run(scenario())
+
+
+def test_failed_broadcasts_are_retried():
+    class FlakyManager(SSEManager):
+        failures = 1
+
+        async def broadcast_many(self, channel, events):
+            if self.failures:
+                self.failures -= 1
+                raise ConnectionError("backend down")
+            await super().broadcast_many(channel, events)
+
+    async def scenario():
+        scheduler = EventScheduler(FlakyManager(), retry_delay=0.2)
+        event = scheduler.schedule("done", {}, 0)
+        await asyncio.sleep(0.05)
+        # Still pending (and cancellable) after the failed attempt
+        assert scheduler.get(event.job_id) is event
+        while scheduler.fired < 1:
+            await asyncio.sleep(0.01)
+        assert scheduler.failed == 1
+        assert scheduler.get(event.job_id) is None
+        await scheduler.stop()
+
+    asyncio.run(scenario())
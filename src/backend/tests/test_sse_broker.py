@@ -0,0 +1,61 @@
+import asyncio
+import fcntl
+import os
+
+from app.services.sse import GLOBAL_CHANNEL, SSEManager
+from app.services.sse_broker import UnixSocketBackend
+
+
+async def _wait_for(condition, timeout: float = 2.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not condition():
+        assert asyncio.get_running_loop().time() < deadline
+        await asyncio.sleep(0.01)
+
+
+def _ids(manager: SSEManager):
+    return [frame.split(b"\n", 1)[0] for frame in manager._replay_since([GLOBAL_CHANNEL], 0)]
+
+
+def test_publishes_before_connecting_take_broker_ids(tmp_path):
+    async def scenario():
+        path = str(tmp_path / "sse.sock")
+        broker = SSEManager(backend=UnixSocketBackend(path))
+        worker = SSEManager(backend=UnixSocketBackend(path))
+        await broker.start()
+        await _wait_for(lambda: broker.backend.is_broker)
+
+        # Not connected yet: the event waits for the broker's id
+        await worker.broadcast("ping", "early")
+        assert _ids(worker) == []
+
+        await worker.start()
+        await _wait_for(lambda: len(_ids(broker)) == 1 and len(_ids(worker)) == 1)
+        await worker.broadcast("ping", "late")
+        await _wait_for(lambda: len(_ids(broker)) == 2 and len(_ids(worker)) == 2)
+
+        assert _ids(broker) == _ids(worker)
+        assert worker.backend.stats()["queued_publishes"] == 1
+        await worker.stop()
+        await broker.stop()
+
+    asyncio.run(scenario())
+
+
+def test_lock_is_released_when_the_socket_cannot_be_served(tmp_path):
+    async def scenario():
+        # The socket's directory does not exist, so serving it fails
+        backend = UnixSocketBackend(str(tmp_path / "missing" / "sse.sock"), reconnect_delay=0)
+        backend.lock_path = str(tmp_path / "sse.lock")
+        backend.manager = SSEManager(backend=backend)
+
+        assert not await backend._try_become_broker()
+        assert backend._lock_fd is None
+        # The lock was released, so another process could take it
+        fd = os.open(backend.lock_path, os.O_RDWR)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        finally:
+            os.close(fd)
+
+    asyncio.run(scenario())
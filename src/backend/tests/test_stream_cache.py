@@ -0,0 +1,57 @@
+import asyncio
+
+import pytest
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+from app.agents import orchestrator
+from app.services.response_cache import ResponseCache
+from app.utils.stream import STREAM_ENGINES, stream_text
+
+
+class FinishingChatModel(BaseChatModel):
+    """Streams a short answer ending with the given finish reason."""
+
+    finish_reason: str = "stop"
+
+    @property
+    def _llm_type(self) -> str:
+        return "finishing-fake"
+
+    def bind_tools(self, tools, **kwargs):
+        return self
+
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs):
+        for word in ("Hello", " world"):
+            yield ChatGenerationChunk(message=AIMessageChunk(content=word))
+        yield ChatGenerationChunk(
+            message=AIMessageChunk(content=""),
+            generation_info={"finish_reason": self.finish_reason},
+        )
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content="Hello world"))])
+
+
+async def _stream(finish_reason: str, engine: str) -> ResponseCache:
+    cache = ResponseCache()
+    graph = orchestrator.build_orchestrator_graph(FinishingChatModel(finish_reason=finish_reason))
+    messages = [{"role": "user", "content": "hi"}]
+    async for _ in stream_text(graph, messages, cache=cache, cache_key="key", engine=engine):
+        pass
+    return cache
+
+
+@pytest.mark.parametrize("engine", list(STREAM_ENGINES))
+def test_complete_answers_are_cached(engine):
+    cache = asyncio.run(_stream("stop", engine))
+
+    assert cache.stores == 1
+
+
+@pytest.mark.parametrize("engine", list(STREAM_ENGINES))
+def test_truncated_answers_are_not_cached(engine):
+    cache = asyncio.run(_stream("length", engine))
+
+    assert cache.stores == 0
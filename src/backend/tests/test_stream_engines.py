@@ -0,0 +1,94 @@
+import asyncio
+import json
+
+import pytest
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, ToolMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+from app.agents import orchestrator, tools
+from app.utils.stream import STREAM_ENGINES, _Turn
+
+WEATHER_ARGS = {"latitude": 52.52, "longitude": 13.41}
+
+
+class UnstreamedToolChatModel(BaseChatModel):
+    """Calls the weather tool twice with the same arguments, then answers.
+
+    Only _generate is implemented, so no tool call chunks are streamed.
+    """
+
+    @property
+    def _llm_type(self) -> str:
+        return "parallel-tool-fake"
+
+    def bind_tools(self, tools, **kwargs):
+        return self
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        if any(isinstance(message, ToolMessage) for message in messages):
+            return ChatResult(generations=[ChatGeneration(message=AIMessage(content="Done"))])
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content="", tool_calls=[
+            {"id": f"call_{index}", "name": "get_current_weather", "args": WEATHER_ARGS}
+            for index in range(2)
+        ]))])
+
+
+class ParallelToolChatModel(UnstreamedToolChatModel):
+    """The same calls, streamed with text alongside each tool call chunk."""
+
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs):
+        if any(isinstance(message, ToolMessage) for message in messages):
+            chunks = [AIMessageChunk(content="Done")]
+        else:
+            chunks = [
+                AIMessageChunk(content="Checking", tool_call_chunks=[{
+                    "id": f"call_{index}", "name": "get_current_weather", "index": index,
+                    "args": json.dumps(WEATHER_ARGS),
+                }])
+                for index in range(2)
+            ]
+        for chunk in chunks:
+            yield ChatGenerationChunk(message=chunk)
+
+
+class FakeWeatherResponse:
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return {"current": {"temperature_2m": 20}}
+
+
+async def _run(model, engine):
+    graph = orchestrator.build_orchestrator_graph(model)
+    turn = _Turn(cacheable=False)
+    frames = [frame async for frame in STREAM_ENGINES[engine](graph, [{"role": "user", "content": "hi"}], turn)]
+    parts = [json.loads(frame[len("data: "):]) for frame in frames]
+    return turn, parts
+
+
+def _tool_call_ids(parts, part_type):
+    return [part["toolCallId"] for part in parts if part["type"] == part_type]
+
+
+@pytest.fixture(autouse=True)
+def no_weather_requests(monkeypatch):
+    monkeypatch.setattr(tools.requests, "get", lambda url: FakeWeatherResponse())
+
+
+@pytest.mark.parametrize("model_cls", [ParallelToolChatModel, UnstreamedToolChatModel])
+@pytest.mark.parametrize("engine", list(STREAM_ENGINES))
+def test_parallel_tool_calls_keep_model_tool_call_ids(engine, model_cls):
+    _, parts = asyncio.run(_run(model_cls(), engine))
+
+    assert sorted(_tool_call_ids(parts, "tool-input-available")) == ["call_0", "call_1"]
+    assert sorted(_tool_call_ids(parts, "tool-output-available")) == ["call_0", "call_1"]
+
+
+@pytest.mark.parametrize("engine", list(STREAM_ENGINES))
+def test_model_chunks_are_counted_once(engine):
+    turn, _ = asyncio.run(_run(ParallelToolChatModel(), engine))
+
+    # Two chunks carrying both text and a tool call, then one text chunk
+    assert turn.model_chunks == 3
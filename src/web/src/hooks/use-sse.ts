@@ -11,6 +11,8 @@ const RECONNECT_DELAY = 3000; // 3 seconds
 export function useSSEInit() {
     const eventSourceRef = useRef<EventSource | null>(null);
     const reconnectTimeoutRef = useRef<ReturnType<typeof setTimeout> | null>(null);
+    // Last event id seen, sent on reconnect so the backend replays missed events
+    const lastEventIdRef = useRef<string | null>(null);
 
     useEffect(() => {
         const connect = () => {
@@ -20,8 +22,11 @@ export function useSSEInit() {
             }
 
             try {
-                console.log('[SSE] Connecting to:', SSE_URL);
-                const eventSource = new EventSource(SSE_URL);
+                const url = lastEventIdRef.current
+                    ? `${SSE_URL}?last_event_id=${encodeURIComponent(lastEventIdRef.current)}`
+                    : SSE_URL;
+                console.log('[SSE] Connecting to:', url);
+                const eventSource = new EventSource(url);
                 eventSourceRef.current = eventSource;
 
                 eventSource.onopen = () => {
@@ -34,6 +39,7 @@ export function useSSEInit() {
 
                 // Listen for named events (conversation_invite)
                 eventSource.addEventListener('conversation_invite', (event) => {
+                    if (event.lastEventId) lastEventIdRef.current = event.lastEventId;
                     console.log('[SSE] Received conversation_invite event:', event.data);
                     try {
                         const data = JSON.parse(event.data);
@@ -51,6 +57,7 @@ export function useSSEInit() {
 
                 // Listen for url_summary_complete events
                 eventSource.addEventListener('url_summary_complete', (event) => {
+                    if (event.lastEventId) lastEventIdRef.current = event.lastEventId;
                     console.log('[SSE] Received url_summary_complete event:', event.data);
                     try {
                         const data = JSON.parse(event.data);
@@ -68,6 +75,7 @@ export function useSSEInit() {
 
                 // Default message handler
                 eventSource.onmessage = (event) => {
+                    if (event.lastEventId) lastEventIdRef.current = event.lastEventId;
                     console.log('[SSE] Received message event:', event.data);
                     try {
                         const data = JSON.parse(event.data);